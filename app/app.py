@@ -3,34 +3,36 @@
 import time
 
 from flask import Flask, Response, g, jsonify, render_template, request
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from .archive import archive_cli
+from .compression import entries_cli
 from .config import Config, TestingConfig
 from .db import db, migrate
+from .events import EventBroker, EventRelay
+from .join_codes import JoinCodeService
+from .memory import MemoryDiagnostics, update_gauges
+from .membership import MembershipCache
+from .metrics import (
+    DB_QUERIES,
+    DB_TIME,
+    ERROR_COUNT,
+    REPEATED_QUERIES,
+    REQUEST_COUNT,
+    REQUEST_LATENCY,
+    metrics_registry,
+)
+from .passwords import PasswordHasher, passwords_cli
+from .profiler import finish_profile, start_profile, stop_profile, wants_profile
+from .purge import Purger, purge_cli
+from .query_log import QueryLog
+from .querystats import current_stats, start_request, warn_repeated
+from .rollups import rollups_cli
 from .routes.api import api_blueprints
 from .routes.ui import ui_blueprints
+from .sampler import sampler_cli, sampler_from_config
 from .utils.formatters import localdt
 
-# ----------------------- Prometheus metrics -----------------------
-
-REQUEST_COUNT = Counter(
-    "petcare_request_total",
-    "Total HTTP requests",
-    ["method", "endpoint"],
-)
-
-REQUEST_LATENCY = Histogram(
-    "petcare_request_duration_seconds",
-    "HTTP request latency in seconds",
-    ["endpoint"],
-)
-
-ERROR_COUNT = Counter(
-    "petcare_error_total",
-    "Total error responses (5xx)",
-    ["endpoint", "status"],
-)
-
 
 def create_app(testing: bool = False):
     """Create and configure the Flask application.
@@ -47,11 +49,54 @@ def create_app(testing: bool = False):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Fan-out for the household SSE streams, fed from the stored event log
+    app.extensions["event_broker"] = EventBroker(backlog=app.config["SSE_BACKLOG"])
+    app.extensions["event_relay"] = EventRelay(
+        app,
+        app.extensions["event_broker"],
+        interval=app.config["EVENTS_POLL_INTERVAL"],
+        gap_seconds=app.config["EVENTS_GAP_SECONDS"],
+    )
+    # Which households each user belongs to; invalidated on membership commits
+    app.extensions["membership_cache"] = MembershipCache(
+        max_users=app.config["MEMBERSHIP_CACHE_SIZE"], ttl=app.config["MEMBERSHIP_CACHE_TTL"]
+    )
+    # Join-code allocation and cached code -> household lookups
+    app.extensions["join_codes"] = JoinCodeService(
+        max_attempts=app.config["JOIN_CODE_MAX_ATTEMPTS"],
+        cache_size=app.config["JOIN_CODE_CACHE_SIZE"],
+        negative_cache_size=app.config["JOIN_CODE_CACHE_SIZE"],
+        ttl=app.config["JOIN_CODE_CACHE_TTL"],
+        negative_ttl=app.config["JOIN_CODE_NEGATIVE_TTL"],
+        fill_interval=app.config["JOIN_CODE_FILL_INTERVAL"],
+    )
+    # Background removal of soft-deleted households and pets
+    app.extensions["purger"] = Purger(app, inline=app.config["PURGE_INLINE"])
+    # Password hashing in a process pool, cost calibrated to PASSWORD_HASH_TARGET_MS
+    app.extensions["password_hasher"] = PasswordHasher.from_config(app.config)
+    # Opt-in SQL statistics by fingerprint and slow-query log
+    if app.config["SLOW_QUERY_MS"] > 0:
+        app.extensions["query_log"] = QueryLog(
+            app.config["SLOW_QUERY_MS"], max_fingerprints=app.config["QUERY_STATS_MAX"]
+        )
+    # Always-on stack sampler; its thread starts with the first request
+    app.extensions["sampler"] = sampler_from_config(app.config)
+    # Admin-driven allocation tracing and snapshot diffs
+    app.extensions["memory"] = MemoryDiagnostics(keep=app.config["MEMORY_SNAPSHOTS_KEEP"])
+
     # Ensure tables exist when running in non-testing mode (e.g., Azure)
     if not testing:
         with app.app_context():
             db.create_all()
 
+    # CLI maintenance commands (e.g. `flask rollups rebuild`, `flask archive run`)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(entries_cli)
+    app.cli.add_command(purge_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(sampler_cli)
+
     # Register blueprints
     for bp in api_blueprints:
         app.register_blueprint(bp)
@@ -73,13 +118,19 @@ def create_app(testing: bool = False):
 
     @app.route("/metrics")
     def metrics():
-        """Expose Prometheus metrics for scraping."""
-        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+        """Expose Prometheus metrics for scraping (summed over workers in multiprocess mode)."""
+        update_gauges(force=True)
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
 
     @app.before_request
     def _start_timer():
-        """Record start time for latency metrics."""
+        """Record start time for latency metrics, start counting SQL, and profile if asked."""
+        profiling = wants_profile() and start_profile()
         g._start_time = time.perf_counter()
+        start_request(track_shapes=profiling or app.config["NPLUSONE_THRESHOLD"] > 0)
+        sampler = app.extensions.get("sampler")
+        if sampler is not None:
+            sampler.enter(request.endpoint)
 
     @app.after_request
     def _record_metrics(response):
@@ -92,15 +143,36 @@ def create_app(testing: bool = False):
 
         # Latency
         start = getattr(g, "_start_time", None)
+        elapsed = 0.0
         if start is not None:
             elapsed = time.perf_counter() - start
             REQUEST_LATENCY.labels(endpoint=endpoint).observe(elapsed)
 
+        # SQL statements and time spent on them
+        stats = current_stats()
+        if stats is not None:
+            DB_QUERIES.labels(endpoint=endpoint).observe(stats.count)
+            DB_TIME.labels(endpoint=endpoint).observe(stats.seconds)
+            if warn_repeated(endpoint, stats, app.config["NPLUSONE_THRESHOLD"]):
+                REPEATED_QUERIES.labels(endpoint=endpoint).inc()
+
+        # Process RSS and GC gauges (rate-limited)
+        update_gauges()
+
         # Errors (server-side)
         if response.status_code >= 500:
             ERROR_COUNT.labels(endpoint=endpoint, status=str(response.status_code)).inc()
 
-        return response
+        # Saves the report and adds X-Profile-Id when this request was profiled
+        return finish_profile(response, elapsed, stats)
+
+    @app.teardown_request
+    def _stop_profilers(exc):
+        """Stop sampling this thread; never leave a profiler running after a request that raised."""
+        sampler = app.extensions.get("sampler")
+        if sampler is not None:
+            sampler.leave()
+        stop_profile()
 
     # --------------------------- Error handlers ---------------------------
 
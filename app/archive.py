@@ -0,0 +1,388 @@
+"""Cold-tier archival of old entries into compressed, append-only segment files.
+
+Layout under ARCHIVE_DIR, one directory per pet and one segment per month:
+
+    pet-<id>/<YYYY-MM>.seg   concatenated zlib frames (JSON rows)
+    pet-<id>/<YYYY-MM>.idx   fixed-size records, one per frame
+
+Each archival batch appends one frame per (pet, month) and then one index
+record (offset, length, count, min/max created_at); readers memory-map both
+files and only inflate the frames they need. Segments are written before the
+rows are deleted from the live table, so a crash can at worst leave a row in
+both places; readers drop such duplicates by id.
+
+Archived entries stay visible to entry listings, exports and full syncs, and
+keep counting in the activity rollup. An ArchivedEntryRef row per entry, written
+in the same transaction that removes the live row, maps its id to the pet and
+month, so GET by id still finds it. They are read-only (PATCH/DELETE answer
+409), and are not in the full-text index: search flags results whose scope has
+archived history with X-History-Truncated.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import zlib
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Optional
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from .compression import inflate_text
+from .db import db
+from .models import ArchivedEntryRef, Entry, Household, Pet
+
+_EPOCH = datetime(1970, 1, 1)
+# offset, length, row count, min created_at, max created_at (microseconds since epoch)
+_INDEX = struct.Struct("<QIIqq")
+_FrameRef = namedtuple("_FrameRef", "offset length count min_ts max_ts")
+
+
+class ArchivedEntry(namedtuple("ArchivedEntry", "id pet_id user_id content created_at")):
+    """An entry read back from a segment; serializes exactly like Entry."""
+
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "pet_id": self.pet_id,
+            "user_id": self.user_id,
+            "content": self.content,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+def _micros(dt: datetime) -> int:
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _sort_key(row):
+    return (row.created_at, row.id)
+
+
+def _dedupe(rows):
+    """Drop consecutive rows with the same id (a row archived twice, or in both tiers)."""
+    last = None
+    for row in rows:
+        if row.id != last:
+            last = row.id
+            yield row
+
+
+def merge_entries(*sources, reverse: bool = False):
+    """Merge (created_at, id)-sorted row iterables into one sorted, de-duplicated stream."""
+    return _dedupe(heapq.merge(*sources, key=_sort_key, reverse=reverse))
+
+
+class _Mapped:
+    """Read-only mmap of a file that may be empty or missing."""
+
+    def __init__(self, path: str):
+        self._file = self._map = None
+        try:
+            self._file = open(path, "rb")
+        except FileNotFoundError:
+            return
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self._map
+
+    def __exit__(self, *exc):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class ArchiveStore:
+    """Reads and appends the segment files rooted at one directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _pet_dir(self, pet_id: int) -> str:
+        return os.path.join(self.root, f"pet-{pet_id}")
+
+    def months(self, pet_id: int) -> list:
+        """Archived months of a pet ("YYYY-MM"), oldest first."""
+        try:
+            names = os.listdir(self._pet_dir(pet_id))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith(".idx"))
+
+    def _frames(self, pet_id: int, month: str) -> list:
+        path = os.path.join(self._pet_dir(pet_id), f"{month}.idx")
+        with _Mapped(path) as index:
+            if index is None:
+                return []
+            # Ignore a trailing partial record from an append still in progress.
+            usable = len(index) - len(index) % _INDEX.size
+            return [_FrameRef(*rec) for rec in _INDEX.iter_unpack(index[:usable])]
+
+    def _read_month(self, pet_id: int, month: str, keep=lambda frame: True) -> list:
+        """Decode the frames of one month that pass `keep`, sorted oldest first."""
+        frames = [f for f in self._frames(pet_id, month) if keep(f)]
+        if not frames:
+            return []
+        rows = []
+        with _Mapped(os.path.join(self._pet_dir(pet_id), f"{month}.seg")) as seg:
+            for f in frames:
+                payload = zlib.decompress(seg[f.offset : f.offset + f.length])
+                for entry_id, user_id, content, created_at in json.loads(payload):
+                    rows.append(
+                        ArchivedEntry(
+                            entry_id, pet_id, user_id, content, datetime.fromisoformat(created_at)
+                        )
+                    )
+        rows.sort(key=_sort_key)
+        return rows
+
+    def newest(self, pet_id: int) -> Optional[datetime]:
+        """created_at of the pet's newest archived entry, from the index alone."""
+        months = self.months(pet_id)
+        if not months:
+            return None
+        frames = self._frames(pet_id, months[-1])
+        if not frames:
+            return None
+        return _EPOCH + timedelta(microseconds=max(f.max_ts for f in frames))
+
+    def newest_first(self, pet_id: int, before=None, since=None):
+        """Yield archived entries newest first, strictly below a (created_at, id) key.
+
+        Months are decoded lazily, so a consumer that stops early only pays for
+        the months it actually reached; months entirely before `since` are never
+        opened.
+        """
+        lo = _micros(since) if since is not None else None
+        hi = _micros(before[0]) if before is not None else None
+
+        def keep(frame):
+            return (lo is None or frame.max_ts >= lo) and (hi is None or frame.min_ts <= hi)
+
+        for month in reversed(self.months(pet_id)):
+            if since is not None and month < since.strftime("%Y-%m"):
+                return
+            if before is not None and month > before[0].strftime("%Y-%m"):
+                continue
+            rows = self._read_month(pet_id, month, keep)
+            if before is not None:
+                rows = [r for r in rows if _sort_key(r) < before]
+            if since is not None:
+                rows = [r for r in rows if r.created_at >= since]
+            yield from reversed(rows)
+
+    def oldest_first(self, pet_id: int, after=None):
+        """Yield archived entries oldest first, strictly above a (created_at, id) key.
+
+        Months and frames entirely before `after` are never decoded.
+        """
+        lo = _micros(after[0]) if after is not None else None
+        for month in self.months(pet_id):
+            if after is not None and month < after[0].strftime("%Y-%m"):
+                continue
+            rows = self._read_month(pet_id, month, lambda f: lo is None or f.max_ts >= lo)
+            if after is not None:
+                rows = [r for r in rows if _sort_key(r) > after]
+            yield from rows
+
+    def find(self, pet_id: int, entry_id: int, created_at: datetime) -> Optional[ArchivedEntry]:
+        """Read one archived entry, decoding only the frames that can hold it."""
+        ts = _micros(created_at)
+        rows = self._read_month(
+            pet_id, created_at.strftime("%Y-%m"), lambda f: f.min_ts <= ts <= f.max_ts
+        )
+        return next((r for r in rows if r.id == entry_id), None)
+
+    def append(self, pet_id: int, rows) -> None:
+        """Append rows (anything with id/user_id/content/created_at) as one frame per month."""
+        rows = sorted(rows, key=_sort_key)
+        os.makedirs(self._pet_dir(pet_id), exist_ok=True)
+        for month, group in groupby(rows, key=lambda r: r.created_at.strftime("%Y-%m")):
+            group = list(group)
+            payload = zlib.compress(
+                json.dumps(
+                    [
+                        [r.id, r.user_id, inflate_text(r.content), r.created_at.isoformat()]
+                        for r in group
+                    ],
+                    separators=(",", ":"),
+                ).encode()
+            )
+            base = os.path.join(self._pet_dir(pet_id), month)
+            # Data first, index second: an index record never points past written bytes.
+            with open(f"{base}.seg", "ab") as seg:
+                offset = seg.tell()
+                seg.write(payload)
+                seg.flush()
+                os.fsync(seg.fileno())
+            record = _INDEX.pack(
+                offset,
+                len(payload),
+                len(group),
+                _micros(group[0].created_at),
+                _micros(group[-1].created_at),
+            )
+            with open(f"{base}.idx", "ab") as idx:
+                idx.write(record)
+                idx.flush()
+                os.fsync(idx.fileno())
+
+    def activity(self, pet_id: Optional[int] = None) -> Counter:
+        """(pet_id, day, user_id) entry counts of the archive, for rollup rebuilds."""
+        if pet_id is not None:
+            pet_ids = [pet_id]
+        else:
+            try:
+                names = os.listdir(self.root)
+            except FileNotFoundError:
+                names = []
+            pet_ids = [int(n[4:]) for n in names if n.startswith("pet-") and n[4:].isdigit()]
+        counts = Counter()
+        for pid in pet_ids:
+            for row in _dedupe(self.oldest_first(pid)):
+                counts[(pid, row.created_at.date(), row.user_id)] += 1
+        return counts
+
+    def remove_pet(self, pet_id: int) -> None:
+        shutil.rmtree(self._pet_dir(pet_id), ignore_errors=True)
+
+
+def get_archive() -> Optional[ArchiveStore]:
+    """Return the current app's archive, or None if ARCHIVE_DIR is unset."""
+    root = current_app.config.get("ARCHIVE_DIR")
+    return ArchiveStore(root) if root else None
+
+
+def archived_entry(session, entry_id: int) -> Optional[ArchivedEntry]:
+    """Look up an archived entry by id; None if unknown or its pet is deleted."""
+    store = get_archive()
+    if store is None:
+        return None
+    ref = session.execute(
+        select(ArchivedEntryRef.pet_id, ArchivedEntryRef.created_at)
+        .join(Pet, Pet.id == ArchivedEntryRef.pet_id)
+        .where(ArchivedEntryRef.id == entry_id)
+    ).first()
+    return store.find(ref.pet_id, entry_id, ref.created_at) if ref else None
+
+
+def archive_entries(session, store: ArchiveStore, cutoff: datetime, batch_size: int = 1000) -> int:
+    """Move entries created before `cutoff` into the archive; returns rows moved.
+
+    Works pet by pet and `batch_size` rows at a time, committing after each
+    batch. Rows are removed with a Core DELETE by id so the rollup keeps
+    counting them, no tombstones are written, and entries inserted meanwhile
+    are never removed unarchived.
+    """
+    pet_ids = session.scalars(
+        select(Entry.pet_id).where(Entry.created_at < cutoff).distinct().order_by(Entry.pet_id)
+    ).all()
+
+    moved = 0
+    for pet_id in pet_ids:
+        while True:
+            rows = session.execute(
+                select(Entry.id, Entry.user_id, Entry.content, Entry.created_at)
+                .where(Entry.pet_id == pet_id, Entry.created_at < cutoff)
+                .order_by(Entry.created_at, Entry.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            store.append(pet_id, rows)
+            session.execute(
+                insert(ArchivedEntryRef),
+                [{"id": r.id, "pet_id": pet_id, "created_at": r.created_at} for r in rows],
+            )
+            session.execute(delete(Entry).where(Entry.id.in_([r.id for r in rows])))
+            session.commit()
+            moved += len(rows)
+    return moved
+
+
+# ---------------------------- Session integration ----------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deleted_pets(session, flush_context, instances) -> None:
+    # Pets of a deleted household go by FK cascade, so look them up now.
+    for obj in session.deleted:
+        if isinstance(obj, Pet):
+            session.info.setdefault("archive_purge", set()).add(obj.id)
+        elif isinstance(obj, Household):
+            pet_ids = session.scalars(select(Pet.id).where(Pet.household_id == obj.id)).all()
+            session.info.setdefault("archive_purge", set()).update(pet_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _purge_deleted_pets(session) -> None:
+    pet_ids = session.info.pop("archive_purge", None)
+    if not pet_ids or not has_app_context():
+        return
+    store = get_archive()
+    if store is not None:
+        for pet_id in pet_ids:
+            store.remove_pet(pet_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_archive_purge(session) -> None:
+    session.info.pop("archive_purge", None)
+
+
+archive_cli = AppGroup("archive", help="Move old entries to cold storage.")
+
+
+@archive_cli.command("run")
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=None,
+    help="Archive entries older than this (default ARCHIVE_AFTER_DAYS).",
+)
+def run_command(older_than_days):
+    """Archive entries older than the configured age."""
+    store = get_archive()
+    if store is None:
+        raise click.ClickException("ARCHIVE_DIR is not configured.")
+    cfg = current_app.config
+    days = older_than_days if older_than_days is not None else cfg["ARCHIVE_AFTER_DAYS"]
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = archive_entries(db.session, store, cutoff, cfg["ARCHIVE_BATCH_SIZE"])
+    click.echo(f"Archived {moved} entries older than {cutoff:%Y-%m-%d}.")
+
+
+@archive_cli.command("reindex")
+def reindex_command():
+    """Rebuild the id -> pet/month refs of archived entries from the segment files."""
+    store = get_archive()
+    if store is None:
+        raise click.ClickException("ARCHIVE_DIR is not configured.")
+    session = db.session
+    pet_ids = session.scalars(select(Pet.id).execution_options(include_deleted=True)).all()
+    total = 0
+    for pet_id in pet_ids:
+        rows = [
+            {"id": r.id, "pet_id": pet_id, "created_at": r.created_at}
+            for r in _dedupe(store.oldest_first(pet_id))
+        ]
+        session.execute(delete(ArchivedEntryRef).where(ArchivedEntryRef.pet_id == pet_id))
+        if rows:
+            session.execute(insert(ArchivedEntryRef), rows)
+        session.commit()
+        total += len(rows)
+    click.echo(f"Indexed {total} archived entries.")
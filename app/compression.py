@@ -0,0 +1,131 @@
+"""Transparent zlib compression of large entry content on SQLite.
+
+Content longer than ENTRY_COMPRESS_MIN_BYTES is stored as a zlib BLOB in the
+same `content` column (SQLite columns accept any storage class). Loading a
+row does not inflate it: Entry.content does that when it is read, and Core
+selects of the column pass what they need through `inflate_text`. Small
+content stays plain TEXT, so the storage class alone tells both apart.
+
+PostgreSQL already compresses large values out of line (TOAST), so there the
+type is a plain pass-through and the full-text index keeps working unchanged.
+
+On SQLite the FTS triggers index `entry_text(content)`, a Python function the
+app registers on every connection it opens. Any other connection that inserts,
+updates or deletes entries (a maintenance script, alembic outside the app) must
+call `register_sqlite_functions` first, or the write fails with "no such
+function: entry_text". The sqlite3 shell cannot load it, so use it read-only
+on entries. Page-level backups (`.backup`, file copies) are unaffected.
+"""
+
+import sqlite3
+import zlib
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from prometheus_client import Counter
+from sqlalchemy import LargeBinary, bindparam, cast, event, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import Text, TypeDecorator
+
+DEFAULT_MIN_BYTES = 1024
+
+COMPRESSED_BYTES_SAVED = Counter(
+    "petcare_entry_compression_saved_bytes_total",
+    "Bytes saved by compressing entry content on write",
+)
+
+
+def compress_text(text: str, min_bytes: int):
+    """Return zlib bytes for `text` if it is large and compresses, else `text` unchanged."""
+    raw = text.encode("utf-8")
+    if len(raw) < min_bytes:
+        return text
+    packed = zlib.compress(raw)
+    if len(packed) >= len(raw):
+        return text
+    COMPRESSED_BYTES_SAVED.inc(len(raw) - len(packed))
+    return packed
+
+
+def inflate_text(value):
+    """Inverse of `compress_text`; plain strings (and None) pass through."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def _min_bytes() -> int:
+    if has_app_context():
+        return current_app.config.get("ENTRY_COMPRESS_MIN_BYTES", DEFAULT_MIN_BYTES)
+    return DEFAULT_MIN_BYTES
+
+
+class CompressedText(TypeDecorator):
+    """Text that is stored compressed above a size threshold (SQLite only)."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return compress_text(value, _min_bytes())
+
+
+def register_sqlite_functions(dbapi_connection: sqlite3.Connection) -> None:
+    """Add entry_text(), which the FTS triggers call, to a raw sqlite3 connection."""
+    dbapi_connection.create_function("entry_text", 1, inflate_text, deterministic=True)
+
+
+@event.listens_for(Engine, "connect")
+def _register_on_connect(dbapi_connection, connection_record) -> None:
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        register_sqlite_functions(dbapi_connection)
+
+
+entries_cli = AppGroup("entries", help="Maintain stored entry content.")
+
+
+@entries_cli.command("compress")
+@click.option("--batch-size", type=int, default=500, show_default=True)
+def compress_command(batch_size):
+    """Compress existing large entries in place (SQLite only; safe to re-run)."""
+    from .db import db  # deferred: models import this module
+    from .models import Entry
+
+    if db.engine.dialect.name != "sqlite":
+        raise click.ClickException("compression is only used on SQLite")
+
+    min_bytes = _min_bytes()
+    entry = Entry.__table__
+    size = func.length(cast(entry.c.content, LargeBinary))
+    # Keep updated_at: the text is unchanged, so sync clients needn't refetch it.
+    stmt = (
+        update(entry)
+        .where(entry.c.id == bindparam("b_id"))
+        .values(content=bindparam("b_content", type_=entry.c.content.type), updated_at=entry.c.updated_at)
+    )
+
+    last_id, rows_done, saved = 0, 0, 0
+    while True:
+        batch = db.session.execute(
+            select(entry.c.id, entry.c.content, size)
+            .where(entry.c.id > last_id, func.typeof(entry.c.content) == "text", size >= min_bytes)
+            .order_by(entry.c.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        db.session.execute(stmt, [{"b_id": i, "b_content": c} for i, c, _ in batch])
+        db.session.commit()
+        after = dict(
+            db.session.execute(
+                select(entry.c.id, size).where(entry.c.id.in_([i for i, _, _ in batch]))
+            ).all()
+        )
+        saved += sum(before - after[i] for i, _, before in batch)
+        rows_done += len(batch)
+        last_id = batch[-1][0]
+
+    click.echo(f"Compressed {rows_done} entries, saved {saved} bytes.")
@@ -27,9 +27,120 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Keyset pagination for entry listings
+    ENTRIES_PAGE_SIZE = int(os.getenv("ENTRIES_PAGE_SIZE", "50"))
+    ENTRIES_PAGE_MAX = int(os.getenv("ENTRIES_PAGE_MAX", "200"))
+
+    # Household snapshot: recent entries embedded per pet (default and cap)
+    SNAPSHOT_ENTRIES_PER_PET = int(os.getenv("SNAPSHOT_ENTRIES_PER_PET", "5"))
+    SNAPSHOT_ENTRIES_MAX = int(os.getenv("SNAPSHOT_ENTRIES_MAX", "50"))
+
+    # Upper bound on entries accepted by one batch-ingestion request
+    ENTRY_BATCH_MAX = int(os.getenv("ENTRY_BATCH_MAX", "500"))
+
+    # Rows fetched per server-side cursor batch when streaming exports
+    EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+    # Delta sync watermarks overlap the previous window by this much
+    SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "2"))
+    # Entries per sync page; the rest follow via X-Next-Cursor
+    SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+    SYNC_PAGE_MAX = int(os.getenv("SYNC_PAGE_MAX", "2000"))
+    # Tombstones older than this are pruned (`flask purge tombstones`); clients whose
+    # watermark is older get 410 and must sync from scratch
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+    # Server-Sent Events: heartbeat interval, max stream lifetime, and the most events
+    # held per subscribed household or replayed on reconnect. Each open stream occupies
+    # a worker thread until it ends; serve them from a separate stream instance (see
+    # gunicorn.conf.py) so they don't take request threads.
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_MAX_SECONDS = float(os.getenv("SSE_MAX_SECONDS", "60"))
+    SSE_BACKLOG = int(os.getenv("SSE_BACKLOG", "500"))
+    # Stored events reach other workers' streams by polling (0: only when a stream
+    # opens); a missing id is waited for this long; `flask purge events` drops rows
+    # older than the retention, which bounds how far back a stream can resume
+    EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))
+    EVENTS_GAP_SECONDS = float(os.getenv("EVENTS_GAP_SECONDS", "2"))
+    SSE_EVENT_RETENTION_SECONDS = int(os.getenv("SSE_EVENT_RETENTION_SECONDS", "3600"))
+
+    # Cold-tier archive of old entries (`flask archive run`); unset disables it
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(INSTANCE_DIR, "archive"))
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+    # Entry content at least this large (UTF-8 bytes) is stored zlib-compressed on SQLite
+    ENTRY_COMPRESS_MIN_BYTES = int(os.getenv("ENTRY_COMPRESS_MIN_BYTES", "1024"))
+
+    # In-process user -> household ids cache; a TTL of 0 disables it
+    MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+    MEMBERSHIP_CACHE_TTL = float(os.getenv("MEMBERSHIP_CACHE_TTL", "60"))
+
+    # Join codes: allocation attempts, lookup cache sizes, how long hits and misses are
+    # cached, and how often allocation re-counts the code space for the fill gauge
+    JOIN_CODE_MAX_ATTEMPTS = int(os.getenv("JOIN_CODE_MAX_ATTEMPTS", "10"))
+    JOIN_CODE_CACHE_SIZE = int(os.getenv("JOIN_CODE_CACHE_SIZE", "10000"))
+    JOIN_CODE_CACHE_TTL = float(os.getenv("JOIN_CODE_CACHE_TTL", "300"))
+    JOIN_CODE_NEGATIVE_TTL = float(os.getenv("JOIN_CODE_NEGATIVE_TTL", "30"))
+    JOIN_CODE_FILL_INTERVAL = float(os.getenv("JOIN_CODE_FILL_INTERVAL", "60"))
+
+    # Deleted households/pets are purged in the background, this many entries per transaction
+    PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+    PURGE_INLINE = os.getenv("PURGE_INLINE", "0") == "1"
+
+    # Password hashing: worker processes (0 hashes in the request thread); the time
+    # one hash should take, which `flask passwords calibrate` raises the scrypt cost
+    # towards at deploy time (never lowers it); and the method new hashes use
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "50"))
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+    # Usernames allowed to use the /api/v1/admin endpoints (comma-separated)
+    ADMIN_USERNAMES = frozenset(
+        name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()
+    )
+
+    # Opt-in per-fingerprint SQL statistics; statements at least this slow are
+    # logged and EXPLAINed (0 disables), keeping at most QUERY_STATS_MAX shapes
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+    QUERY_STATS_MAX = int(os.getenv("QUERY_STATS_MAX", "500"))
+
+    # Warn when one statement shape runs more than this many times in a request,
+    # the usual sign of an N+1 (0 disables; on by default with FLASK_DEBUG)
+    NPLUSONE_THRESHOLD = int(
+        os.getenv("NPLUSONE_THRESHOLD", "5" if os.getenv("FLASK_DEBUG") == "1" else "0")
+    )
+
+    # Where admin-requested request profiles (X-Profile: 1) are saved; empty
+    # disables profiling. Only the newest PROFILE_KEEP reports are kept.
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(INSTANCE_DIR, "profiles"))
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+    # Always-on stack sampling of request threads (0 disables); see app.sampler
+    SAMPLER_INTERVAL_MS = float(os.getenv("SAMPLER_INTERVAL_MS", "10"))
+    SAMPLER_MAX_STACKS = int(os.getenv("SAMPLER_MAX_STACKS", "5000"))
+
+    # tracemalloc snapshots kept per worker for /api/v1/admin/memory diffs
+    MEMORY_SNAPSHOTS_KEEP = int(os.getenv("MEMORY_SNAPSHOTS_KEEP", "5"))
+
 
 class TestingConfig(Config):
     """Testing configuration: isolated in-memory database."""
 
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # Tests that exercise archival point this at a temporary directory
+    ARCHIVE_DIR = None
+    # Purge deleted households/pets before the request returns
+    PURGE_INLINE = True
+    # Hash inline with werkzeug's default cost; no calibration run per app
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_TARGET_MS = 0
+    # Track statement shapes so tests/conftest.py can fail N+1 endpoints
+    NPLUSONE_THRESHOLD = 5
+    # Tests that exercise profiling point this at a temporary directory
+    PROFILE_DIR = None
+    # No sampler thread per test app; sampler tests build their own
+    SAMPLER_INTERVAL_MS = 0
+    # No event relay thread; streams catch up from the event log when they open
+    EVENTS_POLL_INTERVAL = 0
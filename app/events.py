@@ -0,0 +1,326 @@
+"""Household events for Server-Sent Events subscribers, shared by every worker.
+
+Entry writes add a StoredEvent row in the same transaction, so an event exists
+exactly when its change committed, and its id is the SSE event id everywhere.
+In each worker that has open streams, one EventRelay thread polls the table
+every EVENTS_POLL_INTERVAL seconds and hands new rows, in id order, to that
+process's EventBroker, which wakes the subscribers of each household; streams
+themselves never touch the database while waiting. Commits made by the worker
+itself wake its relay at once.
+
+The broker only keeps a channel while its household has subscribers. A
+reconnecting client's missed events are replayed from the table (see
+`replay`), so Last-Event-ID works whichever worker served it before. Rows
+older than SSE_EVENT_RETENTION_SECONDS are dropped by `flask purge events`;
+a Last-Event-ID from before that is answered with a reset.
+
+Ids are handed out in insert order but may commit out of order on PostgreSQL.
+The relay holds back rows behind a missing id for up to EVENTS_GAP_SECONDS,
+so a transaction that commits late is still delivered in order; a gap that
+outlives that is a rolled-back insert and is skipped.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .db import db
+from .models import Entry, Pet, StoredEvent
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HouseholdEvent:
+    id: int
+    household_id: int
+    type: str
+    data: dict
+
+
+class _Channel:
+    """Recent events of one subscribed household plus the condition its subscribers wait on."""
+
+    def __init__(self, lock: threading.Lock, backlog: int, complete_after: int):
+        self.events = deque(maxlen=backlog)
+        self.cond = threading.Condition(lock)
+        self.subscribers = 0
+        # Every event of the household with a larger id is in `events`, or was evicted.
+        self.complete_after = complete_after
+
+
+class EventBroker:
+    """Per-process fan-out of relayed events to the subscribers of each household."""
+
+    def __init__(self, backlog: int = 500):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._backlog = backlog
+        self._last_id = 0
+
+    @property
+    def last_id(self) -> int:
+        """Id of the newest event relayed to this process."""
+        with self._lock:
+            return self._last_id
+
+    @property
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._channels)
+
+    def subscribe(self, household_id: int) -> int:
+        """Start holding events of a household; returns the id they are complete after."""
+        with self._lock:
+            channel = self._channels.get(household_id)
+            if channel is None:
+                channel = _Channel(self._lock, self._backlog, self._last_id)
+                self._channels[household_id] = channel
+            channel.subscribers += 1
+            return self._last_id
+
+    def unsubscribe(self, household_id: int) -> None:
+        """Drop a subscription; the household's channel goes with its last subscriber."""
+        with self._lock:
+            channel = self._channels.get(household_id)
+            if channel is None:
+                return
+            channel.subscribers -= 1
+            if channel.subscribers <= 0:
+                del self._channels[household_id]
+
+    def advance(self, last_id: int) -> None:
+        """Record that every event up to `last_id` has been relayed."""
+        with self._lock:
+            self._last_id = max(self._last_id, last_id)
+
+    def publish(self, ev: HouseholdEvent) -> None:
+        """Hand over the next relayed event; kept only if its household has subscribers."""
+        with self._lock:
+            self._last_id = max(self._last_id, ev.id)
+            channel = self._channels.get(ev.household_id)
+            if channel is None:
+                return
+            if len(channel.events) == channel.events.maxlen:
+                channel.complete_after = channel.events[0].id
+            channel.events.append(ev)
+            channel.cond.notify_all()
+
+    def wait(self, household_id: int, after_id: int, timeout: float) -> Optional[list]:
+        """Block until events newer than `after_id` exist or `timeout` elapses.
+
+        Returns:
+            A list of events (empty on timeout), or None if the client must
+            resync: the household is not subscribed, or events after
+            `after_id` are no longer held (evicted, or from before the
+            subscription).
+        """
+        with self._lock:
+            channel = self._channels.get(household_id)
+            if channel is None or after_id < channel.complete_after:
+                return None
+            channel.cond.wait_for(
+                lambda: channel.events and channel.events[-1].id > after_id, timeout
+            )
+            return [ev for ev in channel.events if ev.id > after_id]
+
+
+def _to_event(row) -> HouseholdEvent:
+    return HouseholdEvent(row.id, row.household_id, row.type, json.loads(row.data))
+
+
+class EventRelay:
+    """Moves committed StoredEvents into this process's broker, in id order.
+
+    With an interval of 0 (tests) no thread runs; `attach` polls inline.
+    """
+
+    def __init__(
+        self,
+        app,
+        broker: EventBroker,
+        interval: float,
+        gap_seconds: float = 2.0,
+        batch_size: int = 500,
+    ):
+        self._app = app
+        self._broker = broker
+        self.interval = interval
+        self._gap_seconds = gap_seconds
+        self._batch_size = batch_size
+        self._lock = threading.Lock()  # one poll at a time
+        self._cursor = None  # id of the last event handed to the broker
+        self._gap_since = None
+        self._wake = threading.Event()
+        self._pid = None
+
+    def attach(self) -> None:
+        """Catch up now, and start the relay thread if this process has none yet.
+
+        Called by each new stream (inside an app context), so its replay and
+        the broker meet at an up-to-date id.
+        """
+        self.poll()
+        if self.interval > 0 and self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Threads do not survive fork; a forked worker starts its own.
+                    self._pid = os.getpid()
+                    self._wake = threading.Event()
+                    threading.Thread(target=self._run, name="event-relay", daemon=True).start()
+
+    def wake(self) -> None:
+        """Poll soon: this process just committed events."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        wake = self._wake
+        while True:
+            wake.wait(self.interval)
+            wake.clear()
+            if not self._broker.has_subscribers:
+                continue
+            try:
+                with self._app.app_context():
+                    self.poll()
+            except Exception:
+                log.exception("event relay poll failed")
+
+    def poll(self) -> int:
+        """Hand committed events newer than the cursor to the broker; returns how many."""
+        with self._lock:
+            session = db.session
+            if self._cursor is None:
+                # Earlier events are served by `replay`, not the broker.
+                self._cursor = session.scalar(select(func.max(StoredEvent.id))) or 0
+                self._broker.advance(self._cursor)
+            rows = session.execute(
+                select(
+                    StoredEvent.id, StoredEvent.household_id, StoredEvent.type, StoredEvent.data
+                )
+                .where(StoredEvent.id > self._cursor)
+                .order_by(StoredEvent.id)
+                .limit(self._batch_size)
+            ).all()
+            delivered = 0
+            for row in rows:
+                if row.id != self._cursor + 1:
+                    now = time.monotonic()
+                    if self._gap_since is None:
+                        self._gap_since = now
+                    if now - self._gap_since < self._gap_seconds:
+                        break  # a lower id may still commit
+                self._gap_since = None
+                self._cursor = row.id
+                self._broker.publish(_to_event(row))
+                delivered += 1
+            return delivered
+
+
+def get_broker() -> Optional[EventBroker]:
+    """Return the current app's broker, if one is installed."""
+    return current_app.extensions.get("event_broker") if current_app else None
+
+
+def get_relay() -> Optional[EventRelay]:
+    return current_app.extensions.get("event_relay") if current_app else None
+
+
+def replay(session, household_id: int, after_id: int, upto: int, limit: int) -> Optional[list]:
+    """Stored events of a household with after_id < id <= upto, oldest first.
+
+    Returns None if the client must reset instead: more than `limit` events
+    are missing, some may have been pruned already, or `after_id` was never
+    issued.
+    """
+    if after_id >= upto:
+        # Ahead of this worker's relay is fine if the id was issued; one that never
+        # was (the log was recreated) needs a reset.
+        if after_id > upto and after_id > (session.scalar(select(func.max(StoredEvent.id))) or 0):
+            return None
+        return []
+    oldest = session.scalar(select(func.min(StoredEvent.id)))
+    if oldest is None or oldest > after_id + 1:
+        return None
+    rows = session.execute(
+        select(StoredEvent.id, StoredEvent.household_id, StoredEvent.type, StoredEvent.data)
+        .where(
+            StoredEvent.household_id == household_id,
+            StoredEvent.id > after_id,
+            StoredEvent.id <= upto,
+        )
+        .order_by(StoredEvent.id)
+        .limit(limit + 1)
+    ).all()
+    if len(rows) > limit:
+        return None
+    return [_to_event(row) for row in rows]
+
+
+# ---------------------------- Session integration ----------------------------
+
+
+def record_events(session, events) -> None:
+    """Store (household_id, type, data) events; they become visible when the session commits."""
+    rows = [
+        {"household_id": household_id, "type": event_type, "data": json.dumps(data)}
+        for household_id, event_type, data in events
+        if household_id is not None
+    ]
+    if rows:
+        session.execute(insert(StoredEvent), rows)
+        session.info["events_recorded"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _record_entry_events(session, flush_context) -> None:
+    # new/dirty/deleted still reflect the pre-flush state inside after_flush.
+    created = [o for o in session.new if isinstance(o, Entry)]
+    updated = [
+        o
+        for o in session.dirty
+        if isinstance(o, Entry) and session.is_modified(o, include_collections=False)
+    ]
+    deleted = [o for o in session.deleted if isinstance(o, Entry)]
+    if not (created or updated or deleted):
+        return
+
+    # One lookup for the households of every changed entry's pet.
+    pet_ids = {o.pet_id for o in created + updated + deleted}
+    households = dict(
+        session.execute(
+            select(Pet.id, Pet.household_id)
+            .where(Pet.id.in_(pet_ids))
+            .execution_options(include_deleted=True)
+        ).all()
+    )
+    events = [(households.get(o.pet_id), "entry.created", o.to_dict()) for o in created]
+    events += [(households.get(o.pet_id), "entry.updated", o.to_dict()) for o in updated]
+    events += [
+        (households.get(o.pet_id), "entry.deleted", {"id": o.id, "pet_id": o.pet_id})
+        for o in deleted
+    ]
+    record_events(session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session) -> None:
+    if not session.info.pop("events_recorded", False) or not has_app_context():
+        return
+    relay = get_relay()
+    if relay is not None:
+        relay.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_recorded(session) -> None:
+    session.info.pop("events_recorded", None)
@@ -0,0 +1,248 @@
+"""Household join codes: allocation by insert-and-retry, and cached lookups.
+
+Allocation never checks before inserting: it inserts the household with a
+random code and lets the unique constraint reject a collision (ON CONFLICT DO
+NOTHING), retrying with a new code. That is one statement per attempt and
+safe across workers. Databases without ON CONFLICT get a plain insert inside a
+savepoint instead, and a unique violation rolls back to it. At most every
+fill_interval seconds an allocation also counts the households, soft-deleted
+ones included since they still hold their codes, so operators see collisions
+coming long before attempts run out.
+
+Lookups go through two bounded LRU caches: code -> household id, and a
+short-lived negative cache of codes known not to exist, so scripts hammering
+invalid codes never reach the database. Household inserts and deletes
+committed in this process update both caches; entries expire after a TTL so
+changes made by other workers are picked up too.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from flask import current_app, has_app_context
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import Household
+from .utils.join_code import ALPHABET, gen_join_code
+
+log = logging.getLogger(__name__)
+
+CODE_LENGTH = 6
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+JOIN_CODE_LOOKUPS = Counter(
+    "petcare_join_code_lookups_total",
+    "Join-code lookups by outcome",
+    ["result"],  # hit | negative_hit | miss | malformed
+)
+JOIN_CODE_COLLISIONS = Counter(
+    "petcare_join_code_collisions_total",
+    "Join-code allocation attempts rejected by the unique constraint",
+)
+JOIN_CODE_SPACE_USED = Gauge(
+    "petcare_join_code_space_used_ratio",
+    "Fraction of the join-code space taken by existing households",
+    multiprocess_mode="mostrecent",  # every worker measures the same table
+)
+
+
+class JoinCodeExhausted(Exception):
+    """Raised when no free code was found within the allowed attempts."""
+
+
+class _LRU:
+    """Small bounded mapping with optional per-item expiry (not thread-safe)."""
+
+    def __init__(self, max_items: int):
+        self._items = OrderedDict()  # key -> (expires_at or None, value)
+        self._max_items = max_items
+
+    def get(self, key, now: float):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= now:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item
+
+    def put(self, key, value, expires_at: Optional[float] = None) -> None:
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_items:
+            self._items.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self._items.pop(key, None)
+
+
+class JoinCodeService:
+    """Allocates join codes and answers code -> household id lookups."""
+
+    def __init__(
+        self,
+        max_attempts: int = 10,
+        cache_size: int = 10_000,
+        negative_cache_size: int = 10_000,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        fill_interval: float = 60.0,
+        clock=time.monotonic,
+    ):
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._known = _LRU(cache_size)
+        self._unknown = _LRU(negative_cache_size)
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._fill_interval = fill_interval
+        self._next_fill = 0.0
+        self._clock = clock
+
+    # ------------------------------ Allocation ------------------------------
+
+    def create_household(self, session, name: str) -> Household:
+        """Insert a household with a fresh unique code and return it (not committed).
+
+        Raises:
+            JoinCodeExhausted if every attempt collided.
+        """
+        make_insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+
+        for _ in range(self.max_attempts):
+            code = gen_join_code(CODE_LENGTH)
+            if make_insert is None:
+                household_id = self._insert_in_savepoint(session, name, code)
+            else:
+                stmt = (
+                    make_insert(Household)
+                    .values(name=name, join_code=code)
+                    .on_conflict_do_nothing(index_elements=["join_code"])
+                    .returning(Household.id)
+                )
+                household_id = session.execute(stmt).scalar()
+            if household_id is not None:
+                # Core inserts skip the flush hook; evict any cached miss on commit.
+                session.info.setdefault("join_code_changes", set()).add(code)
+                self._maybe_record_fill(session)
+                return session.get(Household, household_id)
+            JOIN_CODE_COLLISIONS.inc()
+
+        self._record_fill(session)
+        raise JoinCodeExhausted(f"no free join code after {self.max_attempts} attempts")
+
+    @staticmethod
+    def _insert_in_savepoint(session, name: str, code: str) -> Optional[int]:
+        """Generic path: plain INSERT; a unique violation rolls back to the savepoint."""
+        try:
+            with session.begin_nested():
+                result = session.execute(
+                    insert(Household.__table__).values(name=name, join_code=code)
+                )
+        except IntegrityError:
+            return None
+        return result.inserted_primary_key[0]
+
+    def _maybe_record_fill(self, session) -> None:
+        """Refresh the fill gauge if fill_interval has passed since the last count."""
+        now = self._clock()
+        with self._lock:
+            if now < self._next_fill:
+                return
+            self._next_fill = now + self._fill_interval
+        self._record_fill(session)
+
+    def _record_fill(self, session) -> float:
+        # Soft-deleted households keep their codes until the purge removes them.
+        count = session.scalar(
+            select(func.count())
+            .select_from(Household)
+            .execution_options(include_deleted=True)
+        )
+        used = count / CODE_SPACE
+        JOIN_CODE_SPACE_USED.set(used)
+        if used > 0.5:
+            # Expected attempts per allocation are 1 / (1 - used).
+            log.warning("join-code space is %.0f%% full", used * 100)
+        return used
+
+    # -------------------------------- Lookup --------------------------------
+
+    def lookup(self, session, code: str) -> Optional[int]:
+        """Return the household id for a join code, or None if there is none."""
+        code = (code or "").strip().upper()
+        if not code or len(code) > CODE_LENGTH or not (code.isascii() and code.isalnum()):
+            JOIN_CODE_LOOKUPS.labels("malformed").inc()
+            return None
+
+        now = self._clock()
+        with self._lock:
+            known = self._known.get(code, now)
+            if known is not None:
+                JOIN_CODE_LOOKUPS.labels("hit").inc()
+                return known[1]
+            if self._unknown.get(code, now) is not None:
+                JOIN_CODE_LOOKUPS.labels("negative_hit").inc()
+                return None
+
+        JOIN_CODE_LOOKUPS.labels("miss").inc()
+        household_id = session.scalar(select(Household.id).where(Household.join_code == code))
+        with self._lock:
+            if household_id is None:
+                self._unknown.put(code, True, now + self._negative_ttl)
+            else:
+                self._known.put(code, household_id, now + self._ttl)
+        return household_id
+
+    def forget(self, code: str) -> None:
+        """Drop a code from both caches (e.g. a cached household vanished)."""
+        with self._lock:
+            self._known.pop(code)
+            self._unknown.pop(code)
+
+
+def get_join_codes() -> JoinCodeService:
+    return current_app.extensions["join_codes"]
+
+
+# ---------------------------- Session integration ----------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_code_changes(session, flush_context, instances) -> None:
+    codes = [
+        obj.join_code
+        for obj in list(session.new) + list(session.deleted)
+        if isinstance(obj, Household) and obj.join_code
+    ]
+    if codes:
+        session.info.setdefault("join_code_changes", set()).update(codes)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_code_caches(session) -> None:
+    codes = session.info.pop("join_code_changes", None)
+    if not codes or not has_app_context():
+        return
+    service = current_app.extensions.get("join_codes")
+    if service is not None:
+        for code in codes:
+            service.forget(code)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_code_changes(session) -> None:
+    session.info.pop("join_code_changes", None)
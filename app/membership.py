@@ -0,0 +1,118 @@
+"""Per-process cache of which households each user belongs to.
+
+Maps user_id -> frozenset of household ids, bounded in size (LRU) and age
+(TTL). Membership writes invalidate the affected users when their transaction
+commits, wherever they happen (API, UI, cascades from a household delete), so
+a cached "member" answer is never older than the last committed change seen by
+this process. Other processes only catch up when the TTL expires.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from flask import current_app, has_app_context
+from prometheus_client import Counter
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from .models import Household, HouseholdMember, db
+
+CACHE_HITS = Counter("petcare_membership_cache_hits_total", "Membership cache hits")
+CACHE_MISSES = Counter("petcare_membership_cache_misses_total", "Membership cache misses")
+
+
+class MembershipCache:
+    """Thread-safe LRU of user_id -> frozenset(household ids) with a TTL."""
+
+    def __init__(self, max_users: int = 10_000, ttl: float = 60.0, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, household ids)
+        self._generation = 0  # bumped by every invalidation; guards racing loads
+        self._max_users = max_users
+        self._ttl = ttl
+        self._clock = clock
+
+    def get_or_load(self, user_id: int, load: Callable[[int], Iterable[int]]) -> frozenset:
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None and cached[0] > self._clock():
+                self._entries.move_to_end(user_id)
+                CACHE_HITS.inc()
+                return cached[1]
+            generation = self._generation
+        CACHE_MISSES.inc()
+
+        household_ids = frozenset(load(user_id))
+        with self._lock:
+            # Skip the store if a commit invalidated anything while we were loading.
+            if self._ttl > 0 and self._generation == generation:
+                self._entries[user_id] = (self._clock() + self._ttl, household_ids)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self._max_users:
+                    self._entries.popitem(last=False)
+        return household_ids
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _load_household_ids(user_id: int):
+    # The join drops households that are deleted but not yet purged.
+    return db.session.scalars(
+        select(HouseholdMember.household_id)
+        .join(Household, Household.id == HouseholdMember.household_id)
+        .where(HouseholdMember.user_id == user_id)
+    ).all()
+
+
+def member_household_ids(user_id: int) -> frozenset:
+    """Household ids the user belongs to, from the current app's cache when warm."""
+    cache = current_app.extensions.get("membership_cache")
+    if cache is None:
+        return frozenset(_load_household_ids(user_id))
+    return cache.get_or_load(user_id, _load_household_ids)
+
+
+# ---------------------------- Session integration ----------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_membership_changes(session, flush_context, instances) -> None:
+    users = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, HouseholdMember):
+            users.add(obj.user_id)
+    # Memberships of a deleted household go by FK cascade, so look them up now.
+    for obj in session.deleted:
+        if isinstance(obj, Household):
+            users.update(
+                session.scalars(
+                    select(HouseholdMember.user_id).where(HouseholdMember.household_id == obj.id)
+                ).all()
+            )
+    if users:
+        session.info.setdefault("membership_changes", set()).update(users)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_memberships(session) -> None:
+    users = session.info.pop("membership_changes", None)
+    if not users or not has_app_context():
+        return
+    cache = current_app.extensions.get("membership_cache")
+    if cache is not None:
+        cache.invalidate(users)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_membership_changes(session) -> None:
+    session.info.pop("membership_changes", None)
@@ -0,0 +1,191 @@
+"""Memory diagnostics: tracemalloc snapshots and diffs, plus RSS and GC gauges.
+
+Admins switch allocation tracing on and off at /api/v1/admin/memory/tracing.
+Tracing slows every allocation and keeps a traceback per live block, so it is
+off by default and meant for short investigations. While it is on, each
+snapshot is kept in memory (the newest MEMORY_SNAPSHOTS_KEEP), and two of them
+can be diffed to see which file/line grew between them, e.g. before and after
+a few thousand requests.
+
+Like the metrics, all of this is per worker process; under gunicorn each
+admin request lands on one worker, so compare snapshots taken from the same
+one (`pid` is in every response).
+
+The gauges are refreshed from after_request at most every
+MEMORY_GAUGE_INTERVAL seconds. Each worker exports its own series (labelled
+`pid` in multiprocess mode), so one worker that creeps shows up on its own.
+"""
+
+import gc
+import itertools
+import os
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Optional
+
+from flask import current_app
+from prometheus_client import Gauge
+
+MEMORY_GAUGE_INTERVAL = 5.0
+GROUP_BY = ("lineno", "filename")
+
+PROCESS_RSS = Gauge(
+    "petcare_process_rss_bytes",
+    "Resident set size of the worker process",
+    multiprocess_mode="liveall",  # one series per live worker
+)
+GC_COLLECTIONS = Gauge(
+    "petcare_gc_collections",
+    "Garbage collector runs since the worker started, by generation",
+    ["generation"],
+    multiprocess_mode="liveall",
+)
+GC_OBJECTS = Gauge(
+    "petcare_gc_pending_objects",
+    "Allocations counted towards the next collection of each generation",
+    ["generation"],
+    multiprocess_mode="liveall",
+)
+
+# tracemalloc's own bookkeeping and import machinery are noise in every report.
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def gc_stats() -> dict:
+    return {
+        "collections": [gen["collections"] for gen in gc.get_stats()],
+        "pending": list(gc.get_count()),
+    }
+
+
+_next_gauge_update = 0.0
+
+
+def update_gauges(force: bool = False) -> None:
+    """Refresh the RSS and GC gauges, at most every MEMORY_GAUGE_INTERVAL seconds."""
+    global _next_gauge_update
+    now = time.monotonic()
+    if not force and now < _next_gauge_update:
+        return
+    _next_gauge_update = now + MEMORY_GAUGE_INTERVAL
+    rss = rss_bytes()
+    if rss is not None:
+        PROCESS_RSS.set(rss)
+    stats = gc_stats()
+    for generation, (runs, pending) in enumerate(zip(stats["collections"], stats["pending"])):
+        GC_COLLECTIONS.labels(str(generation)).set(runs)
+        GC_OBJECTS.labels(str(generation)).set(pending)
+
+
+class SnapshotNotFound(KeyError):
+    """Raised for a snapshot id that was never taken or has been dropped."""
+
+
+class MemoryDiagnostics:
+    """Starts/stops tracemalloc and keeps the newest few snapshots for diffing."""
+
+    def __init__(self, keep: int = 5):
+        self._keep = keep
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()  # id -> (taken_at, Snapshot)
+        self._ids = itertools.count(1)
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing and drop the snapshots, which would otherwise pin their memory."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshots = [
+                {"id": sid, "taken_at": taken_at} for sid, (taken_at, _) in self._snapshots.items()
+            ]
+        return {
+            "pid": os.getpid(),
+            "tracing": self.tracing,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "rss_bytes": rss_bytes(),
+            "gc": gc_stats(),
+            "snapshots": snapshots,
+        }
+
+    def take(self) -> int:
+        """Snapshot the traced allocations and return its id.
+
+        Raises:
+            RuntimeError if tracing is off.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("allocation tracing is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE)
+        with self._lock:
+            sid = next(self._ids)
+            self._snapshots[sid] = (time.time(), snapshot)
+            while len(self._snapshots) > self._keep:
+                self._snapshots.popitem(last=False)
+        return sid
+
+    def _get(self, sid: int):
+        with self._lock:
+            try:
+                return self._snapshots[sid][1]
+            except KeyError:
+                raise SnapshotNotFound(sid) from None
+
+    def top(self, sid: int, group_by: str = "lineno", limit: int = 20) -> list:
+        """Largest allocation sites of a snapshot."""
+        stats = self._get(sid).statistics(group_by)[:limit]
+        return [
+            {"site": _site(stat.traceback, group_by), "size_bytes": stat.size, "count": stat.count}
+            for stat in stats
+        ]
+
+    def diff(self, old: int, new: int, group_by: str = "lineno", limit: int = 20) -> list:
+        """Sites whose allocated size changed most from snapshot `old` to `new`."""
+        stats = self._get(new).compare_to(self._get(old), group_by)[:limit]
+        return [
+            {
+                "site": _site(stat.traceback, group_by),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats
+        ]
+
+
+def _site(traceback, group_by: str) -> str:
+    frame = traceback[0]
+    return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
+
+
+def get_memory() -> MemoryDiagnostics:
+    return current_app.extensions["memory"]
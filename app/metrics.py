@@ -0,0 +1,72 @@
+"""Prometheus request metrics and the /metrics exposition.
+
+Other metrics live next to the code that updates them (app.compression,
+app.membership, app.join_codes, ...); all of them are exposed together here.
+
+With several worker processes each worker only counts its own requests, so a
+scrape would see whichever worker answered it. Setting PROMETHEUS_MULTIPROC_DIR
+before the app is imported makes prometheus_client write every sample to
+per-process files in that directory, and /metrics then aggregates the files of
+all workers, including exited ones, so counters never go backwards. Gauges say
+how to combine their per-process values via `multiprocess_mode`.
+gunicorn.conf.py empties the directory when the server starts and drops the
+live-gauge files of workers that exit.
+"""
+
+import os
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess
+
+REQUEST_COUNT = Counter(
+    "petcare_request_total",
+    "Total HTTP requests",
+    ["method", "endpoint"],
+)
+
+REQUEST_LATENCY = Histogram(
+    "petcare_request_duration_seconds",
+    "HTTP request latency in seconds",
+    ["endpoint"],
+)
+
+ERROR_COUNT = Counter(
+    "petcare_error_total",
+    "Total error responses (5xx)",
+    ["endpoint", "status"],
+)
+
+# Filled from app.querystats, which counts statements per request.
+DB_QUERIES = Histogram(
+    "petcare_db_queries_per_request",
+    "SQL statements executed per request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+
+DB_TIME = Histogram(
+    "petcare_db_time_seconds",
+    "Time per request spent executing SQL statements",
+    ["endpoint"],
+)
+
+# Requests in which app.querystats saw one statement shape past NPLUSONE_THRESHOLD.
+REPEATED_QUERIES = Counter(
+    "petcare_repeated_queries_total",
+    "Requests that repeated one SQL statement shape more than NPLUSONE_THRESHOLD times",
+    ["endpoint"],
+)
+
+
+def multiprocess_dir():
+    """The shared metrics directory, or None when running single-process."""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def metrics_registry():
+    """Registry to expose: this process's own, or an aggregate of every worker's files."""
+    if multiprocess_dir() is None:
+        return REGISTRY
+    # Built per scrape, as the collector reads the directory when collected.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
@@ -1,11 +1,36 @@
-"""Database models: Household, Users, Pet, Entry, HouseholdMember.
+"""Database models: Household, Users, Pet, Entry, HouseholdMember, and supporting tables.
 
 Relationships use cascading deletes so removing a parent cleans up dependents.
+Households and pets are deleted in two steps (see app.purge): `deleted_at` is
+set at once, which hides the row from every ORM query, and a background job
+removes it and its children later.
+Households and pets carry a `version` counter that is bumped whenever they or
+their children change; the API derives ETags from it. Synced models carry an
+indexed `updated_at`, and deletions leave a Tombstone so clients can sync deltas.
+Version bumps leave `updated_at` alone: it moves only when the row's own
+fields change, so an entry edit doesn't make sync re-send its pet.
 """
 
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from .compression import CompressedText, inflate_text
 from .db import db
 
 
+def _updated_at():
+    """`updated_at` column for delta sync; refreshed by every ORM/Core UPDATE."""
+    return db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=db.func.now(),
+    )
+
+
 class Household(db.Model):
     """A group that owns pets and has user memberships."""
 
@@ -13,6 +38,13 @@ class Household(db.Model):
     name = db.Column(db.String, nullable=False)
     # Users join via a short code; unique per household
     join_code = db.Column(db.String(6), unique=True, nullable=False)
+    # Bumped on rename and on any pet/membership change (see _bump_versions)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = _updated_at()
+    # Set when deletion is requested; the row is hidden until app.purge removes it
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_household_updated", "updated_at"),)
 
     # When a household is deleted, also delete its pets and membership links
     pets = db.relationship(
@@ -56,6 +88,13 @@ class Pet(db.Model):
         nullable=False,
     )
     name = db.Column(db.String, nullable=False)
+    # Bumped on rename and on any entry change (see _bump_versions)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = _updated_at()
+    # Set when deletion is requested; the row is hidden until app.purge removes it
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_pet_household_updated", "household_id", "updated_at"),)
 
     # When a pet is deleted, also delete its entries
     entries = db.relationship(
@@ -88,11 +127,33 @@ class Entry(db.Model):
         db.ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
     )
-    content = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    # Stored compressed above ENTRY_COMPRESS_MIN_BYTES on SQLite (see app.compression).
+    # `_content` holds the value as stored; `content` inflates it on access, so
+    # rows loaded only to be checked or deleted never decompress anything.
+    _content = db.Column("content", CompressedText, nullable=False)
+    # Python-side default keeps a uniform microsecond format on SQLite, which keyset
+    # pagination relies on; the server default covers raw SQL inserts.
+    created_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        server_default=db.func.now(),
+        nullable=False,
+    )
+    updated_at = _updated_at()
+
+    def _get_content(self) -> str:
+        return inflate_text(self._content)
+
+    def _set_content(self, value: str) -> None:
+        self._content = value
 
-    # Index to make filtering/sorting entries-by-pet fast
-    __table_args__ = (db.Index("ix_entries_pet_created", "pet_id", "created_at"),)
+    content = db.synonym("_content", descriptor=property(_get_content, _set_content))
+
+    # Index to make filtering/sorting entries-by-pet fast; the second serves delta sync
+    __table_args__ = (
+        db.Index("ix_entries_pet_created", "pet_id", "created_at"),
+        db.Index("ix_entries_pet_updated", "pet_id", "updated_at"),
+    )
 
     def to_dict(self) -> dict:
         """JSON-ready representation of an Entry."""
@@ -121,9 +182,271 @@ class HouseholdMember(db.Model):
     )
     # Displayed name within the household
     nickname = db.Column(db.String, nullable=False)
+    # When the user joined; sync sends the whole household to new members
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, server_default=db.func.now()
+    )
 
     # Same user can't join twice; nicknames must be unique within a household
     __table_args__ = (
         db.UniqueConstraint("user_id", "household_id"),
         db.UniqueConstraint("household_id", "nickname"),
-    )
\ No newline at end of file
+    )
+
+
+class PetActivityDaily(db.Model):
+    """Per-pet, per-author, per-day entry counts (maintained by app.rollups)."""
+
+    __tablename__ = "pet_activity_daily"
+
+    pet_id = db.Column(
+        db.Integer,
+        db.ForeignKey("pet.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ArchivedEntryRef(db.Model):
+    """Where an entry moved to the archive (app.archive) lives, found by its id."""
+
+    __tablename__ = "archived_entry_ref"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    pet_id = db.Column(
+        db.Integer,
+        db.ForeignKey("pet.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Picks the month segment to read
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index("ix_archived_entry_ref_pet", "pet_id"),)
+
+
+class Tombstone(db.Model):
+    """Record of a deleted household/pet/entry, consumed by delta sync.
+
+    Pet and entry tombstones are scoped by `household_id`. Household tombstones
+    are written per former member (`user_id`), since the membership rows that
+    would otherwise scope them are gone.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # "household" | "pet" | "entry"
+    object_id = db.Column(db.Integer, nullable=False)
+    household_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_tombstone_household_deleted", "household_id", "deleted_at"),
+        db.Index("ix_tombstone_user_deleted", "user_id", "deleted_at"),
+    )
+
+
+class StoredEvent(db.Model):
+    """A committed household event, relayed to SSE subscribers in every worker (app.events)."""
+
+    __tablename__ = "household_event"
+
+    id = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(
+        db.Integer,
+        db.ForeignKey("household.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    type = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_household_event_household", "household_id", "id"),
+        # Ids are the SSE event ids: never reuse one, even after pruning empties the table.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class PurgeJob(db.Model):
+    """Background removal of a soft-deleted household or pet (run by app.purge)."""
+
+    __tablename__ = "purge_job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # "household" | "pet"
+    object_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending | running | done | failed
+    # Entries to remove (counted when the job starts) and removed so far
+    total = db.Column(db.Integer, nullable=True)
+    purged = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self) -> dict:
+        """JSON-ready representation of a PurgeJob."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "object_id": self.object_id,
+            "status": self.status,
+            "total": self.total,
+            "purged": self.purged,
+            "error": self.error,
+        }
+
+
+# ------------------------------ Soft deletion ------------------------------
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted(state) -> None:
+    """Filter soft-deleted households and pets out of every ORM SELECT.
+
+    The criteria also apply to joins and relationship loads. Pass the
+    execution option `include_deleted=True` to see them (the purge does).
+    """
+    if (
+        state.is_select
+        and not state.is_column_load
+        and not state.execution_options.get("include_deleted", False)
+    ):
+        state.statement = state.statement.options(
+            with_loader_criteria(
+                Household, lambda cls: cls.deleted_at.is_(None), include_aliases=True
+            ),
+            with_loader_criteria(Pet, lambda cls: cls.deleted_at.is_(None), include_aliases=True),
+        )
+
+
+# ----------------------------- Version bumping -----------------------------
+
+
+def bump_versions(session, pet_ids=(), household_ids=()) -> None:
+    """Increment the version of the given pets and households in one UPDATE each.
+
+    `updated_at` is set to itself, which overrides its onupdate: a child's
+    change is not a change to the row's synced fields.
+
+    Use this after Core-level writes (e.g. bulk inserts) that bypass the ORM
+    flush hook below.
+    """
+    pet_ids = sorted(set(pet_ids))
+    household_ids = sorted(set(household_ids))
+    if pet_ids:
+        session.execute(
+            update(Pet)
+            .where(Pet.id.in_(pet_ids))
+            .values(version=Pet.version + 1, updated_at=Pet.updated_at)
+        )
+    if household_ids:
+        session.execute(
+            update(Household)
+            .where(Household.id.in_(household_ids))
+            .values(version=Household.version + 1, updated_at=Household.updated_at)
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_versions(session, flush_context, instances) -> None:
+    """Bump parent versions for every ORM change about to be flushed."""
+    pet_ids, household_ids = set(), set()
+
+    changed = list(session.new) + list(session.deleted)
+    changed += [
+        o for o in session.dirty if session.is_modified(o, include_collections=False)
+    ]
+    for obj in changed:
+        if isinstance(obj, Entry) and obj.pet_id is not None:
+            pet_ids.add(obj.pet_id)
+        elif isinstance(obj, Pet):
+            if obj.id is not None and obj not in session.deleted:
+                pet_ids.add(obj.id)
+            if obj.household_id is not None:
+                household_ids.add(obj.household_id)
+        elif isinstance(obj, HouseholdMember) and obj.household_id is not None:
+            household_ids.add(obj.household_id)
+        elif isinstance(obj, Household) and obj.id is not None and obj not in session.deleted:
+            household_ids.add(obj.id)
+
+    bump_versions(session, pet_ids, household_ids)
+
+
+# -------------------------------- Tombstones --------------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _record_tombstones(session, flush_context, instances) -> None:
+    """Leave a Tombstone for every household, pet, entry or membership being deleted."""
+    if session.deleted:
+        record_tombstones(session, list(session.deleted))
+
+
+def record_tombstones(session, deleted) -> None:
+    """Add Tombstones for the given objects, which are (being) deleted.
+
+    Called by the flush hook above, and directly for soft deletes, which
+    flush as updates.
+    """
+    gone_pets = {o.id for o in deleted if isinstance(o, Pet)}
+    gone_members = {(o.user_id, o.household_id) for o in deleted if isinstance(o, HouseholdMember)}
+    stones = []
+
+    # One lookup for the households of every deleted entry's pet.
+    entry_pet_ids = {
+        o.pet_id for o in deleted if isinstance(o, Entry) and o.pet_id not in gone_pets
+    }
+    pet_households = {}
+    if entry_pet_ids:
+        pet_households = dict(
+            session.execute(
+                select(Pet.id, Pet.household_id)
+                .where(Pet.id.in_(entry_pet_ids))
+                .execution_options(include_deleted=True)
+            ).all()
+        )
+
+    for obj in deleted:
+        if isinstance(obj, Entry) and obj.pet_id not in gone_pets:
+            stones.append(
+                Tombstone(
+                    kind="entry",
+                    object_id=obj.id,
+                    household_id=pet_households.get(obj.pet_id),
+                )
+            )
+        elif isinstance(obj, Pet):
+            stones.append(Tombstone(kind="pet", object_id=obj.id, household_id=obj.household_id))
+        elif isinstance(obj, HouseholdMember):
+            # Leaving a household makes it disappear for that user.
+            stones.append(
+                Tombstone(
+                    kind="household",
+                    object_id=obj.household_id,
+                    household_id=obj.household_id,
+                    user_id=obj.user_id,
+                )
+            )
+        elif isinstance(obj, Household):
+            # Membership rows go with the household via ON DELETE CASCADE.
+            user_ids = session.scalars(
+                select(HouseholdMember.user_id).where(HouseholdMember.household_id == obj.id)
+            )
+            for user_id in user_ids:
+                if (user_id, obj.id) not in gone_members:
+                    stones.append(
+                        Tombstone(
+                            kind="household",
+                            object_id=obj.id,
+                            household_id=obj.id,
+                            user_id=user_id,
+                        )
+                    )
+
+    session.add_all(stones)
@@ -0,0 +1,236 @@
+"""Password hashing in a small process pool, at a scrypt cost calibrated at deploy time.
+
+Hashes are computed by werkzeug (`scrypt:n:r:p$salt$hash`) in a pool of
+PASSWORD_HASH_WORKERS processes per app process: a burst of logins queues for
+those few cores instead of taking every CPU from other requests. The request
+thread still waits for its result; the pool only bounds how many hashes run
+at once. With no workers (tests) hashing runs in the calling thread.
+
+Each process gets its own pool, started on first use or, under gunicorn, right
+after the worker has loaded the app (see gunicorn.conf.py). Pool processes
+come from a forkserver, never from forking a worker that already runs the
+sampler or purge threads.
+
+New hashes use PASSWORD_HASH_METHOD as configured; nothing is measured while
+serving. `flask passwords calibrate` doubles its scrypt work factor `n` while
+one hash still takes under about PASSWORD_HASH_TARGET_MS on this machine, up to
+MAX_N, and never lowers it. The Docker image runs it before starting gunicorn
+and exports the result. Stored hashes weaker than the current method are
+replaced on the next successful login; they are only ever upgraded.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from prometheus_client import Histogram
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# 32 MiB (werkzeug's default cost) to 128 MiB of memory per hash (128 * n * r bytes with r = 8).
+MIN_N = 2**15
+MAX_N = 2**17
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "petcare_password_hash_seconds",
+    "Password hash/verify time, including waiting for a worker",
+    ["op"],  # hash | verify
+)
+
+
+def scrypt_method(n: int, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    return f"scrypt:{n}:{r}:{p}"
+
+
+def _scrypt_params(pwhash: str):
+    """(n, r, p) of a stored scrypt hash, or None for any other method."""
+    method, *args = pwhash.split("$", 1)[0].split(":")
+    if method != "scrypt":
+        return None
+    if not args:
+        return 2**15, 8, 1  # werkzeug's defaults for a bare "scrypt"
+    try:
+        n, r, p = map(int, args)
+    except ValueError:
+        return None
+    return n, r, p
+
+
+def _time_hash(n: int) -> float:
+    start = time.perf_counter()
+    generate_password_hash("calibration", method=scrypt_method(n))
+    return time.perf_counter() - start
+
+
+def calibrate(
+    target_ms: float, measure: Optional[Callable[[int], float]] = None, floor: int = MIN_N
+) -> str:
+    """Return the scrypt method whose hash time is closest to `target_ms` from below.
+
+    Starts at n = `floor` and never goes lower, even if that already takes longer
+    than the target. Doubling n doubles the time, so stop at the first n that
+    takes more than half the target; `measure(n)` returns seconds (default:
+    time a real hash).
+    """
+    measure = measure or _time_hash
+    n = floor
+    elapsed_ms = measure(n) * 1000
+    while n < MAX_N and elapsed_ms * 2 <= target_ms:
+        n *= 2
+        elapsed_ms = measure(n) * 1000
+    return scrypt_method(n)
+
+
+def pool_context():
+    """Start method for hashing pools: a forkserver where available, else spawn."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords, in a process pool when `workers` > 0."""
+
+    def __init__(self, method: str, workers: int = 0):
+        self.method = method
+        self._params = _scrypt_params(method + "$")
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None  # process that owns self._pool
+
+    @classmethod
+    def from_config(cls, cfg) -> "PasswordHasher":
+        return cls(cfg["PASSWORD_HASH_METHOD"], workers=cfg["PASSWORD_HASH_WORKERS"])
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._workers <= 0:
+            return None
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # A pool copied over fork belongs to the parent; start this process's own.
+                    self._pool = ProcessPoolExecutor(self._workers, mp_context=pool_context())
+                    self._pid = os.getpid()
+        return self._pool
+
+    def start(self) -> None:
+        """Start this process's pool now rather than on the first login."""
+        pool = self._get_pool()
+        if pool is not None:
+            pool.submit(os.getpid).result()
+
+    def close(self) -> None:
+        """Shut down this process's worker processes, if any."""
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown()
+            self._pool = self._pid = None
+
+    def _run(self, op: str, fn, *args):
+        with PASSWORD_HASH_SECONDS.labels(op).time():
+            pool = self._get_pool()
+            if pool is None:
+                return fn(*args)
+            return pool.submit(fn, *args).result()
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run("verify", check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True if `pwhash` is weaker than (or differently shaped from) the current method."""
+        params = self._params
+        if params is None:
+            return False  # not configured for scrypt; leave hashes alone
+        stored = _scrypt_params(pwhash)
+        if stored is None:
+            return True
+        n, r, p = stored
+        return n < params[0] or (r, p) != params[1:]
+
+    def verify_and_update(self, pwhash: str, password: str):
+        """Check a password; on success also return a fresh hash if the stored one is outdated.
+
+        Returns:
+            (ok, new_hash or None)
+        """
+        if not self.verify(pwhash, password):
+            return False, None
+        if self.needs_rehash(pwhash):
+            return True, self.hash(password)
+        return True, None
+
+
+def get_hasher() -> PasswordHasher:
+    return current_app.extensions["password_hasher"]
+
+
+passwords_cli = AppGroup("passwords", help="Password hashing cost and throughput.")
+
+
+def _rate(fn, seconds: float) -> float:
+    """Calls per second of fn() over roughly `seconds`."""
+    done, start = 0, time.perf_counter()
+    while True:
+        fn()
+        done += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return done / elapsed
+
+
+@passwords_cli.command("bench")
+@click.option("--seconds", type=float, default=5.0, show_default=True)
+@click.option("--workers", type=int, default=None, help="Pool size (default PASSWORD_HASH_WORKERS).")
+def bench_command(seconds, workers):
+    """Measure logins/sec (password verifications) per core and through the pool."""
+    method = get_hasher().method
+    pwhash = generate_password_hash("benchmark", method=method)
+    click.echo(f"method: {method}")
+
+    per_core = _rate(lambda: check_password_hash(pwhash, "benchmark"), seconds)
+    click.echo(f"inline: {per_core:.1f} logins/sec per core")
+
+    workers = current_app.config["PASSWORD_HASH_WORKERS"] if workers is None else workers
+    if workers > 0:
+        batch = workers * 4
+        with ProcessPoolExecutor(workers, mp_context=pool_context()) as pool:
+            list(pool.map(check_password_hash, [pwhash] * workers, ["benchmark"] * workers))
+            total = batch * _rate(
+                lambda: list(pool.map(check_password_hash, [pwhash] * batch, ["benchmark"] * batch)),
+                seconds,
+            )
+        click.echo(
+            f"pool of {workers}: {total:.1f} logins/sec, {total / workers:.1f} logins/sec per core"
+        )
+
+
+@passwords_cli.command("calibrate")
+@click.option("--target-ms", type=float, default=None, help="Default PASSWORD_HASH_TARGET_MS.")
+@click.option("--quiet", is_flag=True, help="Print only the method, for PASSWORD_HASH_METHOD.")
+def calibrate_command(target_ms: Optional[float], quiet: bool):
+    """Pick the scrypt cost for the time target on this machine (run at deploy time).
+
+    Only the configured method's n is raised; a method with other r/p, or a
+    target of 0, is printed unchanged.
+    """
+    configured = current_app.config["PASSWORD_HASH_METHOD"]
+    target = current_app.config["PASSWORD_HASH_TARGET_MS"] if target_ms is None else target_ms
+    params = _scrypt_params(configured + "$")
+    if target <= 0 or params is None or params[1:] != (SCRYPT_R, SCRYPT_P):
+        click.echo(configured)
+        return
+    method = calibrate(target, floor=max(params[0], MIN_N))
+    if quiet:
+        click.echo(method)
+        return
+    n = int(method.split(":")[1])
+    click.echo(f"{method} ({_time_hash(n) * 1000:.1f} ms per hash, target {target:g} ms)")
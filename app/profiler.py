@@ -0,0 +1,149 @@
+"""On-demand cProfile of single requests, saved as reports under PROFILE_DIR.
+
+An admin asks for a profile by sending `X-Profile: 1` (or `?_profile=1`) with
+any request. That request then runs under cProfile from before_request to
+after_request, and two files are written:
+
+    <id>.txt   summary, SQL statements by time, and the call tree
+    <id>.prof  raw pstats data, for snakeviz / `python -m pstats`
+
+The id comes back in the X-Profile-Id response header, and admins can read the
+report at GET /api/v1/admin/profiles/<id>. Only the newest PROFILE_KEEP reports
+are kept.
+
+Requests without the flag pay a single header lookup. Flags from anyone but an
+admin are ignored. Work that streamed responses do after the view has returned
+is not profiled.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from flask import current_app, g, request, session
+
+from .utils.auth import is_admin
+
+log = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ARG = "_profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+REPORT_ID = re.compile(r"^\d{8}T\d{6}-[\w.]+-[0-9a-f]{6}$")
+
+_CALL_TREE_LINES = 60
+
+
+def profile_dir() -> Optional[str]:
+    return current_app.config.get("PROFILE_DIR") or None
+
+
+def wants_profile() -> bool:
+    """True if this request asked to be profiled and is allowed to be."""
+    flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_ARG)
+    if flag not in ("1", "true", "yes"):
+        return False
+    return profile_dir() is not None and is_admin(session.get("user_id"))
+
+
+def start_profile() -> bool:
+    """Profile the rest of this request; False if another profiler is running."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # Python 3.12+ allows one active profiler per process
+        log.warning("profile of %s skipped: another profiler is active", request.path)
+        return False
+    g.profiler = profiler
+    return True
+
+
+def stop_profile() -> Optional[cProfile.Profile]:
+    """Disable this request's profiler, if any, and return it."""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+    return profiler
+
+
+def finish_profile(response, elapsed: float, stats=None):
+    """Stop profiling, save the report and name it in the response headers."""
+    profiler = stop_profile()
+    if profiler is None:
+        return response
+    endpoint = request.endpoint or "unknown"
+    report_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{endpoint}-{secrets.token_hex(3)}"
+    try:
+        save_report(profile_dir(), report_id, profiler, elapsed, response.status_code, stats)
+    except OSError:
+        log.exception("could not save profile %s", report_id)
+        return response
+    response.headers[PROFILE_ID_HEADER] = report_id
+    return response
+
+
+def _render(report_id: str, profiler, elapsed: float, status: int, stats) -> str:
+    out = io.StringIO()
+    out.write(f"profile {report_id}\n")
+    out.write(f"{request.method} {request.full_path.rstrip('?')} -> {status}\n")
+    out.write(f"endpoint: {request.endpoint}\n")
+    out.write(f"wall time: {elapsed * 1000:.1f} ms\n")
+    if stats is not None:
+        out.write(f"sql: {stats.count} statements, {stats.seconds * 1000:.1f} ms\n")
+        if stats.shapes:
+            out.write("\nSQL by time:\n")
+            ranked = sorted(stats.shape_seconds.items(), key=lambda kv: kv[1], reverse=True)
+            for key, seconds in ranked:
+                out.write(f"  {seconds * 1000:8.2f} ms  {stats.shapes[key]:4d} x  {key}\n")
+
+    out.write("\nCall tree (cumulative):\n")
+    ps = pstats.Stats(profiler, stream=out)
+    ps.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE)
+    ps.print_stats(_CALL_TREE_LINES)
+    ps.print_callees(_CALL_TREE_LINES)
+    return out.getvalue()
+
+
+def save_report(root: str, report_id: str, profiler, elapsed: float, status: int, stats) -> None:
+    os.makedirs(root, exist_ok=True)
+    text = _render(report_id, profiler, elapsed, status, stats)
+    with open(os.path.join(root, f"{report_id}.txt"), "w", encoding="utf-8") as fh:
+        fh.write(text)
+    profiler.dump_stats(os.path.join(root, f"{report_id}.prof"))
+    _prune(root, current_app.config["PROFILE_KEEP"])
+
+
+def _prune(root: str, keep: int) -> None:
+    """Delete all but the newest `keep` reports."""
+    for report_id in list_reports(root)[keep:]:
+        for ext in (".txt", ".prof"):
+            try:
+                os.remove(os.path.join(root, report_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_reports(root: Optional[str]) -> list:
+    """Report ids in `root`, newest first."""
+    if root is None or not os.path.isdir(root):
+        return []
+    ids = [name[:-4] for name in os.listdir(root) if name.endswith(".txt")]
+    return sorted((i for i in ids if REPORT_ID.match(i)), reverse=True)
+
+
+def read_report(root: Optional[str], report_id: str) -> Optional[str]:
+    """The text of a saved report, or None if the id is unknown or malformed."""
+    if root is None or not REPORT_ID.match(report_id):
+        return None
+    try:
+        with open(os.path.join(root, f"{report_id}.txt"), encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
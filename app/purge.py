@@ -0,0 +1,268 @@
+"""Two-step deletion of households and pets.
+
+`delete_later` marks the row `deleted_at` and commits straight away. From then
+on every ORM query filters it out (see models._hide_deleted), so the API
+answers 404 at once and sync clients already get their tombstones. A PurgeJob
+row records the rest of the work, which runs on a background thread: entries
+go in batches of PURGE_BATCH_SIZE, each in its own short transaction, then the
+pet or household row itself, whose remaining children (memberships, rollup
+rows) follow by ON DELETE CASCADE. The job's purged/total counts are committed
+after every batch, so `flask purge status` shows how far each job got.
+
+With PURGE_INLINE (tests) the job runs before the request returns. Jobs cut
+short by a restart are picked up again with `flask purge resume`.
+
+`flask purge tombstones` (run on a schedule) drops sync tombstones older than
+SYNC_TOMBSTONE_RETENTION_DAYS; the sync API refuses watermarks that old.
+`flask purge events` likewise drops stored SSE events (see app.events).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from prometheus_client import Counter
+from sqlalchemy import delete, func, select, update
+
+from .archive import get_archive
+from .db import db
+from .join_codes import get_join_codes
+from .models import (
+    Entry,
+    Household,
+    HouseholdMember,
+    Pet,
+    PurgeJob,
+    StoredEvent,
+    Tombstone,
+    record_tombstones,
+)
+
+log = logging.getLogger(__name__)
+
+PURGED_ENTRIES = Counter("petcare_purge_entries_total", "Entries removed by purge jobs")
+PURGE_JOBS = Counter(
+    "petcare_purge_jobs_total",
+    "Finished purge jobs by outcome",
+    ["status"],  # done | failed
+)
+
+# Purge queries must still see the rows they are removing.
+_INCLUDE_DELETED = {"include_deleted": True}
+
+
+class Purger:
+    """Runs purge jobs one at a time on a background thread, or inline."""
+
+    def __init__(self, app, inline: bool = False):
+        self._app = app
+        self._inline = inline
+        # Threads are only started by the first submit.
+        self._executor = None if inline else ThreadPoolExecutor(1, thread_name_prefix="purge")
+
+    def submit(self, job_id: int) -> None:
+        if self._inline:
+            run_job(job_id)
+        else:
+            self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: int) -> None:
+        with self._app.app_context():
+            run_job(job_id)
+
+
+def get_purger() -> Purger:
+    return current_app.extensions["purger"]
+
+
+def _invalidate_members(user_ids) -> None:
+    cache = current_app.extensions.get("membership_cache")
+    if cache is not None and user_ids:
+        cache.invalidate(user_ids)
+
+
+def delete_later(obj) -> PurgeJob:
+    """Soft-delete a household or pet, commit, and schedule its purge."""
+    session = db.session
+    now = datetime.utcnow()
+    member_ids = []
+    if isinstance(obj, Household):
+        kind = "household"
+        member_ids = session.scalars(
+            select(HouseholdMember.user_id).where(HouseholdMember.household_id == obj.id)
+        ).all()
+        # Its pets disappear with it, so lookups by pet id 404 as well.
+        session.execute(
+            update(Pet)
+            .where(Pet.household_id == obj.id, Pet.deleted_at.is_(None))
+            .values(deleted_at=now)
+        )
+    elif isinstance(obj, Pet):
+        kind = "pet"
+    else:
+        raise TypeError(f"cannot purge {type(obj).__name__}")
+
+    record_tombstones(session, [obj])
+    obj.deleted_at = now
+    job = PurgeJob(kind=kind, object_id=obj.id)
+    session.add(job)
+    session.commit()
+
+    # Cached memberships would otherwise still vouch for the household.
+    _invalidate_members(member_ids)
+    get_purger().submit(job.id)
+    return job
+
+
+def run_job(job_id: int):
+    """Run (or resume) a purge job to completion; failures are recorded on the job."""
+    session = db.session
+    job = session.get(PurgeJob, job_id)
+    if job is None or job.status == "done":
+        return job
+    try:
+        _purge(session, job, current_app.config["PURGE_BATCH_SIZE"])
+    except Exception as exc:
+        session.rollback()
+        log.exception("purge job %s failed", job_id)
+        job.status = "failed"
+        job.error = str(exc)[:500]
+        session.commit()
+        PURGE_JOBS.labels("failed").inc()
+    return job
+
+
+def _purge(session, job: PurgeJob, batch_size: int) -> None:
+    if job.kind == "household":
+        pet_ids = session.scalars(
+            select(Pet.id)
+            .where(Pet.household_id == job.object_id)
+            .execution_options(**_INCLUDE_DELETED)
+        ).all()
+    else:
+        pet_ids = [job.object_id]
+
+    if job.total is None:
+        job.total = session.scalar(
+            select(func.count()).select_from(Entry).where(Entry.pet_id.in_(pet_ids))
+        )
+    job.status, job.error = "running", None
+    session.commit()
+
+    for pet_id in pet_ids:
+        while True:
+            ids = session.scalars(
+                select(Entry.id).where(Entry.pet_id == pet_id).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            session.execute(delete(Entry).where(Entry.id.in_(ids)))
+            job.purged += len(ids)
+            session.commit()
+            PURGED_ENTRIES.inc(len(ids))
+            log.info("purge job %s: %s/%s entries", job.id, job.purged, job.total)
+
+    model = Household if job.kind == "household" else Pet
+    # Loading the row first keeps a copy this session holds (inline purges)
+    # readable once "fetch" detaches it as deleted.
+    obj = session.get(model, job.object_id, execution_options=_INCLUDE_DELETED)
+    member_ids, join_code = [], None
+    if obj is not None:
+        if job.kind == "household":
+            join_code = obj.join_code
+            member_ids = session.scalars(
+                select(HouseholdMember.user_id).where(HouseholdMember.household_id == obj.id)
+            ).all()
+        session.execute(
+            delete(model)
+            .where(model.id == job.object_id)
+            .execution_options(synchronize_session="fetch", **_INCLUDE_DELETED)
+        )
+    job.status = "done"
+    job.finished_at = datetime.utcnow()
+    session.commit()
+    PURGE_JOBS.labels("done").inc()
+    log.info("purge job %s: %s %s removed", job.id, job.kind, job.object_id)
+
+    # Core deletes skip the session hooks that normally tidy up after these.
+    _invalidate_members(member_ids)
+    if join_code is not None:
+        get_join_codes().forget(join_code)
+    store = get_archive()
+    if store is not None:
+        for pet_id in pet_ids:
+            store.remove_pet(pet_id)
+
+
+def prune_older(session, column, cutoff: datetime, batch_size: int) -> int:
+    """Delete rows whose timestamp `column` is before `cutoff`, `batch_size` per transaction.
+
+    Used for tombstones and stored events, whose ids grow with that timestamp,
+    so the oldest rows are found at the low end of the primary key without an
+    index on it.
+    """
+    model = column.class_
+    pruned = 0
+    while True:
+        ids = session.scalars(
+            select(model.id).where(column < cutoff).order_by(model.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return pruned
+        session.execute(delete(model).where(model.id.in_(ids)))
+        session.commit()
+        pruned += len(ids)
+
+
+purge_cli = AppGroup("purge", help="Inspect and resume background deletions.")
+
+
+@purge_cli.command("status")
+@click.option("--all", "show_all", is_flag=True, help="Include finished jobs.")
+def status_command(show_all):
+    """List purge jobs and how far each has got."""
+    stmt = select(PurgeJob).order_by(PurgeJob.id)
+    if not show_all:
+        stmt = stmt.where(PurgeJob.status != "done")
+    jobs = db.session.scalars(stmt).all()
+    if not jobs:
+        click.echo("No purge jobs.")
+    for job in jobs:
+        total = "?" if job.total is None else job.total
+        line = f"#{job.id} {job.kind} {job.object_id}: {job.status}, {job.purged}/{total} entries"
+        if job.error:
+            line += f" ({job.error})"
+        click.echo(line)
+
+
+@purge_cli.command("resume")
+def resume_command():
+    """Run every unfinished purge job to completion, in this process."""
+    job_ids = db.session.scalars(
+        select(PurgeJob.id).where(PurgeJob.status != "done").order_by(PurgeJob.id)
+    ).all()
+    for job_id in job_ids:
+        job = run_job(job_id)
+        click.echo(f"#{job.id} {job.kind} {job.object_id}: {job.status}")
+    click.echo(f"Resumed {len(job_ids)} purge jobs.")
+
+
+@purge_cli.command("tombstones")
+def tombstones_command():
+    """Drop sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+    cfg = current_app.config
+    cutoff = datetime.utcnow() - timedelta(days=cfg["SYNC_TOMBSTONE_RETENTION_DAYS"])
+    pruned = prune_older(db.session, Tombstone.deleted_at, cutoff, cfg["PURGE_BATCH_SIZE"])
+    click.echo(f"Pruned {pruned} tombstones older than {cutoff:%Y-%m-%d %H:%M}.")
+
+
+@purge_cli.command("events")
+def events_command():
+    """Drop stored SSE events older than SSE_EVENT_RETENTION_SECONDS."""
+    cfg = current_app.config
+    cutoff = datetime.utcnow() - timedelta(seconds=cfg["SSE_EVENT_RETENTION_SECONDS"])
+    pruned = prune_older(db.session, StoredEvent.created_at, cutoff, cfg["PURGE_BATCH_SIZE"])
+    click.echo(f"Pruned {pruned} events older than {cutoff:%Y-%m-%d %H:%M}.")
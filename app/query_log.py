@@ -0,0 +1,165 @@
+"""Opt-in statement statistics and slow-query log, keyed by query fingerprint.
+
+A fingerprint is the SQL text with literals, bound parameters and IN/VALUES
+lists collapsed, so every execution of the same query shape shares one row of
+statistics (calls, total/max time, slow calls), much like pg_stat_statements.
+Statements slower than SLOW_QUERY_MS are also logged with the endpoint that
+ran them and their parameters reduced to type names. The first slow run of a
+SELECT shape additionally captures its plan (SQLite `EXPLAIN QUERY PLAN`,
+PostgreSQL `EXPLAIN`) on a raw cursor of the same connection, inside a
+savepoint that is always rolled back, so a failing EXPLAIN cannot abort the
+request's transaction.
+
+Enabled by setting SLOW_QUERY_MS > 0; app.querystats feeds it every statement
+run in an app context. Admins read it at GET /api/v1/admin/queries.
+"""
+
+import logging
+import re
+import threading
+from functools import lru_cache
+
+from flask import has_request_context, request
+
+log = logging.getLogger(__name__)
+
+_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+_SAVEPOINT = "query_log_explain"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_IN_LIST = re.compile(r"\bIN \((?:\?, )*\?\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(\((?:\?, )*\?\))(?:, \((?:\?, )*\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize SQL so executions of the same query shape compare equal."""
+    text = _SPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    return _VALUES_LIST.sub(r"\1, ...", text)
+
+
+def redact(parameters, executemany: bool = False):
+    """Describe bound parameters by type only, so values never reach the logs."""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "max", "slow_calls", "explain", "last_endpoint")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow_calls = 0
+        self.explain = None
+        self.last_endpoint = None
+
+
+class QueryLog:
+    """Per-fingerprint statement statistics plus a log of slow statements."""
+
+    SORT_KEYS = {
+        "total": lambda s: s.total,
+        "calls": lambda s: s.calls,
+        "mean": lambda s: s.total / s.calls,
+    }
+
+    def __init__(self, threshold_ms: float, max_fingerprints: int = 500):
+        self.threshold = threshold_ms / 1000
+        self._max = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        key = fingerprint(statement)
+        endpoint = (request.endpoint or "-") if has_request_context() else "-"
+        slow = elapsed >= self.threshold
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                if len(self._stats) >= self._max:
+                    # Make room by dropping the least-called shape.
+                    del self._stats[min(self._stats, key=lambda k: self._stats[k].calls)]
+                stat = self._stats[key] = _Stat()
+            stat.calls += 1
+            stat.total += elapsed
+            stat.max = max(stat.max, elapsed)
+            stat.last_endpoint = endpoint
+            if slow:
+                stat.slow_calls += 1
+            need_plan = slow and stat.explain is None
+            if need_plan:
+                stat.explain = ""  # claimed; only one thread captures it
+
+        if not slow:
+            return
+        log.warning(
+            "slow query %.1f ms endpoint=%s: %s params=%s",
+            elapsed * 1000,
+            endpoint,
+            key,
+            redact(parameters, executemany),
+        )
+        if need_plan and not executemany:
+            plan = self._explain(conn, statement, parameters)
+            with self._lock:
+                stat.explain = plan
+
+    def _explain(self, conn, statement: str, parameters):
+        """Plan of a SELECT, read on a raw cursor so no engine events fire."""
+        prefix = _EXPLAIN.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            # On PostgreSQL an error aborts the whole transaction; the savepoint
+            # confines it. SAVEPOINT is sent raw too, as conn.begin_nested() would
+            # fire the very events that got us here.
+            cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            finally:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+        except Exception:  # a plan is a nicety; never fail the query over it
+            log.debug("could not EXPLAIN %s", statement, exc_info=True)
+            return None
+        finally:
+            cursor.close()
+        # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are (line,).
+        return "\n".join(str(row[-1]) for row in rows)
+
+    def top(self, sort: str = "total", limit: int = 20) -> list:
+        with self._lock:
+            items = sorted(
+                self._stats.items(), key=lambda kv: self.SORT_KEYS[sort](kv[1]), reverse=True
+            )[:limit]
+            return [
+                {
+                    "fingerprint": key,
+                    "calls": s.calls,
+                    "total_ms": round(s.total * 1000, 3),
+                    "mean_ms": round(s.total * 1000 / s.calls, 3),
+                    "max_ms": round(s.max * 1000, 3),
+                    "slow_calls": s.slow_calls,
+                    "explain": s.explain or None,
+                    "last_endpoint": s.last_endpoint,
+                }
+                for key, s in items
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
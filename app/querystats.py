@@ -0,0 +1,101 @@
+"""Per-request SQL accounting through SQLAlchemy engine events.
+
+Every statement executed while a request is being handled adds one to the
+request's QueryStats (kept on `flask.g`) together with its time on the
+database, measured around the DBAPI cursor call. The after_request hook in
+app.app turns the totals into per-endpoint histograms.
+
+The hooks only read a clock and bump two numbers, so they stay enabled in
+production. When the opt-in app.query_log is installed, each statement is
+also handed to it for fingerprint statistics. Statements run outside a
+request (CLI, background threads) are not counted, and neither is work done by
+streamed responses after the view returned.
+
+With NPLUSONE_THRESHOLD > 0 each request also counts its statements per
+fingerprint. A shape run more often than the threshold in one request is the
+mark of an N+1: a lazy relationship touched once per row of an earlier result.
+The after_request hook logs those as warnings; the test suite's query-budget
+fixture fails on them.
+"""
+
+import logging
+import time
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .query_log import fingerprint
+
+log = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statement count and database time of one request, optionally per fingerprint."""
+
+    __slots__ = ("count", "seconds", "shapes", "shape_seconds")
+
+    def __init__(self, track_shapes: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {} if track_shapes else None
+        self.shape_seconds = {} if track_shapes else None
+
+    def repeated(self, threshold: int) -> list:
+        """(fingerprint, count) of shapes run more than `threshold` times, most first."""
+        if not self.shapes:
+            return []
+        return sorted(
+            ((key, n) for key, n in self.shapes.items() if n > threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+
+def start_request(track_shapes: bool = False) -> QueryStats:
+    """Begin counting for the current request."""
+    stats = g.query_stats = QueryStats(track_shapes)
+    return stats
+
+
+def warn_repeated(endpoint: str, stats: QueryStats, threshold: int) -> list:
+    """Log each statement shape the request ran more than `threshold` times."""
+    repeated = stats.repeated(threshold)
+    for key, n in repeated:
+        log.warning("possible N+1 in %s: %d x %s", endpoint, n, key)
+    return repeated
+
+
+def current_stats():
+    """The current request's QueryStats, or None outside a counted request."""
+    return g.get("query_stats") if has_request_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.shapes is not None:
+            key = fingerprint(statement)
+            stats.shapes[key] = stats.shapes.get(key, 0) + 1
+            stats.shape_seconds[key] = stats.shape_seconds.get(key, 0.0) + elapsed
+    if has_app_context():
+        query_log = current_app.extensions.get("query_log")
+        if query_log is not None:
+            query_log.record(conn, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_failed_query(exception_context) -> None:
+    # after_cursor_execute never runs for a failed statement.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
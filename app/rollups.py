@@ -0,0 +1,199 @@
+"""Incrementally maintained per-pet daily activity rollup.
+
+Every entry insert/delete adjusts one (pet, day, author) counter in
+pet_activity_daily inside the same transaction, so stats never scan the entry
+table. Counters are upserted with ON CONFLICT where the database has it, and
+selected then updated or inserted otherwise. `flask rollups rebuild`
+recomputes the table from scratch for backfills.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, bindparam, delete, event, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .archive import get_archive
+from .db import db
+from .models import Entry, PetActivityDaily
+
+BUCKETS = ("day", "week", "month")
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing `day`."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def apply_deltas(session, deltas: Counter) -> None:
+    """Add `deltas[(pet_id, day, user_id)]` to the rollup with one upsert batch."""
+    rows = [
+        {"pet_id": pet_id, "day": day, "user_id": user_id, "count": n}
+        for (pet_id, day, user_id), n in deltas.items()
+        if n
+    ]
+    if not rows:
+        return
+
+    make_insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if make_insert is None:
+        _update_or_insert(session, rows)
+        return
+
+    stmt = make_insert(PetActivityDaily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["pet_id", "day", "user_id"],
+        set_={"count": PetActivityDaily.count + stmt.excluded.count},
+    )
+    session.execute(stmt, rows)
+
+
+def _update_or_insert(session, rows) -> None:
+    """Generic path: one UPDATE batch for counters that exist, one INSERT for the rest."""
+    table = PetActivityDaily.__table__
+    existing = set(
+        session.execute(
+            select(table.c.pet_id, table.c.day, table.c.user_id).where(
+                table.c.pet_id.in_({r["pet_id"] for r in rows})
+            )
+        ).all()
+    )
+    updates, inserts = [], []
+    for r in rows:
+        if (r["pet_id"], r["day"], r["user_id"]) in existing:
+            updates.append({f"b_{key}": value for key, value in r.items()})
+        else:
+            inserts.append(r)
+    if updates:
+        session.execute(
+            update(table)
+            .where(
+                and_(
+                    table.c.pet_id == bindparam("b_pet_id"),
+                    table.c.day == bindparam("b_day"),
+                    table.c.user_id == bindparam("b_user_id"),
+                )
+            )
+            .values(count=table.c.count + bindparam("b_count")),
+            updates,
+        )
+    if inserts:
+        session.execute(insert(table), inserts)
+
+
+def record_created(session, rows) -> None:
+    """Count Core-inserted entries (dicts with pet_id, user_id, created_at)."""
+    apply_deltas(
+        session,
+        Counter((r["pet_id"], r["created_at"].date(), r["user_id"]) for r in rows),
+    )
+
+
+# ---------------------------- Session integration ----------------------------
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deleted_entries(session, flush_context, instances) -> None:
+    # Read deleted rows before the flush removes them.
+    for obj in session.deleted:
+        if isinstance(obj, Entry) and obj.created_at is not None:
+            key = (obj.pet_id, obj.created_at.date(), obj.user_id)
+            session.info.setdefault("rollup_deltas", Counter())[key] -= 1
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context) -> None:
+    deltas = session.info.pop("rollup_deltas", Counter())
+    # created_at defaults are only populated once the INSERT has run.
+    for obj in session.new:
+        if isinstance(obj, Entry):
+            deltas[(obj.pet_id, obj.created_at.date(), obj.user_id)] += 1
+    apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rollup_deltas(session) -> None:
+    session.info.pop("rollup_deltas", None)
+
+
+# ------------------------------- Reads & rebuild ------------------------------
+
+
+def pet_stats(session, pet_id: int, bucket: str, since=None, until=None) -> list:
+    """Return [{start, total, by_user}] for a pet, oldest bucket first."""
+    stmt = select(PetActivityDaily.day, PetActivityDaily.user_id, PetActivityDaily.count).where(
+        PetActivityDaily.pet_id == pet_id, PetActivityDaily.count > 0
+    )
+    if since is not None:
+        stmt = stmt.where(PetActivityDaily.day >= since)
+    if until is not None:
+        stmt = stmt.where(PetActivityDaily.day <= until)
+
+    totals, by_user = Counter(), {}
+    for day, user_id, n in session.execute(stmt):
+        start = bucket_start(day, bucket)
+        totals[start] += n
+        by_user.setdefault(start, Counter())[user_id] += n
+
+    return [
+        {
+            "start": start.isoformat(),
+            "total": totals[start],
+            "by_user": {str(uid): n for uid, n in sorted(by_user[start].items())},
+        }
+        for start in sorted(totals)
+    ]
+
+
+def rebuild(session, pet_id=None, extra=None) -> int:
+    """Recompute the rollup from the entry table; returns the number of rollup rows.
+
+    `extra` is a Counter of additional (pet_id, day, user_id) counts to add,
+    e.g. for entries that only exist in the archive.
+    """
+    clear = delete(PetActivityDaily)
+    source = select(
+        Entry.pet_id,
+        func.date(Entry.created_at),
+        Entry.user_id,
+        func.count(),
+    ).group_by(Entry.pet_id, func.date(Entry.created_at), Entry.user_id)
+    if pet_id is not None:
+        clear = clear.where(PetActivityDaily.pet_id == pet_id)
+        source = source.where(Entry.pet_id == pet_id)
+
+    session.execute(clear)
+    session.execute(
+        insert(PetActivityDaily).from_select(["pet_id", "day", "user_id", "count"], source)
+    )
+    if extra:
+        apply_deltas(session, extra)
+    counted = select(func.count()).select_from(PetActivityDaily)
+    if pet_id is not None:
+        counted = counted.where(PetActivityDaily.pet_id == pet_id)
+    return session.scalar(counted)
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the pet activity rollup table.")
+
+
+@rollups_cli.command("rebuild")
+@click.option("--pet-id", type=int, default=None, help="Only rebuild this pet.")
+def rebuild_command(pet_id):
+    """Recompute pet_activity_daily from the entry table."""
+    store = get_archive()
+    archived = store.activity(pet_id) if store is not None else None
+    rows = rebuild(db.session, pet_id=pet_id, extra=archived)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} rollup rows.")
@@ -4,13 +4,29 @@ JSON API package.
 Exports all API blueprints so the app factory can register them in one place.
 """
 
+from .admin import admin_bp
 from .auth import auth_bp
 from .entries import entries_bp
+from .events import events_bp
+from .exports import exports_bp
 from .households import households_bp
 from .pets import pets_bp
+from .search import search_bp
+from .sync import sync_bp
 from .health import bp as health_bp
 
 # Central list used by app.app:create_app() to register the API routes.
-api_blueprints = [auth_bp, households_bp, pets_bp, entries_bp, health_bp]
+api_blueprints = [
+    auth_bp,
+    households_bp,
+    pets_bp,
+    entries_bp,
+    health_bp,
+    exports_bp,
+    search_bp,
+    sync_bp,
+    events_bp,
+    admin_bp,
+]
 
 __all__ = ["api_blueprints"]
\ No newline at end of file
@@ -0,0 +1,278 @@
+"""Admin API: operational views for users listed in ADMIN_USERNAMES.
+
+All endpoints require an admin session (see @admin_required_api).
+"""
+
+import os
+
+from flask import Blueprint, Response, current_app, request
+
+from app.memory import GROUP_BY, SnapshotNotFound, get_memory
+from app.profiler import list_reports, profile_dir, read_report
+from app.query_log import QueryLog
+from app.sampler import format_collapsed, get_sampler
+from app.utils.auth import admin_required_api
+from app.utils.pagination import parse_limit
+
+from .helpers import json_error as _json_error  # shared JSON error helper
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/v1/admin")
+
+
+@admin_bp.get("/queries")
+@admin_required_api
+def query_stats():
+    """Top SQL statement fingerprints of this process, like pg_stat_statements.
+
+    Query params:
+        sort: "total" | "calls" | "mean" (optional; default "total")
+        limit: int (optional; default 20, capped at 200)
+
+    Returns:
+        200 with {enabled, threshold_ms, queries: [{fingerprint, calls, total_ms,
+            mean_ms, max_ms, slow_calls, explain, last_endpoint}]}
+        400 if sort or limit is invalid
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    sort = request.args.get("sort") or "total"
+    try:
+        limit = parse_limit(request.args.get("limit"), 20, 200)
+    except ValueError:
+        return _json_error("limit must be a positive integer", 400)
+
+    if sort not in QueryLog.SORT_KEYS:
+        return _json_error("sort must be total, calls or mean", 400)
+
+    query_log = current_app.extensions.get("query_log")
+    if query_log is None:
+        return {"enabled": False, "threshold_ms": None, "queries": []}, 200
+    return {
+        "enabled": True,
+        "threshold_ms": query_log.threshold * 1000,
+        "queries": query_log.top(sort, limit),
+    }, 200
+
+
+@admin_bp.delete("/queries")
+@admin_required_api
+def reset_query_stats():
+    """Clear the collected statement statistics.
+
+    Returns:
+        204 on success (also when collection is disabled)
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    query_log = current_app.extensions.get("query_log")
+    if query_log is not None:
+        query_log.reset()
+    return "", 204
+
+
+@admin_bp.get("/profiles")
+@admin_required_api
+def profiles():
+    """Saved request profiles, newest first (see app.profiler).
+
+    Returns:
+        200 with {enabled, profiles: [report id, ...]}
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    root = profile_dir()
+    return {"enabled": root is not None, "profiles": list_reports(root)}, 200
+
+
+@admin_bp.get("/profiles/<report_id>")
+@admin_required_api
+def profile_report(report_id: str):
+    """One saved profile report as plain text.
+
+    Returns:
+        200 with the report (text/plain)
+        401 if not logged in
+        403 if the user is not an admin
+        404 if there is no such report
+    """
+    text = read_report(profile_dir(), report_id)
+    if text is None:
+        return _json_error("profile not found", 404)
+    return Response(text, mimetype="text/plain")
+
+
+@admin_bp.get("/stacks")
+@admin_required_api
+def stacks():
+    """Sampled request stacks in collapsed format, for flamegraph tools (see app.sampler).
+
+    Summed over every worker on this host when PROMETHEUS_MULTIPROC_DIR is set.
+
+    Returns:
+        200 with "frame;frame;... count" lines (text/plain)
+        401 if not logged in
+        403 if the user is not an admin
+        404 if the sampler is disabled
+    """
+    sampler = get_sampler()
+    if sampler is None:
+        return _json_error("sampling profiler is disabled", 404)
+    return Response(format_collapsed(sampler.collected()), mimetype="text/plain")
+
+
+@admin_bp.delete("/stacks")
+@admin_required_api
+def reset_stacks():
+    """Clear this worker's sampled stacks.
+
+    Returns:
+        204 on success (also when sampling is disabled)
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    sampler = get_sampler()
+    if sampler is not None:
+        sampler.reset()
+    return "", 204
+
+
+def _snapshot_args():
+    """(group_by, limit) from the query string; raises ValueError with a message."""
+    group_by = request.args.get("group_by") or "lineno"
+    if group_by not in GROUP_BY:
+        raise ValueError("group_by must be lineno or filename")
+    try:
+        limit = parse_limit(request.args.get("limit"), 20, 200)
+    except ValueError:
+        raise ValueError("limit must be a positive integer") from None
+    return group_by, limit
+
+
+@admin_bp.get("/memory")
+@admin_required_api
+def memory_status():
+    """Memory state of the worker that answers (see app.memory).
+
+    Returns:
+        200 with {pid, tracing, traced_bytes, traced_peak_bytes, rss_bytes,
+            gc: {collections, pending}, snapshots: [{id, taken_at}]}
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    return get_memory().status(), 200
+
+
+@admin_bp.post("/memory/tracing")
+@admin_required_api
+def start_tracing():
+    """Start allocation tracing in this worker.
+
+    Body (JSON, optional):
+        frames: int (traceback depth kept per allocation; default 1, max 50)
+
+    Returns:
+        200 with the memory status
+        400 if frames is invalid
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    data = request.get_json(silent=True) or {}
+    frames = data.get("frames", 1)
+    if not isinstance(frames, int) or isinstance(frames, bool) or not 1 <= frames <= 50:
+        return _json_error("frames must be an integer from 1 to 50", 400)
+    memory = get_memory()
+    memory.start(frames)
+    return memory.status(), 200
+
+
+@admin_bp.delete("/memory/tracing")
+@admin_required_api
+def stop_tracing():
+    """Stop allocation tracing in this worker and drop its snapshots.
+
+    Returns:
+        204 on success (also when tracing was off)
+        401 if not logged in
+        403 if the user is not an admin
+    """
+    get_memory().stop()
+    return "", 204
+
+
+@admin_bp.post("/memory/snapshots")
+@admin_required_api
+def take_snapshot():
+    """Snapshot traced allocations and return the top allocation sites.
+
+    Query params:
+        group_by: "lineno" | "filename" (optional; default "lineno")
+        limit: int (optional; default 20, capped at 200)
+
+    Returns:
+        201 with {id, pid, top: [{site, size_bytes, count}]}
+        400 if group_by or limit is invalid
+        401 if not logged in
+        403 if the user is not an admin
+        409 if tracing is not running
+    """
+    try:
+        group_by, limit = _snapshot_args()
+    except ValueError as exc:
+        return _json_error(str(exc), 400)
+    memory = get_memory()
+    try:
+        sid = memory.take()
+    except RuntimeError as exc:
+        return _json_error(str(exc), 409)
+    return {"id": sid, "pid": os.getpid(), "top": memory.top(sid, group_by, limit)}, 201
+
+
+@admin_bp.get("/memory/snapshots/<int:snapshot_id>")
+@admin_required_api
+def snapshot_top(snapshot_id: int):
+    """Top allocation sites of a kept snapshot.
+
+    Query params:
+        group_by, limit: as for POST /memory/snapshots
+
+    Returns:
+        200 with {id, pid, top: [{site, size_bytes, count}]}
+        400 if group_by or limit is invalid
+        401 if not logged in
+        403 if the user is not an admin
+        404 if the snapshot is unknown in this worker
+    """
+    try:
+        group_by, limit = _snapshot_args()
+        top = get_memory().top(snapshot_id, group_by, limit)
+    except ValueError as exc:
+        return _json_error(str(exc), 400)
+    except SnapshotNotFound:
+        return _json_error("snapshot not found", 404)
+    return {"id": snapshot_id, "pid": os.getpid(), "top": top}, 200
+
+
+@admin_bp.get("/memory/snapshots/<int:snapshot_id>/diff/<int:base_id>")
+@admin_required_api
+def snapshot_diff(snapshot_id: int, base_id: int):
+    """Allocation sites that grew (or shrank) most from snapshot base_id to snapshot_id.
+
+    Query params:
+        group_by, limit: as for POST /memory/snapshots
+
+    Returns:
+        200 with {id, base_id, pid, changes: [{site, size_bytes, size_diff_bytes,
+            count, count_diff}]}
+        400 if group_by or limit is invalid
+        401 if not logged in
+        403 if the user is not an admin
+        404 if either snapshot is unknown in this worker
+    """
+    try:
+        group_by, limit = _snapshot_args()
+        changes = get_memory().diff(base_id, snapshot_id, group_by, limit)
+    except ValueError as exc:
+        return _json_error(str(exc), 400)
+    except SnapshotNotFound:
+        return _json_error("snapshot not found", 404)
+    return {"id": snapshot_id, "base_id": base_id, "pid": os.getpid(), "changes": changes}, 200
@@ -5,7 +5,8 @@ shared error helper for consistency across endpoints.
 """
 
 from flask import Blueprint, request, session
-from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.passwords import get_hasher
 
 from ...models import Users, db
 from .helpers import json_error as _json_error  # shared JSON error helper
@@ -36,7 +37,7 @@ def signup():
     if Users.query.filter_by(username=username).first():
         return _json_error("username already taken", 409)
 
-    user = Users(username=username, password_hash=generate_password_hash(password))
+    user = Users(username=username, password_hash=get_hasher().hash(password))
     db.session.add(user)
     db.session.commit()
 
@@ -48,6 +49,8 @@ def signup():
 def login():
     """Authenticate a user and start a session.
 
+    A stored hash weaker than the current hashing cost is replaced on success.
+
     Request JSON:
         username: str (required)
         password: str (required)
@@ -65,8 +68,14 @@ def login():
         return _json_error("username and password required", 400)
 
     user = Users.query.filter_by(username=username).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user:
+        return _json_error("invalid credentials", 401)
+    ok, new_hash = get_hasher().verify_and_update(user.password_hash, password)
+    if not ok:
         return _json_error("invalid credentials", 401)
+    if new_hash:
+        user.password_hash = new_hash
+        db.session.commit()
 
     session["user_id"] = user.id
     return {"id": user.id, "username": user.username}, 200
@@ -1,15 +1,25 @@
-"""Entries API: create, list, read, update, and delete pet entries (notes/logs).
+"""Entries API: create, list, read, update, delete, and bulk-ingest pet entries.
 
 Session-based auth is required for all endpoints. Responses use a minimal,
 consistent JSON shape and standard status codes.
 """
 
-from flask import Blueprint, request, session
+from datetime import datetime, timezone
+from itertools import islice
 
+from flask import Blueprint, abort, current_app, request, session
+from sqlalchemy import and_, func, insert, or_, select
+
+from app.archive import ArchivedEntry, archived_entry, get_archive, merge_entries
+from app.events import record_events
+from app.rollups import record_created
 from app.utils.auth import login_required_api
+from app.utils.pagination import decode_cursor, encode_cursor, parse_limit
+from app.utils.time_ranges import RANGES, parse_instant, range_start
 
-from ...models import Entry, Pet, db
+from ...models import Entry, HouseholdMember, Pet, bump_versions, db
 from .helpers import json_error as _json_error  # shared JSON error helper
+from .helpers import make_etag, not_modified, pet_for_member, validator_headers
 
 entries_bp = Blueprint("entries", __name__, url_prefix="/api/v1")
 
@@ -43,19 +53,158 @@ def create_entry(pet_id: int):
     return e.to_dict(), 201, {"Location": f"/api/v1/entries/{e.id}"}
 
 
+def _entry_window(args):
+    """Resolve range/since/until query params into a half-open [since, until) window.
+
+    An explicit `since` narrows a named range further; it never widens it.
+
+    Raises:
+        ValueError with a client-facing message.
+    """
+    since = until = None
+    if args.get("range"):
+        try:
+            _, since = range_start(args["range"])
+        except ValueError:
+            raise ValueError(f"range must be one of: {', '.join(RANGES)}") from None
+
+    raw_since, raw_until = args.get("since"), args.get("until")
+    try:
+        if raw_since:
+            explicit = parse_instant(raw_since)
+            since = explicit if since is None else max(since, explicit)
+        if raw_until:
+            until = parse_instant(raw_until)
+    except ValueError:
+        raise ValueError("since/until must be ISO-8601 dates or datetimes") from None
+    return since, until
+
+
+def _window_tag(bound) -> str:
+    return bound.isoformat() if bound is not None else "-"
+
+
 @entries_bp.get("/pets/<int:pet_id>/entries")
 @login_required_api
 def list_entries(pet_id: int):
-    """List entries for a pet (newest first).
+    """List entries for a pet (newest first), one page at a time.
+
+    Pages are keyed on (created_at, id) so every page is a bounded range scan
+    of ix_entries_pet_created, no matter how deep the client has paged. Pages
+    that reach past the live table continue into the entry archive. A time
+    window narrows the same range scan, so "today" only touches today's rows.
+
+    Query params:
+        limit: int (optional; default ENTRIES_PAGE_SIZE, capped at ENTRIES_PAGE_MAX)
+        cursor: str (optional; value of X-Next-Cursor from the previous page)
+        range: "today" | "week" | "month" | "all" (optional; same windows as the UI)
+        since: ISO-8601 date/datetime (optional; inclusive, UTC if no offset)
+        until: ISO-8601 date/datetime (optional; exclusive)
+
+    Supports If-None-Match (ETag from the pet version, bumped on every entry
+    change, plus the resolved window) and, for unwindowed listings, also
+    If-Modified-Since against the newest created_at.
 
     Returns:
-        200 with a JSON array of entries
+        200 with a JSON array of entries; X-Next-Cursor header if more remain
+        304 if the client's validators are still current
+        400 if limit, cursor, range, since or until is invalid
         404 if the pet does not exist
     """
-    Pet.query.get_or_404(pet_id)
+    version = db.session.scalar(select(Pet.version).where(Pet.id == pet_id))
+    if version is None:
+        abort(404)
+
+    cfg = current_app.config
+    try:
+        limit = parse_limit(
+            request.args.get("limit"), cfg["ENTRIES_PAGE_SIZE"], cfg["ENTRIES_PAGE_MAX"]
+        )
+    except ValueError:
+        return _json_error("limit must be a positive integer", 400)
+
+    try:
+        since, until = _entry_window(request.args)
+    except ValueError as exc:
+        return _json_error(str(exc), 400)
+
+    q = Entry.query.filter(Entry.pet_id == pet_id)
+    if since is not None:
+        q = q.filter(Entry.created_at >= since)
+    if until is not None:
+        q = q.filter(Entry.created_at < until)
 
-    rows = Entry.query.filter_by(pet_id=pet_id).order_by(Entry.created_at.desc()).all()
-    return [e.to_dict() for e in rows], 200
+    cursor = request.args.get("cursor")
+    before = None
+    if cursor:
+        try:
+            before = after_ts, after_id = decode_cursor(cursor)
+        except ValueError:
+            return _json_error("invalid cursor", 400)
+        q = q.filter(
+            or_(
+                Entry.created_at < after_ts,
+                and_(Entry.created_at == after_ts, Entry.id < after_id),
+            )
+        )
+
+    archive = get_archive()
+    archived_newest = archive.newest(pet_id) if archive is not None else None
+
+    # Both validators come from index-only lookups; no entry rows are loaded.
+    windowed = since is not None or until is not None
+    if windowed:
+        # "today" moves at midnight without any entry changing, so the window is
+        # part of the tag, and If-Modified-Since can't be answered from the max.
+        etag = make_etag("pe", pet_id, version, _window_tag(since), _window_tag(until))
+        last_modified = None
+    else:
+        etag = make_etag("pe", pet_id, version)
+        last_modified = db.session.scalar(
+            select(func.max(Entry.created_at)).where(Entry.pet_id == pet_id)
+        )
+        if archived_newest is not None and (
+            last_modified is None or archived_newest > last_modified
+        ):
+            last_modified = archived_newest
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = q.order_by(Entry.created_at.desc(), Entry.id.desc()).limit(limit + 1).all()
+    # Archived rows are only read when they could land on this page.
+    if (
+        archived_newest is not None
+        and (since is None or archived_newest >= since)
+        and (len(rows) <= limit or rows[-1].created_at <= archived_newest)
+    ):
+        if until is not None and (before is None or (until, 0) < before):
+            before = (until, 0)  # ids are positive, so this excludes created_at == until
+        archived = archive.newest_first(pet_id, before, since=since)
+        rows = list(islice(merge_entries(rows, archived, reverse=True), limit + 1))
+    headers = validator_headers(etag, last_modified)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
+    return [e.to_dict() for e in rows], 200, headers
+
+
+def _entry_or_404(entry_id: int):
+    """Load an entry by id, falling back to the archive (a read-only ArchivedEntry).
+
+    Entries of a deleted (not yet purged) pet are missing too.
+    """
+    e = db.session.scalar(
+        select(Entry).join(Pet, Pet.id == Entry.pet_id).where(Entry.id == entry_id)
+    )
+    if e is None:
+        e = archived_entry(db.session, entry_id)
+    if e is None:
+        abort(404)
+    return e
 
 
 @entries_bp.get("/entries/<int:entry_id>")
@@ -64,10 +213,10 @@ def get_entry(entry_id: int):
     """Fetch a single entry by id.
 
     Returns:
-        200 with entry JSON
+        200 with entry JSON (archived entries too)
         404 if the entry does not exist
     """
-    e = Entry.query.get_or_404(entry_id)
+    e = _entry_or_404(entry_id)
     return e.to_dict(), 200
 
 
@@ -81,12 +230,15 @@ def patch_entry(entry_id: int):
         400 if content is missing/blank
         403 if current user is not the author
         404 if the entry does not exist
+        409 if the entry is archived (read-only)
     """
-    e = Entry.query.get_or_404(entry_id)
+    e = _entry_or_404(entry_id)
 
     # Author-only edit: keep this rule in one place for predictability.
     if e.user_id != session.get("user_id"):
         return _json_error("forbidden", 403)
+    if isinstance(e, ArchivedEntry):
+        return _json_error("archived entries are read-only", 409)
 
     data = request.get_json(silent=True) or {}
     content = (data.get("content") or "").strip()
@@ -107,13 +259,180 @@ def delete_entry(entry_id: int):
         204 on success (empty body)
         403 if current user is not the author
         404 if the entry does not exist
+        409 if the entry is archived (read-only)
     """
-    e = Entry.query.get_or_404(entry_id)
+    e = _entry_or_404(entry_id)
 
     # Author-only delete mirrors the patch rule for consistency.
     if e.user_id != session.get("user_id"):
         return _json_error("forbidden", 403)
+    if isinstance(e, ArchivedEntry):
+        return _json_error("archived entries are read-only", 409)
 
     db.session.delete(e)
     db.session.commit()
-    return "", 204
\ No newline at end of file
+    return "", 204
+
+
+# ----------------------------- Batch ingestion -----------------------------
+
+
+def _parse_created_at(raw):
+    """Parse an optional ISO-8601 timestamp into naive UTC (the column's convention)."""
+    if raw is None:
+        return None
+    dt = datetime.fromisoformat(str(raw))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _ingest_batch(items, pet_id=None):
+    """Validate and insert a batch of entries in one transaction.
+
+    Every item is validated up front, referenced pets and the user's membership
+    of their households are checked with a single IN query, and all valid rows
+    go out as one executemany INSERT. Invalid items (including pets of other
+    households) are reported per index and do not block the rest of the batch.
+    """
+    if not isinstance(items, list) or not items:
+        return _json_error("entries must be a non-empty list", 400)
+
+    max_items = current_app.config["ENTRY_BATCH_MAX"]
+    if len(items) > max_items:
+        return _json_error(f"at most {max_items} entries per batch", 400)
+
+    user_id = session["user_id"]  # guaranteed by @login_required_api
+    now = datetime.utcnow()
+    results = [None] * len(items)
+    pending = []  # (index, row) pairs that passed validation
+
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"index": i, "status": 400, "error": "entry must be an object"}
+            continue
+
+        content = item.get("content")
+        content = content.strip() if isinstance(content, str) else ""
+        if not content:
+            results[i] = {"index": i, "status": 400, "error": "content is required"}
+            continue
+
+        target = pet_id if pet_id is not None else item.get("pet_id")
+        if not isinstance(target, int) or isinstance(target, bool):
+            results[i] = {"index": i, "status": 400, "error": "pet_id is required"}
+            continue
+
+        try:
+            created_at = _parse_created_at(item.get("created_at"))
+        except ValueError:
+            results[i] = {"index": i, "status": 400, "error": "invalid created_at"}
+            continue
+
+        # Every row carries created_at so the batch is one homogeneous executemany.
+        # Bulk inserts take mapped attribute names; Entry.content is a synonym of _content.
+        row = {
+            "pet_id": target,
+            "user_id": user_id,
+            "_content": content,
+            "created_at": created_at or now,
+        }
+        pending.append((i, row))
+
+    # One round trip to resolve every referenced pet, its household and membership.
+    wanted = {row["pet_id"] for _, row in pending}
+    households, member_of = {}, set()
+    if wanted:
+        pets = db.session.execute(
+            select(Pet.id, Pet.household_id, HouseholdMember.id)
+            .outerjoin(
+                HouseholdMember,
+                and_(
+                    HouseholdMember.household_id == Pet.household_id,
+                    HouseholdMember.user_id == user_id,
+                ),
+            )
+            .where(Pet.id.in_(wanted))
+        ).all()
+        households = {pid: hid for pid, hid, _ in pets}
+        member_of = {pid for pid, _, membership in pets if membership is not None}
+
+    valid = []
+    for i, row in pending:
+        if row["pet_id"] not in households:
+            results[i] = {"index": i, "status": 404, "error": "pet not found"}
+        elif row["pet_id"] not in member_of:
+            results[i] = {"index": i, "status": 403, "error": "forbidden"}
+        else:
+            valid.append((i, row))
+
+    if valid:
+        stmt = insert(Entry).returning(
+            Entry.id, Entry.created_at, sort_by_parameter_order=True
+        )
+        inserted = db.session.execute(stmt, [row for _, row in valid]).all()
+        # Core inserts bypass the ORM flush hooks, so bump versions, count the
+        # rollup and record events here; all take effect with the commit below.
+        bump_versions(db.session, pet_ids={row["pet_id"] for _, row in valid})
+        record_created(db.session, [row for _, row in valid])
+
+        events = []
+        for (i, row), (new_id, created_at) in zip(valid, inserted):
+            entry = {
+                "id": new_id,
+                "pet_id": row["pet_id"],
+                "user_id": row["user_id"],
+                "content": row["_content"],
+                "created_at": created_at.isoformat() if created_at else None,
+            }
+            results[i] = {"index": i, "status": 201, "entry": entry}
+            events.append((households[row["pet_id"]], "entry.created", entry))
+        record_events(db.session, events)
+        db.session.commit()
+
+    created = len(valid)
+    body = {"created": created, "failed": len(items) - created, "results": results}
+    return body, (201 if created == len(items) else 207)
+
+
+@entries_bp.post("/pets/<int:pet_id>/entries:batch")
+@login_required_api
+def create_entries_batch(pet_id: int):
+    """Create many entries for one pet in a single transaction.
+
+    Request JSON:
+        entries: list of {content: str, created_at: ISO-8601 str (optional)}
+
+    Returns:
+        201 with per-item results if every entry was created
+        207 with per-item results if some entries were rejected
+        400 if the payload is not a non-empty list or exceeds ENTRY_BATCH_MAX
+        403 if the current user is not a member of the pet's household
+        404 if the pet does not exist
+    """
+    pet, is_member = pet_for_member(pet_id, session["user_id"])
+    if pet is None:
+        abort(404)
+    if not is_member:
+        return _json_error("forbidden", 403)
+
+    data = request.get_json(silent=True) or {}
+    return _ingest_batch(data.get("entries"), pet_id=pet_id)
+
+
+@entries_bp.post("/entries:batch")
+@login_required_api
+def create_entries_batch_multi():
+    """Create entries across several pets in a single transaction.
+
+    Request JSON:
+        entries: list of {pet_id: int, content: str, created_at: str (optional)}
+
+    Returns:
+        201 with per-item results if every entry was created
+        207 with per-item results if some entries were rejected (e.g. unknown pet,
+            or a pet in a household the user is not a member of)
+        400 if the payload is not a non-empty list or exceeds ENTRY_BATCH_MAX
+    """
+    data = request.get_json(silent=True) or {}
+    return _ingest_batch(data.get("entries"))
@@ -0,0 +1,117 @@
+"""Events API: Server-Sent Events stream of entry changes in a household.
+
+Members keep one long-lived connection instead of polling list_entries. The
+stream replays missed events from the stored event log when the client
+reconnects with Last-Event-ID, then follows this worker's broker (see
+app.events), and sends a comment line as heartbeat.
+"""
+
+import json
+import time
+
+from flask import Blueprint, Response, abort, current_app, request, session
+
+from app.events import get_broker, get_relay, replay
+from app.utils.auth import login_required_api
+
+from ...models import db
+from .helpers import household_access
+from .helpers import json_error as _json_error  # shared JSON error helper
+
+events_bp = Blueprint("events", __name__, url_prefix="/api/v1")
+
+
+def _format_sse(ev) -> str:
+    return f"id: {ev.id}\nevent: {ev.type}\ndata: {json.dumps(ev.data)}\n\n"
+
+
+def _event_stream(
+    broker, household_id: int, after_id: int, replayed, heartbeat: float, max_seconds: float
+):
+    """Yield SSE frames until `max_seconds` elapse; clients reconnect and resume.
+
+    `replayed` holds the stored events up to `after_id`, or None if they could
+    not all be replayed (the client is told to reset).
+    """
+    yield f"retry: {int(heartbeat * 1000)}\n\n"
+    if replayed is None:
+        yield f"id: {after_id}\nevent: reset\ndata: {{}}\n\n"
+    else:
+        for ev in replayed:
+            yield _format_sse(ev)
+    deadline = time.monotonic() + max_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = broker.wait(household_id, after_id, min(heartbeat, remaining))
+        if events is None:
+            # A slow reader fell behind the channel's backlog: tell it to refetch.
+            after_id = broker.last_id
+            yield f"id: {after_id}\nevent: reset\ndata: {{}}\n\n"
+        elif not events:
+            yield ": heartbeat\n\n"
+        else:
+            for ev in events:
+                yield _format_sse(ev)
+            after_id = events[-1].id
+
+
+@events_bp.get("/households/<int:household_id>/events")
+@login_required_api
+def household_events(household_id: int):
+    """Stream entry.created / entry.updated / entry.deleted events (member-only).
+
+    Headers:
+        Last-Event-ID: int (optional; resume after this event id)
+
+    Returns:
+        200 with a text/event-stream body
+        403 if the user is not a member
+        404 if the household does not exist
+    """
+    # Answered from the membership cache when warm; one query otherwise.
+    exists, is_member = household_access(household_id, session["user_id"])
+    if not exists:
+        abort(404)
+    if not is_member:
+        return _json_error("forbidden", 403)
+
+    raw_last = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(raw_last) if raw_last else None
+    except ValueError:
+        return _json_error("invalid Last-Event-ID", 400)
+
+    cfg = current_app.config
+    broker = get_broker()
+    get_relay().attach()
+    # Events after `upto` reach the channel; the ones before come from the log.
+    upto = broker.subscribe(household_id)
+    try:
+        replayed = []
+        if last_event_id is not None:
+            replayed = replay(db.session, household_id, last_event_id, upto, cfg["SSE_BACKLOG"])
+    except Exception:
+        broker.unsubscribe(household_id)
+        raise
+    # An id ahead of `upto` came from a worker whose relay was ahead of this one.
+    after_id = max(upto, last_event_id or 0) if replayed is not None else upto
+
+    # The generator holds no app context, so the DB session is released as soon
+    # as the response starts; waiting subscribers never pin a connection.
+    stream = _event_stream(
+        broker,
+        household_id,
+        after_id,
+        replayed,
+        cfg["SSE_HEARTBEAT_SECONDS"],
+        cfg["SSE_MAX_SECONDS"],
+    )
+    response = Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(lambda: broker.unsubscribe(household_id))
+    return response
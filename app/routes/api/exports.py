@@ -0,0 +1,165 @@
+"""Exports API: stream a pet's or household's full entry history as NDJSON or CSV.
+
+Rows are read through a server-side cursor (yield_per) and written out one
+batch at a time, so memory stays flat regardless of history size and the
+first bytes are sent before the query has been fully consumed. Archived
+entries are merged in from their segment files in the same order.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    request,
+    session,
+    stream_with_context,
+)
+from sqlalchemy import select
+
+from app.archive import get_archive, merge_entries
+from app.compression import inflate_text
+from app.utils.auth import login_required_api
+
+from ...models import Entry, Pet, db
+from .helpers import household_access, pet_for_member
+from .helpers import json_error as _json_error  # shared JSON error helper
+
+exports_bp = Blueprint("exports", __name__, url_prefix="/api/v1")
+
+EXPORT_COLUMNS = ("id", "pet_id", "user_id", "content", "created_at")
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _export_format():
+    """Return the requested export format, or None if unsupported."""
+    fmt = (request.args.get("format") or "ndjson").lower()
+    return fmt if fmt in EXPORT_MIMETYPES else None
+
+
+def _row_values(row):
+    """Map a result row to plain values in EXPORT_COLUMNS order."""
+    created_at = row.created_at.isoformat() if row.created_at else None
+    return (row.id, row.pet_id, row.user_id, inflate_text(row.content), created_at)
+
+
+def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _ndjson_chunks(batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(r)))) + "\n" for r in batch
+        )
+
+
+def _csv_chunks(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue()
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(_row_values(r) for r in batch)
+        yield buf.getvalue()
+
+
+def _stream_export(stmt, fmt: str, filename: str, pet_ids=()):
+    """Build a streaming Response for an entries SELECT plus the pets' archived entries."""
+    batch_size = current_app.config["EXPORT_YIELD_PER"]
+    stmt = stmt.order_by(Entry.created_at, Entry.id).execution_options(yield_per=batch_size)
+    archive = get_archive()
+    archived = [archive.oldest_first(pid) for pid in pet_ids] if archive is not None else []
+
+    def generate():
+        result = db.session.execute(stmt)
+        try:
+            batches = result.partitions()
+            if archived:
+                live = (row for batch in batches for row in batch)
+                batches = _batches(merge_entries(live, *archived), batch_size)
+            chunks = _csv_chunks(batches) if fmt == "csv" else _ndjson_chunks(batches)
+            yield from chunks
+        finally:
+            result.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def _entry_columns():
+    return select(Entry.id, Entry.pet_id, Entry.user_id, Entry.content, Entry.created_at)
+
+
+@exports_bp.get("/pets/<int:pet_id>/entries/export")
+@login_required_api
+def export_pet_entries(pet_id: int):
+    """Stream every entry of a pet (member-only), oldest first.
+
+    Query params:
+        format: "ndjson" (default) or "csv"
+
+    Returns:
+        200 with a streamed NDJSON/CSV body
+        400 if the format is unsupported
+        403 if the user is not a member of the pet's household
+        404 if the pet does not exist
+    """
+    pet, is_member = pet_for_member(pet_id, session["user_id"])
+    if pet is None:
+        abort(404)
+    if not is_member:
+        return _json_error("forbidden", 403)
+
+    fmt = _export_format()
+    if fmt is None:
+        return _json_error("format must be ndjson or csv", 400)
+
+    stmt = _entry_columns().where(Entry.pet_id == pet_id)
+    return _stream_export(stmt, fmt, f"pet-{pet_id}-entries", pet_ids=[pet_id])
+
+
+@exports_bp.get("/households/<int:household_id>/entries/export")
+@login_required_api
+def export_household_entries(household_id: int):
+    """Stream every entry of every pet in a household (member-only), oldest first.
+
+    Query params:
+        format: "ndjson" (default) or "csv"
+
+    Returns:
+        200 with a streamed NDJSON/CSV body
+        400 if the format is unsupported
+        403 if the user is not a member
+        404 if the household does not exist
+    """
+    # Answered from the membership cache when warm; one query otherwise.
+    exists, is_member = household_access(household_id, session["user_id"])
+    if not exists:
+        abort(404)
+    if not is_member:
+        return _json_error("forbidden", 403)
+
+    fmt = _export_format()
+    if fmt is None:
+        return _json_error("format must be ndjson or csv", 400)
+
+    stmt = (
+        _entry_columns()
+        .join(Pet, Pet.id == Entry.pet_id)
+        .where(Pet.household_id == household_id)
+    )
+    pet_ids = db.session.scalars(select(Pet.id).where(Pet.household_id == household_id)).all()
+    return _stream_export(stmt, fmt, f"household-{household_id}-entries", pet_ids=pet_ids)
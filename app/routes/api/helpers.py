@@ -1,5 +1,139 @@
-from flask import jsonify
+from datetime import timezone
+
+from flask import Response, jsonify, request
+from sqlalchemy import and_, select
+from werkzeug.http import http_date
+
+from ...membership import member_household_ids
+from ...models import Household, HouseholdMember, Pet, db
+
 
 def json_error(msg: str, status: int):
     """Return a minimal, consistent JSON error body."""
-    return jsonify(error=msg), status
\ No newline at end of file
+    return jsonify(error=msg), status
+
+
+# --------------------------- Conditional requests ---------------------------
+
+
+def make_etag(*parts) -> str:
+    """Build a strong entity tag (unquoted) from cheap version parts."""
+    return ".".join(str(p) for p in parts)
+
+
+def validator_headers(etag: str, last_modified=None) -> dict:
+    """Headers advertising the validators of a response.
+
+    Responses are per-user, so they may only be cached privately and must be
+    revalidated on every use.
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.replace(tzinfo=timezone.utc))
+    return headers
+
+
+def not_modified(etag: str, last_modified=None):
+    """Return a 304 response if the request's validators still match, else None.
+
+    If-None-Match wins when present; If-Modified-Since is only a fallback.
+    """
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=validator_headers(etag, last_modified))
+        return None
+
+    since = request.if_modified_since
+    if last_modified is not None and since is not None:
+        current = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        if current <= since:
+            return Response(status=304, headers=validator_headers(etag, last_modified))
+    return None
+
+
+def household_version(household_id: int, user_id: int):
+    """Fetch a household's version and the user's membership in one query.
+
+    Returns:
+        (None, False) if the household doesn't exist.
+        (version, is_member) otherwise.
+    """
+    row = db.session.execute(
+        select(Household.version, HouseholdMember.id)
+        .outerjoin(
+            HouseholdMember,
+            and_(
+                HouseholdMember.household_id == Household.id,
+                HouseholdMember.user_id == user_id,
+            ),
+        )
+        .where(Household.id == household_id)
+    ).first()
+    if row is None:
+        return None, False
+    return row[0], row[1] is not None
+
+
+# ------------------------ Authorization-aware loaders ------------------------
+# Each loader fetches a resource together with the caller's membership in one
+# statement (an outer join on HouseholdMember), so callers can still tell
+# 404 (no row) from 403 (row, but no membership) without a second round trip.
+
+
+def household_access(household_id: int, user_id: int):
+    """Return (exists, is_member) for a household, with no query on a cache hit.
+
+    A cached membership implies the household exists (FK), so only the
+    "not a member" answer goes to the database to tell 404 from 403.
+    """
+    if household_id in member_household_ids(user_id):
+        return True, True
+    version, is_member = household_version(household_id, user_id)
+    return version is not None, is_member
+
+
+def household_for_member(household_id: int, user_id: int):
+    """Load a household and the user's membership row in one query.
+
+    Returns:
+        (None, None) if the household doesn't exist.
+        (Household, None) if the user is not a member.
+        (Household, HouseholdMember) otherwise.
+    """
+    row = db.session.execute(
+        select(Household, HouseholdMember)
+        .outerjoin(
+            HouseholdMember,
+            and_(
+                HouseholdMember.household_id == Household.id,
+                HouseholdMember.user_id == user_id,
+            ),
+        )
+        .where(Household.id == household_id)
+    ).first()
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
+def pet_for_member(pet_id: int, user_id: int):
+    """Load a pet and whether the user belongs to its household, in one query.
+
+    Returns:
+        (None, False) if the pet doesn't exist.
+        (Pet, is_member) otherwise.
+    """
+    row = db.session.execute(
+        select(Pet, HouseholdMember.id)
+        .outerjoin(
+            HouseholdMember,
+            and_(
+                HouseholdMember.household_id == Pet.household_id,
+                HouseholdMember.user_id == user_id,
+            ),
+        )
+        .where(Pet.id == pet_id)
+    ).first()
+    if row is None:
+        return None, False
+    return row[0], row[1] is not None
@@ -1,41 +1,43 @@
 # app/routes/api/households.py
-"""Households API: create, show, update, delete, and join.
+"""Households API: create, show, update, delete, join, and snapshot.
 
 All endpoints require a session (see @login_required_api). Responses use a minimal,
 consistent JSON shape and standard HTTP status codes.
 """
 
-from flask import Blueprint, request, session
+from itertools import islice
+
+from flask import Blueprint, current_app, request, session
+from sqlalchemy import and_, func, select
 from sqlalchemy.exc import IntegrityError
 
+from app.archive import get_archive, merge_entries
+from app.join_codes import JoinCodeExhausted, get_join_codes
+from app.purge import delete_later
 from app.utils.auth import login_required_api
-from app.utils.join_code import gen_join_code
-
-from ...models import Household, HouseholdMember, Users, db
+from app.utils.pagination import parse_limit
+
+from ...models import Entry, Household, HouseholdMember, Pet, Users, db
+from .helpers import (
+    household_for_member,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
 from .helpers import json_error as _json_error  # shared JSON error helper
 
 households_bp = Blueprint("households", __name__, url_prefix="/api/v1/households")
 
 
 def _require_membership(household_id: int):
-    """Return (household, membership) if the current user is a member.
+    """Return (household, membership) for the current user, from one query.
 
     Returns:
         (None, None) if the household doesn't exist.
         (household, None) if the household exists but the user is not a member.
         (household, HouseholdMember) on success.
     """
-    h = Household.query.get(household_id)
-    if not h:
-        return None, None
-
-    m = HouseholdMember.query.filter_by(
-        user_id=session.get("user_id"), household_id=household_id
-    ).first()
-
-    if not m:
-        return h, None
-    return h, m
+    return household_for_member(household_id, session.get("user_id"))
 
 
 @households_bp.post("")
@@ -50,6 +52,7 @@ def create_household():
     Returns:
         201 with {id, name, join_code} and Location header
         400 if name is missing/blank
+        503 if no free join code was found
     """
     data = request.get_json(silent=True) or {}
     name = (data.get("name") or "").strip()
@@ -58,13 +61,12 @@ def create_household():
     if not name:
         return _json_error("name is required", 400)
 
-    # Generate a unique join_code server-side.
-    code = gen_join_code()
-    while Household.query.filter_by(join_code=code).first():
-        code = gen_join_code()
-
-    h = Household(name=name, join_code=code)
-    db.session.add(h)
+    # Unique join_code allocated server-side by insert-and-retry.
+    try:
+        h = get_join_codes().create_household(db.session, name)
+    except JoinCodeExhausted:
+        db.session.rollback()
+        return _json_error("could not allocate a join code, try again", 503)
     db.session.commit()
 
     # Add creator as a member. Nickname must be unique within a household.
@@ -94,8 +96,12 @@ def create_household():
 def get_household(household_id: int):
     """Show a household if the current user is a member.
 
+    Supports If-None-Match: the ETag is derived from the household version.
+    The household and the membership check come from a single query.
+
     Returns:
-        200 with {id, name, join_code}
+        200 with {id, name, join_code} and an ETag
+        304 if the client's ETag is still current
         403 if the user is not a member
         404 if the household doesn't exist
     """
@@ -105,7 +111,13 @@ def get_household(household_id: int):
     if m is None:
         return _json_error("forbidden", 403)
 
-    return {"id": h.id, "name": h.name, "join_code": h.join_code}, 200
+    etag = make_etag("h", household_id, h.version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    body = {"id": h.id, "name": h.name, "join_code": h.join_code}
+    return body, 200, validator_headers(etag)
 
 
 @households_bp.patch("/<int:household_id>")
@@ -140,6 +152,9 @@ def patch_household(household_id: int):
 def delete_household(household_id: int):
     """Delete a household (member required).
 
+    The household and its pets are hidden at once; their entries and the rows
+    themselves are removed by a background purge job (see app.purge).
+
     Returns:
         204 on success
         403 if user is not a member
@@ -151,8 +166,7 @@ def delete_household(household_id: int):
     if m is None:
         return _json_error("forbidden", 403)
 
-    db.session.delete(h)
-    db.session.commit()
+    delete_later(h)
     return "", 204
 
 
@@ -181,18 +195,33 @@ def join_household_api():
     if not join_code:
         return _json_error("join_code is required", 400)
 
-    household = Household.query.filter_by(join_code=join_code).first()
-    if not household:
-        return _json_error("invalid join_code", 404)
-
     user_id = session["user_id"]  # guaranteed by @login_required_api
-    user = Users.query.get(user_id)
 
-    created = False
-    member = HouseholdMember.query.filter_by(
-        user_id=user_id, household_id=household.id
+    # Unknown codes are usually answered from the lookup caches alone.
+    codes = get_join_codes()
+    household_id = codes.lookup(db.session, join_code)
+    if household_id is None:
+        return _json_error("invalid join_code", 404)
+
+    # Household, existing membership and username in one round trip.
+    row = db.session.execute(
+        select(Household, HouseholdMember, Users.username)
+        .outerjoin(
+            HouseholdMember,
+            and_(
+                HouseholdMember.household_id == Household.id,
+                HouseholdMember.user_id == user_id,
+            ),
+        )
+        .outerjoin(Users, Users.id == user_id)
+        .where(Household.id == household_id)
     ).first()
+    if row is None:
+        codes.forget(join_code)  # household deleted by another process
+        return _json_error("invalid join_code", 404)
+    household, member, username = row
 
+    created = False
     if member:
         # Re-joins just update nickname.
         member.nickname = nickname
@@ -213,6 +242,118 @@ def join_household_api():
         "household_id": household.id,
         "household_name": household.name,
         "member_id": member.id,
-        "user": user.username if user else None,
+        "user": username,
         "nickname": member.nickname,
-    }, (201 if created else 200)
\ No newline at end of file
+    }, (201 if created else 200)
+
+
+def _recent_entries(household_id: int, per_pet: int):
+    """The newest `per_pet` entries of every pet in a household, in one query.
+
+    row_number() ranks each pet's entries newest first over ids only (an index
+    scan of ix_entries_pet_created); full rows are loaded just for the winners.
+    """
+    ranked = (
+        select(
+            Entry.id,
+            func.row_number()
+            .over(
+                partition_by=Entry.pet_id,
+                order_by=(Entry.created_at.desc(), Entry.id.desc()),
+            )
+            .label("rn"),
+        )
+        .join(Pet, Pet.id == Entry.pet_id)
+        .where(Pet.household_id == household_id)
+        .subquery()
+    )
+    stmt = (
+        select(Entry)
+        .join(ranked, ranked.c.id == Entry.id)
+        .where(ranked.c.rn <= per_pet)
+        .order_by(Entry.pet_id, Entry.created_at.desc(), Entry.id.desc())
+    )
+    by_pet = {}
+    for e in db.session.scalars(stmt):
+        by_pet.setdefault(e.pet_id, []).append(e)
+    return by_pet
+
+
+@households_bp.get("/<int:household_id>/snapshot")
+@login_required_api
+def household_snapshot(household_id: int):
+    """Everything a client needs to render a household, in one response (member required).
+
+    Returns the household, its members, its pets (by name) and each pet's most
+    recent entries, built from four queries however many pets or entries the
+    household has. Pets whose live entries run short are topped up from the
+    entry archive.
+
+    Query params:
+        entries: int (optional; entries per pet, default SNAPSHOT_ENTRIES_PER_PET,
+                 capped at SNAPSHOT_ENTRIES_MAX)
+
+    Supports If-None-Match: the tag combines the household version (bumped by
+    renames, pet and membership changes) with the sum of pet versions (bumped
+    by entry changes), so an unchanged snapshot answers 304 after two queries.
+
+    Returns:
+        200 with {household, members, pets} and an ETag
+        304 if the client's ETag is still current
+        400 if entries is not a positive integer
+        403 if user is not a member
+        404 if the household doesn't exist
+    """
+    h, m = _require_membership(household_id)
+    if h is None:
+        return _json_error("not found", 404)
+    if m is None:
+        return _json_error("forbidden", 403)
+
+    cfg = current_app.config
+    try:
+        per_pet = parse_limit(
+            request.args.get("entries"),
+            cfg["SNAPSHOT_ENTRIES_PER_PET"],
+            cfg["SNAPSHOT_ENTRIES_MAX"],
+        )
+    except ValueError:
+        return _json_error("entries must be a positive integer", 400)
+
+    pets = db.session.scalars(
+        select(Pet).where(Pet.household_id == household_id).order_by(Pet.name)
+    ).all()
+    etag = make_etag("hs", household_id, h.version, sum(p.version for p in pets), per_pet)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    members = db.session.execute(
+        select(HouseholdMember.user_id, Users.username, HouseholdMember.nickname)
+        .join(Users, Users.id == HouseholdMember.user_id)
+        .where(HouseholdMember.household_id == household_id)
+        .order_by(HouseholdMember.nickname)
+    ).all()
+    recent = _recent_entries(household_id, per_pet) if pets else {}
+
+    archive = get_archive()
+    pet_bodies = []
+    for p in pets:
+        entries = recent.get(p.id, [])
+        if len(entries) < per_pet and archive is not None:
+            entries = list(
+                islice(merge_entries(entries, archive.newest_first(p.id), reverse=True), per_pet)
+            )
+        data = p.to_dict()
+        data["recent_entries"] = [e.to_dict() for e in entries]
+        pet_bodies.append(data)
+
+    body = {
+        "household": {"id": h.id, "name": h.name, "join_code": h.join_code},
+        "members": [
+            {"user_id": uid, "username": username, "nickname": nickname}
+            for uid, username, nickname in members
+        ],
+        "pets": pet_bodies,
+    }
+    return body, 200, validator_headers(etag)
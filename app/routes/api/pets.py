@@ -1,43 +1,36 @@
-"""Pets API: create, list, read, update, and delete pets within a household.
+"""Pets API: create, list, read, update, delete, and report stats for pets in a household.
 
 All endpoints require a session (see @login_required_api). Responses use a minimal,
 consistent JSON shape and standard HTTP status codes.
 """
 
-from flask import Blueprint, request, session
+from datetime import date
 
-from app.utils.auth import login_required_api
+from flask import Blueprint, abort, request, session
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import aliased
 
-from ...models import Household, HouseholdMember, Pet, db
+from app.archive import get_archive
+from app.compression import inflate_text
+from app.purge import delete_later
+from app.rollups import BUCKETS, pet_stats
+from app.utils.auth import login_required_api
+from app.utils.time_ranges import range_start
+
+from ...models import Entry, HouseholdMember, Pet, PetActivityDaily, db
+from .helpers import (
+    household_access,
+    household_version,
+    make_etag,
+    not_modified,
+    pet_for_member,
+    validator_headers,
+)
 from .helpers import json_error as _json_error  # shared JSON error helper
 
 pets_bp = Blueprint("pets", __name__, url_prefix="/api/v1")
 
 
-def _is_member(household_id: int, user_id: int) -> bool:
-    """Return True if the user belongs to the given household."""
-    return (
-        HouseholdMember.query.filter_by(
-            household_id=household_id, user_id=user_id
-        ).first()
-        is not None
-    )
-
-
-def _pet_and_membership(pet_id: int, user_id: int):
-    """Fetch a pet and whether the user is a member of its household.
-
-    Returns:
-        (None, None) if the pet doesn't exist.
-        (Pet, bool) otherwise where bool indicates membership.
-    """
-    p = Pet.query.get(pet_id)
-    if not p:
-        return None, None
-    is_mem = _is_member(p.household_id, user_id)
-    return p, is_mem
-
-
 @pets_bp.post("/households/<int:household_id>/pets")
 @login_required_api
 def create_pet(household_id: int):
@@ -52,9 +45,10 @@ def create_pet(household_id: int):
         403 if user is not a member
         404 if household does not exist
     """
-    Household.query.get_or_404(household_id)
-
-    if not _is_member(household_id, session["user_id"]):
+    exists, is_member = household_access(household_id, session["user_id"])
+    if not exists:
+        abort(404)
+    if not is_member:
         return _json_error("forbidden", 403)
 
     data = request.get_json(silent=True) or {}
@@ -69,23 +63,150 @@ def create_pet(household_id: int):
     return p.to_dict(), 201, {"Location": f"/api/v1/pets/{p.id}"}
 
 
+# Characters of the latest entry's content included in pet stats
+SNIPPET_CHARS = 120
+
+
+def _snippet(content: str) -> str:
+    if len(content) <= SNIPPET_CHARS:
+        return content
+    return content[: SNIPPET_CHARS - 1].rstrip() + "\u2026"
+
+
+def _pets_with_stats(household_id: int, today: date):
+    """Every pet of a household with its entry counts and latest entry, in one query.
+
+    Counts come from the daily rollup (so they include archived entries). The
+    latest entry is a correlated subquery per pet that resolves to a single
+    seek on ix_entries_pet_created, joined back for its columns and author.
+    """
+    counts = (
+        select(
+            PetActivityDaily.pet_id,
+            func.sum(PetActivityDaily.count).label("total"),
+            func.sum(
+                case((PetActivityDaily.day == today, PetActivityDaily.count), else_=0)
+            ).label("today"),
+        )
+        .join(Pet, Pet.id == PetActivityDaily.pet_id)
+        .where(Pet.household_id == household_id)
+        .group_by(PetActivityDaily.pet_id)
+        .subquery()
+    )
+    newest_id = (
+        select(Entry.id)
+        .where(Entry.pet_id == Pet.id)
+        .order_by(Entry.created_at.desc(), Entry.id.desc())
+        .limit(1)
+        .correlate(Pet)
+        .scalar_subquery()
+    )
+    latest = aliased(Entry)
+    stmt = (
+        select(
+            Pet,
+            counts.c.total,
+            counts.c.today,
+            latest.id,
+            latest.user_id,
+            latest.content,
+            latest.created_at,
+            HouseholdMember.nickname,
+        )
+        .outerjoin(counts, counts.c.pet_id == Pet.id)
+        .outerjoin(latest, latest.id == newest_id)
+        .outerjoin(
+            HouseholdMember,
+            and_(
+                HouseholdMember.household_id == Pet.household_id,
+                HouseholdMember.user_id == latest.user_id,
+            ),
+        )
+        .where(Pet.household_id == household_id)
+        .order_by(Pet.name)
+    )
+    return db.session.execute(stmt).all()
+
+
+def _pet_with_stats(row, archive) -> dict:
+    pet, total, today, entry_id, user_id, content, created_at, nickname = row
+    if entry_id is None and total and archive is not None:
+        # Every live entry was archived; the archive index knows the newest one.
+        archived = next(archive.newest_first(pet.id), None)
+        if archived is not None:
+            entry_id, user_id, content, created_at = (
+                archived.id,
+                archived.user_id,
+                archived.content,
+                archived.created_at,
+            )
+    latest = None
+    if entry_id is not None:
+        latest = {
+            "id": entry_id,
+            "user_id": user_id,
+            "author": nickname,
+            "snippet": _snippet(inflate_text(content)),
+            "created_at": created_at.isoformat(),
+        }
+    data = pet.to_dict()
+    data["stats"] = {"entries": total or 0, "today": today or 0, "latest_entry": latest}
+    return data
+
+
 @pets_bp.get("/households/<int:household_id>/pets")
 @login_required_api
 def list_pets(household_id: int):
     """List pets for a household (member-only), ordered by name.
 
+    Query params:
+        include: "stats" (optional; embed per-pet entry count, today's count
+                 and latest entry {id, user_id, author, snippet, created_at})
+
+    Supports If-None-Match: pet changes bump the household version, so an
+    unchanged list answers 304 without loading any pets. With stats the tag
+    also covers entry changes (pet versions) and the current UTC day.
+
     Returns:
-        200 with a JSON array
+        200 with a JSON array and an ETag
+        304 if the client's ETag is still current
+        400 if include names anything but "stats"
         403 if user is not a member
         404 if household does not exist
     """
-    Household.query.get_or_404(household_id)
-
-    if not _is_member(household_id, session["user_id"]):
+    version, is_member = household_version(household_id, session["user_id"])
+    if version is None:
+        abort(404)
+    if not is_member:
         return _json_error("forbidden", 403)
 
-    pets = Pet.query.filter_by(household_id=household_id).order_by(Pet.name).all()
-    return [p.to_dict() for p in pets], 200
+    include = {part.strip() for part in (request.args.get("include") or "").split(",") if part.strip()}
+    if include - {"stats"}:
+        return _json_error("include must be 'stats'", 400)
+
+    if "stats" not in include:
+        etag = make_etag("hp", household_id, version)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        pets = Pet.query.filter_by(household_id=household_id).order_by(Pet.name).all()
+        return [p.to_dict() for p in pets], 200, validator_headers(etag)
+
+    # Versions only ever grow and removing a pet bumps the household, so the
+    # sum changes whenever any pet's entries do.
+    today = range_start("today")[1].date()
+    pet_versions = db.session.scalar(
+        select(func.coalesce(func.sum(Pet.version), 0)).where(Pet.household_id == household_id)
+    )
+    etag = make_etag("hps", household_id, version, pet_versions, today.isoformat())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    archive = get_archive()
+    body = [_pet_with_stats(row, archive) for row in _pets_with_stats(household_id, today)]
+    return body, 200, validator_headers(etag)
 
 
 @pets_bp.get("/pets/<int:pet_id>")
@@ -94,17 +215,22 @@ def get_pet(pet_id: int):
     """Fetch a single pet (member-only).
 
     Returns:
-        200 with pet JSON
+        200 with pet JSON and an ETag
+        304 if the client's ETag is still current
         403 if user is not a member of the pet's household
         404 if pet does not exist
     """
-    p, is_mem = _pet_and_membership(pet_id, session["user_id"])
+    p, is_mem = pet_for_member(pet_id, session["user_id"])
     if p is None:
         return _json_error("not found", 404)
     if not is_mem:
         return _json_error("forbidden", 403)
 
-    return p.to_dict(), 200
+    etag = make_etag("p", pet_id, p.version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return p.to_dict(), 200, validator_headers(etag)
 
 
 @pets_bp.patch("/pets/<int:pet_id>")
@@ -121,7 +247,7 @@ def patch_pet(pet_id: int):
         403 if user is not a member
         404 if pet does not exist
     """
-    p, is_mem = _pet_and_membership(pet_id, session["user_id"])
+    p, is_mem = pet_for_member(pet_id, session["user_id"])
     if p is None:
         return _json_error("not found", 404)
     if not is_mem:
@@ -143,17 +269,56 @@ def patch_pet(pet_id: int):
 def delete_pet(pet_id: int):
     """Delete a pet (member-only).
 
+    The pet is hidden at once; its entries and the row itself are removed by
+    a background purge job (see app.purge).
+
     Returns:
         204 on success
         403 if user is not a member
         404 if pet does not exist
     """
-    p, is_mem = _pet_and_membership(pet_id, session["user_id"])
+    p, is_mem = pet_for_member(pet_id, session["user_id"])
     if p is None:
         return _json_error("not found", 404)
     if not is_mem:
         return _json_error("forbidden", 403)
 
-    db.session.delete(p)
-    db.session.commit()
-    return "", 204
\ No newline at end of file
+    delete_later(p)
+    return "", 204
+
+
+@pets_bp.get("/pets/<int:pet_id>/stats")
+@login_required_api
+def get_pet_stats(pet_id: int):
+    """Entry counts per time bucket and per author (member-only).
+
+    Served from the pet_activity_daily rollup, never from the entry table.
+
+    Query params:
+        bucket: "day" (default) | "week" | "month"
+        since, until: YYYY-MM-DD (optional, inclusive)
+
+    Returns:
+        200 with {pet_id, bucket, buckets: [{start, total, by_user}]}
+        400 if bucket or dates are invalid
+        403 if user is not a member
+        404 if pet does not exist
+    """
+    p, is_mem = pet_for_member(pet_id, session["user_id"])
+    if p is None:
+        return _json_error("not found", 404)
+    if not is_mem:
+        return _json_error("forbidden", 403)
+
+    bucket = (request.args.get("bucket") or "day").lower()
+    if bucket not in BUCKETS:
+        return _json_error("bucket must be day, week or month", 400)
+
+    try:
+        since = date.fromisoformat(request.args["since"]) if request.args.get("since") else None
+        until = date.fromisoformat(request.args["until"]) if request.args.get("until") else None
+    except ValueError:
+        return _json_error("since/until must be YYYY-MM-DD", 400)
+
+    buckets = pet_stats(db.session, pet_id, bucket, since=since, until=until)
+    return {"pet_id": pet_id, "bucket": bucket, "buckets": buckets}, 200
@@ -0,0 +1,116 @@
+"""Search API: ranked full-text search over a pet's or household's entries.
+
+Backed by the database's text index (see app.search); results are ranked by
+relevance and paginated with limit/offset. Archived entries (see app.archive)
+are not indexed; when the scope has any, responses carry X-History-Truncated.
+"""
+
+from flask import Blueprint, abort, current_app, request, session
+from sqlalchemy import select
+
+from app.search import SearchUnsupported, search_entries
+from app.utils.auth import login_required_api
+from app.utils.pagination import parse_limit
+
+from ...models import ArchivedEntryRef, Pet, db
+from .helpers import household_access
+from .helpers import json_error as _json_error  # shared JSON error helper
+
+search_bp = Blueprint("search", __name__, url_prefix="/api/v1")
+
+
+def _has_archived(pet_id=None, household_id=None) -> bool:
+    """Whether any entry in the search scope has moved to the archive."""
+    stmt = select(ArchivedEntryRef.id)
+    if pet_id is not None:
+        stmt = stmt.where(ArchivedEntryRef.pet_id == pet_id)
+    if household_id is not None:
+        stmt = stmt.join(Pet, Pet.id == ArchivedEntryRef.pet_id).where(
+            Pet.household_id == household_id
+        )
+    return db.session.scalar(stmt.limit(1)) is not None
+
+
+def _run_search(**scope):
+    """Parse q/limit/offset, run the search, and build the JSON response."""
+    text = (request.args.get("q") or "").strip()
+    if not text:
+        return _json_error("q is required", 400)
+
+    cfg = current_app.config
+    try:
+        limit = parse_limit(
+            request.args.get("limit"), cfg["ENTRIES_PAGE_SIZE"], cfg["ENTRIES_PAGE_MAX"]
+        )
+        offset = int(request.args.get("offset") or 0)
+        if offset < 0:
+            raise ValueError("negative offset")
+    except ValueError:
+        return _json_error("limit and offset must be non-negative integers", 400)
+
+    try:
+        rows = search_entries(db.session, text, limit=limit + 1, offset=offset, **scope)
+    except SearchUnsupported:
+        return _json_error("search is not supported on this database", 501)
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Offset"] = str(offset + limit)
+    if _has_archived(**scope):
+        headers["X-History-Truncated"] = "true"
+
+    results = [{**e.to_dict(), "score": round(float(score), 6)} for e, score in rows]
+    return results, 200, headers
+
+
+@search_bp.get("/pets/<int:pet_id>/entries/search")
+@login_required_api
+def search_pet_entries(pet_id: int):
+    """Search a pet's entries, best match first.
+
+    Query params:
+        q: str (required; every word must match)
+        limit: int (optional; default ENTRIES_PAGE_SIZE, capped at ENTRIES_PAGE_MAX)
+        offset: int (optional; value of X-Next-Offset from the previous page)
+
+    Returns:
+        200 with a JSON array of entries (each with a relevance score);
+            X-History-Truncated if archived entries were not searched
+        400 if q is missing or paging params are invalid
+        403 if the user is not a member of the pet's household
+        404 if the pet does not exist
+    """
+    household_id = db.session.scalar(select(Pet.household_id).where(Pet.id == pet_id))
+    if household_id is None:
+        abort(404)
+    # Answered from the membership cache when warm; one query otherwise.
+    _, is_member = household_access(household_id, session["user_id"])
+    if not is_member:
+        return _json_error("forbidden", 403)
+    return _run_search(pet_id=pet_id)
+
+
+@search_bp.get("/households/<int:household_id>/entries/search")
+@login_required_api
+def search_household_entries(household_id: int):
+    """Search entries across every pet in a household (member-only).
+
+    Query params:
+        q, limit, offset: as for the pet search
+
+    Returns:
+        200 with a JSON array of entries (each with a relevance score);
+            X-History-Truncated if archived entries were not searched
+        400 if q is missing or paging params are invalid
+        403 if the user is not a member
+        404 if the household does not exist
+    """
+    # Answered from the membership cache when warm; one query otherwise.
+    exists, is_member = household_access(household_id, session["user_id"])
+    if not exists:
+        abort(404)
+    if not is_member:
+        return _json_error("forbidden", 403)
+
+    return _run_search(household_id=household_id)
@@ -0,0 +1,235 @@
+"""Sync API: incremental delta sync for offline-capable clients.
+
+Clients call GET /api/v1/sync once without `since` to get everything they can
+see, then pass back the returned `watermark` to receive only rows created,
+updated or deleted after it. All range filters are served by the `updated_at`
+and tombstone indexes, so the cost follows the amount of change.
+
+Entries come in pages ordered by (updated_at, id). While more remain, the
+response carries an X-Next-Cursor header; the client repeats the request with
+the same `since` plus `cursor` until the header is absent, and only then keeps
+the watermark. Continuation pages hold entries only, and every page reports the
+watermark of the first one, so nothing that changed mid-way is skipped.
+
+Households sent in full (all of them on a first sync, newly joined ones on a
+delta) also get their archived entries (see app.archive). Those come first,
+merged across pets in (created_at, id) order by `merge_entries`, and the cursor
+records which of the two phases it points into.
+
+Tombstones are kept for SYNC_TOMBSTONE_RETENTION_DAYS. A `since` older than
+that could miss deletions, so it is refused with 410 and the client starts over
+with a full sync.
+"""
+
+import base64
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Tuple
+
+from flask import Blueprint, current_app, request, session
+from sqlalchemy import and_, or_, select, true
+
+from app.archive import get_archive, merge_entries
+from app.utils.auth import login_required_api
+from app.utils.pagination import parse_limit
+
+from ...models import Entry, Household, HouseholdMember, Pet, Tombstone, db
+from .helpers import json_error as _json_error  # shared JSON error helper
+
+sync_bp = Blueprint("sync", __name__, url_prefix="/api/v1")
+
+# Tombstone.kind -> key in the response's "deleted" object
+_DELETED_KEYS = {"household": "households", "pet": "pets", "entry": "entries"}
+
+
+def _household_dict(h: Household) -> dict:
+    return {"id": h.id, "name": h.name, "join_code": h.join_code}
+
+
+def _encode_page(watermark: datetime, ts: datetime, row_id: int, archived: bool = False) -> str:
+    """Opaque continuation cursor: the first page's watermark plus the last sort key.
+
+    The key is (created_at, id) in the archived phase, (updated_at, id) after it.
+    """
+    raw = f"{watermark.isoformat()}|{ts.isoformat()}|{row_id}|{'a' if archived else 'l'}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_page(cursor: str) -> Tuple[datetime, datetime, int, bool]:
+    """Decode a cursor produced by `_encode_page`.
+
+    Raises:
+        ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        watermark, ts, row_id, phase = raw.split("|", 3)
+        if phase not in ("a", "l"):
+            raise ValueError(phase)
+        return (
+            datetime.fromisoformat(watermark),
+            datetime.fromisoformat(ts),
+            int(row_id),
+            phase == "a",
+        )
+    except Exception as exc:  # binascii/Unicode/Value errors all mean "bad cursor"
+        raise ValueError("invalid cursor") from exc
+
+
+def _changed(model, since, full_household_ids, household_col):
+    """Filter: rows updated after `since`, or every row of a newly joined household."""
+    if since is None:
+        return true()
+    clause = model.updated_at > since
+    if full_household_ids:
+        clause = or_(clause, household_col.in_(full_household_ids))
+    return clause
+
+
+@sync_bp.get("/sync")
+@login_required_api
+def sync():
+    """Return households, pets and entries changed since a watermark.
+
+    Query params:
+        since: str (optional; the `watermark` returned by the previous sync)
+        limit: int (optional; default SYNC_PAGE_SIZE, capped at SYNC_PAGE_MAX)
+        cursor: str (optional; value of X-Next-Cursor from the previous page)
+
+    Returns:
+        200 with {watermark, households, pets, entries,
+                  deleted: {households, pets, entries}};
+            X-Next-Cursor header if more entries remain
+        400 if since, limit or cursor is invalid
+        410 if since is older than the tombstone retention window (full resync required)
+
+    Entries of households sent in full include archived ones, which come
+    first. Delivery is at-least-once: the watermark overlaps the previous window by
+    SYNC_OVERLAP_SECONDS so rows committed by in-flight transactions are not
+    missed. Clients should upsert by id.
+    """
+    user_id = session["user_id"]  # guaranteed by @login_required_api
+
+    raw_since = request.args.get("since")
+    since = None
+    if raw_since:
+        try:
+            since = datetime.fromisoformat(raw_since)
+        except ValueError:
+            return _json_error("invalid since watermark", 400)
+        if since.tzinfo is not None:
+            # Timestamps are stored as naive UTC.
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    cfg = current_app.config
+    if since is not None:
+        retention = timedelta(days=cfg["SYNC_TOMBSTONE_RETENTION_DAYS"])
+        if since < datetime.utcnow() - retention:
+            return _json_error("watermark expired, full resync required", 410)
+
+    try:
+        limit = parse_limit(request.args.get("limit"), cfg["SYNC_PAGE_SIZE"], cfg["SYNC_PAGE_MAX"])
+    except ValueError:
+        return _json_error("limit must be a positive integer", 400)
+
+    after, in_archive = None, False
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            watermark, after_ts, after_id, in_archive = _decode_page(cursor)
+        except ValueError:
+            return _json_error("invalid cursor", 400)
+        after = (after_ts, after_id)
+    else:
+        overlap = timedelta(seconds=cfg["SYNC_OVERLAP_SECONDS"])
+        watermark = datetime.utcnow() - overlap
+
+    memberships = db.session.execute(
+        select(HouseholdMember.household_id, HouseholdMember.created_at).where(
+            HouseholdMember.user_id == user_id
+        )
+    ).all()
+    household_ids = [hid for hid, _ in memberships]
+    # Households joined after the watermark are sent in full.
+    joined = [hid for hid, joined_at in memberships if since is not None and joined_at > since]
+
+    households, pets, archived, entries = [], [], [], []
+    if household_ids and after is None:
+        households = db.session.scalars(
+            select(Household).where(
+                Household.id.in_(household_ids),
+                _changed(Household, since, joined, Household.id),
+            )
+        ).all()
+        pets = db.session.scalars(
+            select(Pet).where(
+                Pet.household_id.in_(household_ids),
+                _changed(Pet, since, joined, Pet.household_id),
+            )
+        ).all()
+    store = get_archive()
+    full = household_ids if since is None else joined
+    if store is not None and full and (after is None or in_archive):
+        pet_ids = db.session.scalars(select(Pet.id).where(Pet.household_id.in_(full))).all()
+        streams = [store.oldest_first(pet_id, after) for pet_id in pet_ids]
+        archived = list(islice(merge_entries(*streams), limit + 1))
+
+    headers = {}
+    if len(archived) > limit:
+        # Still in the archived phase: the live table waits for a later page.
+        archived = archived[:limit]
+        last = archived[-1]
+        headers["X-Next-Cursor"] = _encode_page(watermark, last.created_at, last.id, True)
+    elif household_ids:
+        # The live phase starts over once the archived one is done.
+        live_after = None if in_archive else after
+        live_limit = limit - len(archived)
+        q = (
+            select(Entry)
+            .join(Pet, Pet.id == Entry.pet_id)
+            .where(
+                Pet.household_id.in_(household_ids),
+                _changed(Entry, since, joined, Pet.household_id),
+            )
+        )
+        if live_after is not None:
+            after_ts, after_id = live_after
+            q = q.where(
+                or_(
+                    Entry.updated_at > after_ts,
+                    and_(Entry.updated_at == after_ts, Entry.id > after_id),
+                )
+            )
+        entries = db.session.scalars(
+            q.order_by(Entry.updated_at, Entry.id).limit(live_limit + 1)
+        ).all()
+        if len(entries) > live_limit:
+            entries = entries[:live_limit]
+            # A page filled by archived entries resumes before the first live one.
+            last = (entries[-1].updated_at, entries[-1].id) if entries else (datetime.min, 0)
+            headers["X-Next-Cursor"] = _encode_page(watermark, *last)
+
+    deleted = {key: [] for key in _DELETED_KEYS.values()}
+    if since is not None and after is None:
+        scope = Tombstone.user_id == user_id
+        if household_ids:
+            scope = or_(
+                scope,
+                and_(Tombstone.household_id.in_(household_ids), Tombstone.user_id.is_(None)),
+            )
+        stones = db.session.execute(
+            select(Tombstone.kind, Tombstone.object_id).where(
+                Tombstone.deleted_at > since, scope
+            )
+        ).all()
+        for kind, object_id in stones:
+            deleted[_DELETED_KEYS[kind]].append(object_id)
+
+    return {
+        "watermark": watermark.isoformat(),
+        "households": [_household_dict(h) for h in households],
+        "pets": [p.to_dict() for p in pets],
+        "entries": [e.to_dict() for e in archived + entries],
+        "deleted": deleted,
+    }, 200, headers
@@ -5,7 +5,8 @@ Uses session cookies; errors render the same template with a message.
 """
 
 from flask import Blueprint, redirect, render_template, request, session, url_for
-from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.passwords import get_hasher
 
 from ...models import Users, db
 
@@ -29,9 +30,16 @@ def login_post():
         return render_template("login.html", error="Please fill in both fields."), 400
 
     user = db.session.query(Users).filter_by(username=username).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    ok, new_hash = (
+        get_hasher().verify_and_update(user.password_hash, password) if user else (False, None)
+    )
+    if not ok:
         # 401 for invalid credentials
         return render_template("login.html", error="Invalid username or password."), 401
+    if new_hash:
+        # Stored with an outdated cost; upgrade it now that we have the password
+        user.password_hash = new_hash
+        db.session.commit()
 
     # Store minimal identity in the session
     session["user_id"] = user.id
@@ -58,7 +66,7 @@ def signup_post():
         # 409 for conflict (username already taken)
         return render_template("signup.html", error="That username is taken."), 409
 
-    user = Users(username=username, password_hash=generate_password_hash(password))
+    user = Users(username=username, password_hash=get_hasher().hash(password))
     db.session.add(user)
     db.session.commit()
 
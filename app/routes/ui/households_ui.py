@@ -3,9 +3,10 @@
 
 from flask import Blueprint, redirect, render_template, request, session, url_for
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 
 from ...models import Household, HouseholdMember, db
-from app.utils.join_code import gen_join_code
+from app.join_codes import JoinCodeExhausted, get_join_codes
 from app.utils.auth import login_required_ui
 
 households_ui = Blueprint("households_ui", __name__)
@@ -16,7 +17,15 @@ households_ui = Blueprint("households_ui", __name__)
 def households_index():
     """List the current user's household memberships."""
     user_id = session["user_id"]
-    memberships = db.session.query(HouseholdMember).filter_by(user_id=user_id).all()
+    # The join skips households that are deleted but not yet purged, and also
+    # fills m.household, which the template reads once per row.
+    memberships = (
+        db.session.query(HouseholdMember)
+        .join(HouseholdMember.household)
+        .options(contains_eager(HouseholdMember.household))
+        .filter(HouseholdMember.user_id == user_id)
+        .all()
+    )
     return render_template("households_index.html", memberships=memberships)
 
 
@@ -41,13 +50,14 @@ def households_new_post():
             "households_new.html", error="Household name is required."
         )
 
-    # Generate a unique join code.
-    code = gen_join_code()
-    while db.session.query(Household).filter_by(join_code=code).first():
-        code = gen_join_code()
-
-    h = Household(name=name, join_code=code)
-    db.session.add(h)
+    # Allocate a unique join code by insert-and-retry.
+    try:
+        h = get_join_codes().create_household(db.session, name)
+    except JoinCodeExhausted:
+        db.session.rollback()
+        return render_template(
+            "households_new.html", error="Could not create the household. Please try again."
+        )
     db.session.commit()
 
     # Add creator as a member; nickname must be unique per household.
@@ -89,7 +99,11 @@ def join_post():
     if not code:
         return render_template("join.html", error="Join code is required.")
 
-    h = db.session.query(Household).filter_by(join_code=code).first()
+    codes = get_join_codes()
+    household_id = codes.lookup(db.session, code)
+    h = db.session.get(Household, household_id) if household_id is not None else None
+    if household_id is not None and not h:
+        codes.forget(code)  # household deleted by another process
     if not h:
         return render_template(
             "join.html", error="Invalid join code. Please try again."
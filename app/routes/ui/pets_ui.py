@@ -1,12 +1,12 @@
 """UI routes for pets: create, delete, and detail view with entry filters."""
 
-from datetime import datetime, time, timedelta
-
 from flask import Blueprint, redirect, render_template, request, url_for
 from sqlalchemy import desc
 
 from ...models import Entry, Pet, db
+from app.purge import delete_later
 from app.utils.auth import login_required_ui
+from app.utils.time_ranges import range_start
 
 pets_ui = Blueprint("pets_ui", __name__)
 
@@ -44,8 +44,7 @@ def pets_delete(household_id: int, pet_id: int):
     if not p or p.household_id != household_id:
         return render_template("errors/404.html"), 404
 
-    db.session.delete(p)
-    db.session.commit()
+    delete_later(p)
     return redirect(
         url_for("households_ui.household_dashboard", household_id=household_id)
     )
@@ -59,25 +58,11 @@ def pets_show(pet_id: int):
     if not pet:
         return render_template("errors/404.html"), 404
 
-    rng = (request.args.get("range") or "today").lower()
-    now = datetime.utcnow()
-    today = now.date()
-
     # Compute start time for the requested range; default to "today".
-    if rng in ("today", "daily", "day"):
-        start = datetime.combine(today, time.min)
-        rng = "today"
-    elif rng == "week":
-        monday = today - timedelta(days=today.weekday())
-        start = datetime.combine(monday, time.min)
-    elif rng == "month":
-        first = today.replace(day=1)
-        start = datetime.combine(first, time.min)
-    elif rng == "all":
-        start = None
-    else:
-        start = datetime.combine(today, time.min)
-        rng = "today"
+    try:
+        rng, start = range_start(request.args.get("range") or "today")
+    except ValueError:
+        rng, start = range_start("today")
 
     q = db.session.query(Entry).filter(Entry.pet_id == pet_id)
     if start:
@@ -0,0 +1,265 @@
+"""Always-on sampling profiler: where request time goes, as collapsed stacks.
+
+A daemon thread wakes every SAMPLER_INTERVAL_MS and records the Python stack of
+each thread that is currently handling a request (threads register in
+before_request and leave in teardown_request, so idle workers waiting on a
+socket never show up). Stacks are counted in collapsed form, one line per
+distinct stack, root first, with the endpoint as the root frame:
+
+    pets_ui.pets_show;flask.app:wsgi_app;...;jinja2.environment:render 42
+
+which flamegraph.pl, speedscope and inferno read directly. Frames are
+`module:function`, so one function is one box whatever line it was on.
+
+Each worker samples itself. When PROMETHEUS_MULTIPROC_DIR is set, every worker
+also rewrites `stacks_<pid>.txt` there every few seconds, and the admin
+endpoint (GET /api/v1/admin/stacks) sums the files of all workers on the host,
+exited ones included. Costs are one frame walk per active request thread per
+sample; `flask sampler bench` measures the overhead on this machine.
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .metrics import multiprocess_dir
+
+MAX_DEPTH = 128
+OTHER = "[other]"
+
+
+# (file, first line, name) -> "module:function". Keyed by source location rather
+# than code object, so code compiled again at runtime (reloaded templates, exec)
+# neither pins old code objects nor adds entries; bounded by the source itself.
+_labels = {}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    key = (code.co_filename, code.co_firstlineno, code.co_name)
+    label = _labels.get(key)
+    if label is None:
+        label = _labels[key] = f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+    return label
+
+
+def collapse(frame, root: str) -> str:
+    """Collapsed stack of `frame` (root first) under a synthetic root frame."""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Samples the stacks of active request threads on a background thread."""
+
+    def __init__(
+        self,
+        interval_ms: float,
+        max_stacks: int = 5000,
+        flush_dir: Optional[str] = None,
+        flush_every: float = 5.0,
+    ):
+        self.interval = interval_ms / 1000
+        self._max_stacks = max_stacks
+        self._flush_dir = flush_dir
+        self._flush_every = flush_every
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._active = {}  # thread ident -> endpoint
+        self.samples = 0
+        self.busy = 0.0  # seconds the sampler thread spent taking samples
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    # ------------------------- Request registration -------------------------
+
+    def enter(self, endpoint: Optional[str]) -> None:
+        """Mark the calling thread as handling a request for `endpoint`."""
+        if self._pid != os.getpid():
+            self.start()  # first request, or first one after a fork
+        self._active[threading.get_ident()] = endpoint or "unknown"
+
+    def leave(self) -> None:
+        self._active.pop(threading.get_ident(), None)
+
+    # ------------------------------- Sampling -------------------------------
+
+    def start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive fork; a forked worker starts afresh.
+            self._pid = os.getpid()
+            self._counts.clear()
+            self._active.clear()
+            self.samples = 0
+            self.busy = 0.0
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pid = None
+
+    def _run(self) -> None:
+        stop = self._stop
+        next_flush = time.monotonic() + self._flush_every
+        while not stop.wait(self.interval):
+            start = time.perf_counter()
+            self.sample()
+            self.busy += time.perf_counter() - start
+            if self._flush_dir is not None and time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self._flush_every
+        if self._flush_dir is not None:
+            self.flush()
+
+    def sample(self) -> None:
+        """Record one stack for every thread currently handling a request."""
+        active = list(self._active.items())
+        if not active:
+            return
+        frames = sys._current_frames()
+        stacks = [
+            collapse(frames[ident], endpoint) for ident, endpoint in active if ident in frames
+        ]
+        with self._lock:
+            self.samples += 1
+            for stack in stacks:
+                if stack not in self._counts and len(self._counts) >= self._max_stacks:
+                    stack = OTHER
+                self._counts[stack] += 1
+
+    # -------------------------------- Output --------------------------------
+
+    def counts(self) -> Counter:
+        with self._lock:
+            return Counter(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+
+    def flush(self) -> None:
+        """Write this worker's counts to its file in the shared directory."""
+        path = os.path.join(self._flush_dir, f"stacks_{os.getpid()}.txt")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(format_collapsed(self.counts()))
+        os.replace(tmp, path)
+
+    def collected(self) -> Counter:
+        """Counts of every worker sharing the directory, or just this one's."""
+        if self._flush_dir is None:
+            return self.counts()
+        own = f"stacks_{os.getpid()}.txt"
+        total = self.counts()
+        try:
+            names = os.listdir(self._flush_dir)
+        except FileNotFoundError:
+            return total
+        for name in names:
+            if name.startswith("stacks_") and name.endswith(".txt") and name != own:
+                with open(os.path.join(self._flush_dir, name), encoding="utf-8") as fh:
+                    total.update(parse_collapsed(fh))
+        return total
+
+
+def format_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+
+def parse_collapsed(lines) -> Counter:
+    counts = Counter()
+    for line in lines:
+        stack, _, n = line.rstrip("\n").rpartition(" ")
+        if stack and n.isdigit():
+            counts[stack] += int(n)
+    return counts
+
+
+def sampler_from_config(cfg) -> Optional[StackSampler]:
+    if cfg["SAMPLER_INTERVAL_MS"] <= 0:
+        return None
+    return StackSampler(
+        cfg["SAMPLER_INTERVAL_MS"],
+        max_stacks=cfg["SAMPLER_MAX_STACKS"],
+        flush_dir=multiprocess_dir(),
+    )
+
+
+def get_sampler() -> Optional[StackSampler]:
+    return current_app.extensions.get("sampler")
+
+
+sampler_cli = AppGroup("sampler", help="Always-on stack sampling profiler.")
+
+
+def _cpu_per_request(client, path: str, requests: int) -> float:
+    """Process CPU seconds per request, the sampler thread's own work included."""
+    start = time.process_time()
+    for _ in range(requests):
+        client.get(path)
+    return (time.process_time() - start) / requests
+
+
+@sampler_cli.command("bench")
+@click.option("--path", default="/health", show_default=True, help="URL to request.")
+@click.option("--requests", "n", type=int, default=500, show_default=True)
+@click.option("--rounds", type=int, default=20, show_default=True)
+@click.option("--interval-ms", type=float, default=None, help="Default SAMPLER_INTERVAL_MS.")
+def bench_command(path, n, rounds, interval_ms):
+    """Measure the CPU cost per request with and without sampling; report the overhead."""
+    app = current_app._get_current_object()
+    interval = app.config["SAMPLER_INTERVAL_MS"] if interval_ms is None else interval_ms
+    if interval <= 0:
+        raise click.UsageError("set --interval-ms or SAMPLER_INTERVAL_MS above 0")
+    previous = app.extensions.get("sampler")
+    sampler = StackSampler(interval)
+    client = app.test_client()
+    _cpu_per_request(client, path, max(n // 5, 1))  # warm up
+
+    off, on, wall = [], [], 0.0
+    try:
+        # Many short rounds, alternating which side goes first, so drift in
+        # machine load hits both sides alike.
+        for i in range(rounds * 2):
+            if (i + i // 2) % 2:
+                app.extensions["sampler"] = sampler
+                start = time.perf_counter()
+                on.append(_cpu_per_request(client, path, n))
+                wall += time.perf_counter() - start
+            else:
+                app.extensions["sampler"] = None
+                off.append(_cpu_per_request(client, path, n))
+    finally:
+        sampler.stop()
+        app.extensions["sampler"] = previous
+
+    cpu_off, cpu_on = statistics.median(off), statistics.median(on)
+    click.echo(f"interval: {interval:g} ms, {rounds} rounds of {n} x GET {path}")
+    click.echo(f"off: {cpu_off * 1e6:.0f} us CPU per request")
+    click.echo(f"on:  {cpu_on * 1e6:.0f} us CPU per request ({sampler.samples} samples)")
+    click.echo(f"overhead: {(cpu_on / cpu_off - 1) * 100:.2f}% (end to end, includes noise)")
+    # The sampler holds the GIL while it samples; this share comes straight off the workers.
+    click.echo(
+        f"sampler busy: {sampler.busy * 1000:.1f} ms of {wall:.1f} s sampled "
+        f"({sampler.busy / wall * 100:.3f}%, {sampler.busy / max(sampler.samples, 1) * 1e6:.0f} us per sample)"
+    )
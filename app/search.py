@@ -0,0 +1,106 @@
+"""Full-text search over Entry.content.
+
+SQLite uses an FTS5 external-content table kept in sync by triggers (which index
+the inflated text of compressed rows, see app.compression); PostgreSQL
+uses a GIN index on to_tsvector(content). In both cases the index is maintained
+by the database itself, so ORM writes, Core bulk inserts and FK cascades all
+stay in sync without application hooks.
+"""
+
+import re
+
+from sqlalchemy import column, event, func, literal_column, select, table
+
+from .models import Entry, Pet
+
+# DDL per dialect, run right after the entry table is created.
+FULLTEXT_DDL = {
+    "sqlite": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS entry_fts USING fts5("
+        "content, content='entry', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS entry_fts_ai AFTER INSERT ON entry BEGIN "
+        "INSERT INTO entry_fts(rowid, content) VALUES (new.id, entry_text(new.content)); END",
+        "CREATE TRIGGER IF NOT EXISTS entry_fts_ad AFTER DELETE ON entry BEGIN "
+        "INSERT INTO entry_fts(entry_fts, rowid, content) "
+        "VALUES ('delete', old.id, entry_text(old.content)); END",
+        "CREATE TRIGGER IF NOT EXISTS entry_fts_au AFTER UPDATE OF content ON entry BEGIN "
+        "INSERT INTO entry_fts(entry_fts, rowid, content) "
+        "VALUES ('delete', old.id, entry_text(old.content)); "
+        "INSERT INTO entry_fts(rowid, content) VALUES (new.id, entry_text(new.content)); END",
+    ),
+    "postgresql": (
+        "CREATE INDEX IF NOT EXISTS ix_entry_content_fts ON entry "
+        "USING gin (to_tsvector('english', content))",
+    ),
+}
+
+DROP_DDL = {
+    "sqlite": ("DROP TABLE IF EXISTS entry_fts",),
+}
+
+_entry_fts = table("entry_fts", column("rowid"))
+_PG_CONFIG = literal_column("'english'")
+
+
+class SearchUnsupported(Exception):
+    """Raised when the database dialect has no full-text index."""
+
+
+@event.listens_for(Entry.__table__, "after_create")
+def _create_fulltext(target, connection, **kw) -> None:
+    for stmt in FULLTEXT_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(stmt)
+
+
+@event.listens_for(Entry.__table__, "before_drop")
+def _drop_fulltext(target, connection, **kw) -> None:
+    for stmt in DROP_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(stmt)
+
+
+def _fts5_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, syntax is inert."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+
+def search_entries(session, text: str, *, pet_id=None, household_id=None, limit=20, offset=0):
+    """Return [(Entry, score)] for entries matching `text`, best match first.
+
+    Scope the search with `pet_id` or `household_id`. Higher scores are better.
+
+    Raises:
+        SearchUnsupported if the dialect has no full-text support configured.
+    """
+    dialect = session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        match = _fts5_query(text)
+        if not match:
+            return []
+        # bm25() is "lower is better"; negate it so callers always sort descending.
+        rank = literal_column("bm25(entry_fts)")
+        stmt = (
+            select(Entry, (-rank).label("score"))
+            .join(_entry_fts, _entry_fts.c.rowid == Entry.id)
+            .where(literal_column("entry_fts").match(match))
+            .order_by(rank, Entry.id.desc())
+        )
+    elif dialect == "postgresql":
+        # Must match the indexed expression exactly for the GIN index to be used.
+        vector = func.to_tsvector(_PG_CONFIG, Entry.content)
+        query = func.websearch_to_tsquery(_PG_CONFIG, text)
+        score = func.ts_rank(vector, query)
+        stmt = (
+            select(Entry, score.label("score"))
+            .where(vector.op("@@")(query))
+            .order_by(score.desc(), Entry.id.desc())
+        )
+    else:
+        raise SearchUnsupported(dialect)
+
+    if pet_id is not None:
+        stmt = stmt.where(Entry.pet_id == pet_id)
+    if household_id is not None:
+        stmt = stmt.join(Pet, Pet.id == Entry.pet_id).where(Pet.household_id == household_id)
+
+    return session.execute(stmt.limit(limit).offset(offset)).all()
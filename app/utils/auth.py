@@ -1,10 +1,13 @@
 # app/utils/auth.py
-"""Auth utilities: session-based login-required decorators for API and UI."""
+"""Auth utilities: session-based login-required (and admin) decorators for API and UI."""
 
 from functools import wraps
 from typing import Any, Callable
 
-from flask import jsonify, redirect, session, url_for
+from flask import current_app, jsonify, redirect, session, url_for
+from sqlalchemy import select
+
+from ..models import Users, db
 
 
 def login_required_api(fn: Callable[..., Any]) -> Callable[..., Any]:
@@ -34,4 +37,32 @@ def login_required_ui(fn: Callable[..., Any]) -> Callable[..., Any]:
             return redirect(url_for("auth_ui.login_get"))
         return fn(*args, **kwargs)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def is_admin(user_id) -> bool:
+    """True if the user with this id is listed in ADMIN_USERNAMES."""
+    admins = current_app.config.get("ADMIN_USERNAMES") or ()
+    if not user_id or not admins:
+        return False
+    username = db.session.scalar(select(Users.username).where(Users.id == user_id))
+    return username in admins
+
+
+def admin_required_api(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Require a session whose user is listed in ADMIN_USERNAMES, for JSON API routes.
+
+    Returns 401 with {"error": "authentication required"} if no user_id is present,
+    and 403 with {"error": "forbidden"} if the user is not an admin.
+    """
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any):
+        user_id = session.get("user_id")
+        if not user_id:
+            return jsonify(error="authentication required"), 401
+        if not is_admin(user_id):
+            return jsonify(error="forbidden"), 403
+        return fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,45 @@
+# app/utils/pagination.py
+"""Keyset (cursor) pagination helpers.
+
+Cursors are opaque to clients: a url-safe base64 encoding of the sort key
+(created_at, id) of the last row on the previous page.
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) sort key into an opaque cursor string."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as exc:  # binascii/Unicode/Value errors all mean "bad cursor"
+        raise ValueError("invalid cursor") from exc
+
+
+def parse_limit(raw: Optional[str], default: int, maximum: int) -> int:
+    """Parse a `limit` query parameter, clamped to [1, maximum].
+
+    Raises:
+        ValueError if the value is not a positive integer.
+    """
+    if raw is None or raw == "":
+        return default
+    limit = int(raw)  # ValueError propagates for non-integers
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, maximum)
@@ -0,0 +1,47 @@
+# app/utils/time_ranges.py
+"""Named entry time windows ("today", "week", "month", "all") shared by UI and API.
+
+All bounds are naive UTC datetimes, matching Entry.created_at.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+
+RANGES = ("today", "week", "month", "all")
+# Accepted spellings for the canonical names above
+_ALIASES = {"daily": "today", "day": "today"}
+
+
+def range_start(name: str, now: Optional[datetime] = None) -> Tuple[str, Optional[datetime]]:
+    """Resolve a range name to (canonical name, inclusive start); start is None for "all".
+
+    Raises:
+        ValueError if the name is unknown.
+    """
+    rng = (name or "").lower()
+    rng = _ALIASES.get(rng, rng)
+    if rng not in RANGES:
+        raise ValueError(f"unknown range: {name!r}")
+
+    today = (now or datetime.utcnow()).date()
+    if rng == "today":
+        start = today
+    elif rng == "week":
+        start = today - timedelta(days=today.weekday())
+    elif rng == "month":
+        start = today.replace(day=1)
+    else:
+        return rng, None
+    return rng, datetime.combine(start, time.min)
+
+
+def parse_instant(raw: str) -> datetime:
+    """Parse an ISO-8601 date or datetime into naive UTC (a bare date means midnight).
+
+    Raises:
+        ValueError if the value is not ISO-8601.
+    """
+    dt = datetime.fromisoformat(raw)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
@@ -0,0 +1,49 @@
+"""gunicorn settings for running PetCare with several worker processes.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Prometheus metrics are shared between workers through files in
+PROMETHEUS_MULTIPROC_DIR (see app/metrics.py). It is set here, before any
+worker imports the app, and emptied on every start so samples from an earlier
+run are not summed in.
+
+Server-Sent Events streams hold a thread each for up to SSE_MAX_SECONDS. Run a
+second instance with GUNICORN_ROLE=stream and route /api/v1/households/*/events
+to it at the proxy: a waiting stream only sleeps on a condition, so that
+instance runs one process with many threads, and the request threads of the
+main instance stay free. Every instance sees every event through the stored
+event log (see app/events.py).
+"""
+
+import os
+import shutil
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/petcare-metrics")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+if os.getenv("GUNICORN_ROLE") == "stream":
+    workers = int(os.getenv("GUNICORN_STREAM_WORKERS", "1"))
+    threads = int(os.getenv("GUNICORN_STREAM_THREADS", "256"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def post_worker_init(worker):
+    # post_fork runs before the worker has loaded the app; this runs right after.
+    # Starting the password-hashing pool here keeps its startup off the first login.
+    worker.wsgi.extensions["password_hasher"].start()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the worker's live-gauge files; counter files stay so totals never drop.
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,34 @@
+"""normalize entry.created_at storage format on SQLite
+
+Rows written through the CURRENT_TIMESTAMP server default are stored as
+'YYYY-MM-DD HH:MM:SS', while SQLAlchemy binds 'YYYY-MM-DD HH:MM:SS.ffffff'.
+Keyset pagination compares (created_at, id) directly, so every row must use
+the same text format.
+
+Revision ID: a1c3e5f7b9d2
+Revises: 307bb45e7fa8
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a1c3e5f7b9d2"
+down_revision = "307bb45e7fa8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        "UPDATE entry SET created_at = created_at || '.000000' "
+        "WHERE length(created_at) = 19"
+    )
+
+
+def downgrade():
+    # The normalized format is still valid for the old code; nothing to undo.
+    pass
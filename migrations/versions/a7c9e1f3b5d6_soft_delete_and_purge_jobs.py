@@ -0,0 +1,51 @@
+"""soft delete: deleted_at on household and pet, purge_job table
+
+Deleting a household or pet now only sets deleted_at; a purge job removes the
+rows and their children later, in batches (see app.purge).
+
+Revision ID: a7c9e1f3b5d6
+Revises: f6b8d0e2a4c5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7c9e1f3b5d6"
+down_revision = "f6b8d0e2a4c5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("household", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.add_column("pet", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "purge_job",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("purged", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    # Rows still waiting for their purge go now, the slow way (FK cascades).
+    op.execute("DELETE FROM pet WHERE deleted_at IS NOT NULL")
+    op.execute("DELETE FROM household WHERE deleted_at IS NOT NULL")
+    op.drop_table("purge_job")
+
+    # SQLite needs batch mode to drop columns.
+    with op.batch_alter_table("pet", schema=None) as batch_op:
+        batch_op.drop_column("deleted_at")
+    with op.batch_alter_table("household", schema=None) as batch_op:
+        batch_op.drop_column("deleted_at")
@@ -0,0 +1,35 @@
+"""archived_entry_ref table: id -> pet and month of archived entries
+
+Revision ID: a8c0e2f4b6d7
+Revises: a7c9e1f3b5d6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a8c0e2f4b6d7"
+down_revision = "a7c9e1f3b5d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Entries archived before this revision have no ref; `flask archive reindex`
+    # rebuilds the table from the segment files.
+    op.create_table(
+        "archived_entry_ref",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("pet_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["pet_id"], ["pet.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_archived_entry_ref_pet", "archived_entry_ref", ["pet_id"])
+
+
+def downgrade():
+    op.drop_index("ix_archived_entry_ref_pet", table_name="archived_entry_ref")
+    op.drop_table("archived_entry_ref")
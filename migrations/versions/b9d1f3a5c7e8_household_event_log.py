@@ -0,0 +1,38 @@
+"""household_event table: committed events relayed to SSE streams across workers
+
+Revision ID: b9d1f3a5c7e8
+Revises: a8c0e2f4b6d7
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b9d1f3a5c7e8"
+down_revision = "a8c0e2f4b6d7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "household_event",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("household_id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=32), nullable=False),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["household_id"], ["household.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        "ix_household_event_household", "household_event", ["household_id", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_household_event_household", table_name="household_event")
+    op.drop_table("household_event")
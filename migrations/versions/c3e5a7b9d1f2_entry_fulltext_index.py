@@ -0,0 +1,63 @@
+"""full-text index over entry.content
+
+SQLite: FTS5 external-content table plus sync triggers.
+PostgreSQL: GIN index on to_tsvector('english', content).
+
+Revision ID: c3e5a7b9d1f2
+Revises: b2d4f6a8c0e1
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3e5a7b9d1f2"
+down_revision = "b2d4f6a8c0e1"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS entry_fts USING fts5("
+    "content, content='entry', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ai AFTER INSERT ON entry BEGIN "
+    "INSERT INTO entry_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ad AFTER DELETE ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_au AFTER UPDATE OF content ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO entry_fts(rowid, content) VALUES (new.id, new.content); END",
+    # Index rows that existed before the table was created.
+    "INSERT INTO entry_fts(entry_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS entry_fts_au",
+    "DROP TRIGGER IF EXISTS entry_fts_ad",
+    "DROP TRIGGER IF EXISTS entry_fts_ai",
+    "DROP TABLE IF EXISTS entry_fts",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for stmt in SQLITE_UPGRADE:
+            op.execute(stmt)
+    elif dialect == "postgresql":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_entry_content_fts ON entry "
+            "USING gin (to_tsvector('english', content))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for stmt in SQLITE_DOWNGRADE:
+            op.execute(stmt)
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_entry_content_fts")
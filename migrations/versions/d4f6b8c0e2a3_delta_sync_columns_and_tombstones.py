@@ -0,0 +1,118 @@
+"""delta sync: updated_at columns, membership created_at, tombstone table
+
+Columns are added nullable and backfilled, because SQLite cannot ADD COLUMN
+with a non-constant default, and then made NOT NULL with a now() server
+default to match the models. On SQLite that last step rebuilds the tables
+(batch mode), which drops the entry full-text triggers, so they are recreated.
+
+Revision ID: d4f6b8c0e2a3
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4f6b8c0e2a3"
+down_revision = "c3e5a7b9d1f2"
+branch_labels = None
+depends_on = None
+
+
+_TIMESTAMPS = (
+    ("household", "updated_at"),
+    ("pet", "updated_at"),
+    ("entry", "updated_at"),
+    ("household_member", "created_at"),
+)
+
+# The entry_fts sync triggers as created by c3e5a7b9d1f2.
+_SQLITE_FTS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ai AFTER INSERT ON entry BEGIN "
+    "INSERT INTO entry_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ad AFTER DELETE ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_au AFTER UPDATE OF content ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO entry_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+
+def _restore_fts_triggers(dialect: str) -> None:
+    if dialect == "sqlite":
+        for stmt in _SQLITE_FTS_TRIGGERS:
+            op.execute(stmt)
+
+
+def _now_sql(dialect: str) -> str:
+    # Match SQLAlchemy's SQLite text format (microseconds) so comparisons line up.
+    if dialect == "sqlite":
+        return "strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'"
+    return "CURRENT_TIMESTAMP"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    now = _now_sql(dialect)
+
+    for table, column in _TIMESTAMPS:
+        op.add_column(table, sa.Column(column, sa.DateTime(), nullable=True))
+
+    op.execute(f"UPDATE household SET updated_at = {now}")
+    op.execute(f"UPDATE pet SET updated_at = {now}")
+    op.execute("UPDATE entry SET updated_at = created_at")
+    op.execute(f"UPDATE household_member SET created_at = {now}")
+
+    for table, column in _TIMESTAMPS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.DateTime(),
+                nullable=False,
+                server_default=sa.func.now(),
+            )
+    _restore_fts_triggers(dialect)
+
+    op.create_index("ix_household_updated", "household", ["updated_at"])
+    op.create_index("ix_pet_household_updated", "pet", ["household_id", "updated_at"])
+    op.create_index("ix_entries_pet_updated", "entry", ["pet_id", "updated_at"])
+
+    op.create_table(
+        "tombstone",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=False),
+        sa.Column("household_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tombstone_household_deleted", "tombstone", ["household_id", "deleted_at"]
+    )
+    op.create_index("ix_tombstone_user_deleted", "tombstone", ["user_id", "deleted_at"])
+
+
+def downgrade():
+    op.drop_index("ix_tombstone_user_deleted", table_name="tombstone")
+    op.drop_index("ix_tombstone_household_deleted", table_name="tombstone")
+    op.drop_table("tombstone")
+
+    op.drop_index("ix_entries_pet_updated", table_name="entry")
+    op.drop_index("ix_pet_household_updated", table_name="pet")
+    op.drop_index("ix_household_updated", table_name="household")
+
+    # SQLite needs batch mode to drop columns.
+    with op.batch_alter_table("household_member", schema=None) as batch_op:
+        batch_op.drop_column("created_at")
+    with op.batch_alter_table("entry", schema=None) as batch_op:
+        batch_op.drop_column("updated_at")
+    with op.batch_alter_table("pet", schema=None) as batch_op:
+        batch_op.drop_column("updated_at")
+    with op.batch_alter_table("household", schema=None) as batch_op:
+        batch_op.drop_column("updated_at")
+    _restore_fts_triggers(op.get_bind().dialect.name)
@@ -0,0 +1,38 @@
+"""pet_activity_daily rollup table, backfilled from entry
+
+Revision ID: e5a7c9e1f3b4
+Revises: d4f6b8c0e2a3
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5a7c9e1f3b4"
+down_revision = "d4f6b8c0e2a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "pet_activity_daily",
+        sa.Column("pet_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["pet_id"], ["pet.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("pet_id", "day", "user_id"),
+    )
+    op.execute(
+        "INSERT INTO pet_activity_daily (pet_id, day, user_id, count) "
+        "SELECT pet_id, date(created_at), user_id, count(*) FROM entry "
+        "GROUP BY pet_id, date(created_at), user_id"
+    )
+
+
+def downgrade():
+    op.drop_table("pet_activity_daily")
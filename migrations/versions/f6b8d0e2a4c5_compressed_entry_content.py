@@ -0,0 +1,73 @@
+"""index inflated text of compressed entry content
+
+Large entry content may now be stored as a zlib BLOB on SQLite. The FTS
+triggers go through the entry_text() SQL function, which the app registers on
+every connection, so the index keeps seeing plain text. Run it with `flask db
+upgrade`; without the function every later write to `entry` would fail, so the
+migration stops up front instead. Existing rows are compressed afterwards with
+`flask entries compress`.
+
+Revision ID: f6b8d0e2a4c5
+Revises: e5a7c9e1f3b4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f6b8d0e2a4c5"
+down_revision = "e5a7c9e1f3b4"
+branch_labels = None
+depends_on = None
+
+
+def _triggers(text):
+    """FTS sync triggers, with `text` wrapping every content reference."""
+    return (
+        "CREATE TRIGGER entry_fts_ai AFTER INSERT ON entry BEGIN "
+        f"INSERT INTO entry_fts(rowid, content) VALUES (new.id, {text('new')}); END",
+        "CREATE TRIGGER entry_fts_ad AFTER DELETE ON entry BEGIN "
+        "INSERT INTO entry_fts(entry_fts, rowid, content) "
+        f"VALUES ('delete', old.id, {text('old')}); END",
+        "CREATE TRIGGER entry_fts_au AFTER UPDATE OF content ON entry BEGIN "
+        "INSERT INTO entry_fts(entry_fts, rowid, content) "
+        f"VALUES ('delete', old.id, {text('old')}); "
+        f"INSERT INTO entry_fts(rowid, content) VALUES (new.id, {text('new')}); END",
+    )
+
+
+DROP_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS entry_fts_au",
+    "DROP TRIGGER IF EXISTS entry_fts_ad",
+    "DROP TRIGGER IF EXISTS entry_fts_ai",
+)
+
+
+def _require_entry_text():
+    try:
+        op.get_bind().execute(sa.text("SELECT entry_text(NULL)"))
+    except sa.exc.OperationalError as exc:
+        raise RuntimeError(
+            "entry_text() is not registered on this connection; run this migration "
+            "with `flask db upgrade` (or call app.compression.register_sqlite_functions)"
+        ) from exc
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return  # PostgreSQL stores large text compressed (TOAST) on its own
+    _require_entry_text()
+    for stmt in DROP_TRIGGERS + _triggers(lambda row: f"entry_text({row}.content)"):
+        op.execute(stmt)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _require_entry_text()
+    # Inflate compressed rows while the new triggers still keep the index right.
+    op.execute("UPDATE entry SET content = entry_text(content) WHERE typeof(content) = 'blob'")
+    for stmt in DROP_TRIGGERS + _triggers(lambda row: f"{row}.content"):
+        op.execute(stmt)
@@ -0,0 +1,163 @@
+"""Archive tests: old entries move to segment files but stay listed, exported and synced."""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.archive import ArchiveStore, archive_entries
+from app.models import ArchivedEntryRef, Entry, PetActivityDaily, db
+
+
+@pytest.fixture
+def archived(app, tmp_path, make_user, make_household, add_member, make_pet, make_entry):
+    """A pet with 3 entries per month over 4 old months and 2 recent ones; old ones archived."""
+    app.config["ARCHIVE_DIR"] = str(tmp_path)
+    u = make_user("archivist")
+    h = make_household(name="ArchiveHH", join_code="ARC123")
+    add_member(u, h, nickname="Owner")
+    p = make_pet(h, name="Ada")
+
+    start = datetime(2023, 1, 10, 8, 0)
+    for month in range(4):
+        for n in range(3):
+            make_entry(p, u, f"old-{month}-{n}", created_at=start + timedelta(days=31 * month, hours=n))
+    now = datetime.utcnow()
+    make_entry(p, u, "recent-0", created_at=now - timedelta(minutes=2))
+    make_entry(p, u, "recent-1", created_at=now - timedelta(minutes=1))
+
+    moved = archive_entries(db.session, ArchiveStore(str(tmp_path)), datetime(2024, 1, 1), batch_size=5)
+    assert moved == 12
+    return u, h, p, tmp_path
+
+
+def test_archive_writes_segments_and_shrinks_live_table(archived):
+    _, _, p, root = archived
+    assert Entry.query.filter_by(pet_id=p.id).count() == 2
+
+    names = sorted(os.listdir(root / f"pet-{p.id}"))
+    assert names == [f"2023-0{m}.{ext}" for m in range(1, 5) for ext in ("idx", "seg")]
+    # The rollup still counts archived entries.
+    assert sum(r.count for r in PetActivityDaily.query.filter_by(pet_id=p.id)) == 14
+
+
+def test_list_entries_pages_through_live_then_archived_rows(client, archived, login_as):
+    u, _, p, _ = archived
+    login_as(u.id)
+
+    seen, cursor = [], None
+    while True:
+        url = f"/api/v1/pets/{p.id}/entries?limit=4" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url)
+        assert r.status_code == 200
+        seen.extend(e["content"] for e in r.get_json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    expected = ["recent-1", "recent-0"] + [
+        f"old-{m}-{n}" for m in reversed(range(4)) for n in reversed(range(3))
+    ]
+    assert seen == expected
+
+
+def test_exports_include_archived_rows_in_order(client, archived, make_pet, make_entry, login_as):
+    u, h, p, _ = archived
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{p.id}/entries/export")
+    contents = [json.loads(line)["content"] for line in r.get_data(as_text=True).splitlines()]
+    assert contents[:3] == ["old-0-0", "old-0-1", "old-0-2"]
+    assert contents[-2:] == ["recent-0", "recent-1"]
+    assert len(contents) == 14
+
+    other = make_pet(h, name="Bo")
+    make_entry(other, u, "bo-mid", created_at=datetime(2023, 2, 20))
+    r = client.get(f"/api/v1/households/{h.id}/entries/export")
+    contents = [json.loads(line)["content"] for line in r.get_data(as_text=True).splitlines()]
+    assert len(contents) == 15
+    assert contents.index("bo-mid") == 6
+
+
+def test_rows_left_in_both_tiers_are_listed_once(client, archived, make_entry, login_as):
+    u, _, p, root = archived
+    # Simulate a crash between writing a segment and deleting the live rows.
+    e = make_entry(p, u, "twice", created_at=datetime(2023, 6, 1))
+    ArchiveStore(str(root)).append(p.id, [e])
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{p.id}/entries?limit=50")
+    contents = [e["content"] for e in r.get_json()]
+    assert contents.count("twice") == 1
+    assert len(contents) == 15
+
+
+def test_deleting_a_pet_removes_its_archive(client, archived, login_as):
+    u, _, p, root = archived
+    login_as(u.id)
+
+    assert client.delete(f"/api/v1/pets/{p.id}").status_code == 204
+    assert not (root / f"pet-{p.id}").exists()
+
+
+def test_list_entries_window_reads_only_matching_archived_rows(client, archived, login_as):
+    u, _, p, _ = archived
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{p.id}/entries?since=2023-02-01&until=2023-03-01")
+    assert [e["content"] for e in r.get_json()] == ["old-1-2", "old-1-1", "old-1-0"]
+    r = client.get(f"/api/v1/pets/{p.id}/entries?range=today")
+    assert [e["content"] for e in r.get_json()][-1] == "recent-0"
+
+
+@pytest.mark.parametrize("limit", [5, 6])
+def test_full_sync_pages_through_archived_then_live_entries(client, archived, login_as, limit):
+    u, h, _, _ = archived
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/sync?limit={limit}")
+    first = r.get_json()
+    assert [x["id"] for x in first["households"]] == [h.id]
+    seen = [e["content"] for e in first["entries"]]
+    while "X-Next-Cursor" in r.headers:
+        r = client.get(f"/api/v1/sync?limit={limit}&cursor={r.headers['X-Next-Cursor']}")
+        body = r.get_json()
+        assert body["watermark"] == first["watermark"] and body["households"] == []
+        assert len(body["entries"]) <= limit
+        seen += [e["content"] for e in body["entries"]]
+
+    old = [f"old-{m}-{n}" for m in range(4) for n in range(3)]
+    assert seen == old + ["recent-0", "recent-1"]
+
+
+def test_archived_entries_are_found_by_id_and_read_only(client, archived, login_as):
+    u, _, p, _ = archived
+    login_as(u.id)
+    entry_id = db.session.scalar(
+        db.select(ArchivedEntryRef.id).order_by(ArchivedEntryRef.created_at).limit(1)
+    )
+
+    r = client.get(f"/api/v1/entries/{entry_id}")
+    assert r.status_code == 200
+    assert r.get_json()["content"] == "old-0-0" and r.get_json()["pet_id"] == p.id
+    assert client.patch(f"/api/v1/entries/{entry_id}", json={"content": "x"}).status_code == 409
+    assert client.delete(f"/api/v1/entries/{entry_id}").status_code == 409
+    assert client.get("/api/v1/entries/999999").status_code == 404
+
+
+def test_search_flags_archived_history_and_reindex_rebuilds_refs(app, client, archived, login_as):
+    u, h, p, _ = archived
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{p.id}/entries/search?q=recent")
+    assert len(r.get_json()) == 2
+    assert r.headers["X-History-Truncated"] == "true"
+    r = client.get(f"/api/v1/households/{h.id}/entries/search?q=old")
+    assert r.get_json() == [] and r.headers["X-History-Truncated"] == "true"
+
+    db.session.execute(db.delete(ArchivedEntryRef))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["archive", "reindex"])
+    assert "Indexed 12 archived entries." in result.output
+    assert db.session.scalar(db.select(db.func.count()).select_from(ArchivedEntryRef)) == 12
@@ -31,4 +31,80 @@ def test_signup_login_logout_flow(client, app):
         assert rr.status_code in (200, 204, 302), rr.get_data(as_text=True)
     elif logout_get:
         rr = client.get(logout_get)
-        assert rr.status_code in (200, 204, 302), rr.get_data(as_text=True)
\ No newline at end of file
+        assert rr.status_code in (200, 204, 302), rr.get_data(as_text=True)
+
+def test_login_upgrades_outdated_password_hashes(client, app):
+    from werkzeug.security import generate_password_hash
+
+    from app.models import Users, db
+
+    db.session.add(
+        Users(username="old_hash", password_hash=generate_password_hash("pw", method="pbkdf2:sha256:1000"))
+    )
+    db.session.commit()
+
+    assert client.post("/api/v1/auth/login", json={"username": "old_hash", "password": "bad"}).status_code == 401
+    assert db.session.scalars(db.select(Users.password_hash)).one().startswith("pbkdf2:")
+
+    assert client.post("/api/v1/auth/login", json={"username": "old_hash", "password": "pw"}).status_code == 200
+    stored = db.session.scalars(db.select(Users.password_hash)).one()
+    assert stored.startswith("scrypt:32768:8:1$")
+    # Already current: a second login leaves it alone.
+    client.post("/api/v1/auth/login", json={"username": "old_hash", "password": "pw"})
+    assert db.session.scalars(db.select(Users.password_hash)).one() == stored
+
+
+def test_hash_cost_calibration_and_pool():
+    from app.passwords import MAX_N, PasswordHasher, calibrate
+
+    # 20 ms per hash at n = 2**15, doubling with n.
+    measure = lambda n: 0.020 * n / 2**15  # noqa: E731
+    assert calibrate(50, measure) == "scrypt:65536:8:1"
+    assert calibrate(10_000, measure) == f"scrypt:{MAX_N}:8:1"
+    # Slower than the target already: never drops below the floor.
+    assert calibrate(10, measure) == "scrypt:32768:8:1"
+    assert calibrate(10, measure, floor=2**16) == "scrypt:65536:8:1"
+
+    hasher = PasswordHasher("scrypt:16384:8:1", workers=1)
+    try:
+        hasher.start()
+        # Pool processes never fork from the (threaded) app process itself.
+        assert hasher._pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        pwhash = hasher.hash("secret")
+        assert hasher.verify(pwhash, "secret") and not hasher.verify(pwhash, "nope")
+        assert not hasher.needs_rehash(pwhash)
+        assert hasher.needs_rehash("scrypt:8192:8:1$salt$00")
+        assert not hasher.needs_rehash("scrypt:65536:8:1$salt$00")  # never downgraded
+    finally:
+        hasher.close()
+
+
+def test_hash_cost_is_calibrated_by_the_cli_only_upwards(app, monkeypatch):
+    from app import passwords
+
+    timed = []
+
+    def measure(n):
+        timed.append(n)
+        return 0.020 * n / 2**15
+
+    monkeypatch.setattr(passwords, "_time_hash", measure)
+    hasher = passwords.PasswordHasher.from_config(
+        {"PASSWORD_HASH_METHOD": "scrypt:16384:8:1", "PASSWORD_HASH_WORKERS": 0}
+    )
+    hasher.hash("pw")
+    assert timed == []  # nothing is measured while serving
+
+    runner = app.test_cli_runner()
+    app.config["PASSWORD_HASH_METHOD"] = "scrypt:65536:8:1"
+    result = runner.invoke(args=["passwords", "calibrate", "--target-ms", "50", "--quiet"])
+    assert result.output == "scrypt:65536:8:1\n"
+    assert timed == [2**16]  # starts from the configured cost, never below it
+    result = runner.invoke(args=["passwords", "calibrate", "--target-ms", "0", "--quiet"])
+    assert result.output == "scrypt:65536:8:1\n"
+
+
+def test_password_bench_reports_logins_per_core(app):
+    result = app.test_cli_runner().invoke(args=["passwords", "bench", "--seconds", "0.1"])
+    assert result.exit_code == 0, result.output
+    assert "logins/sec per core" in result.output
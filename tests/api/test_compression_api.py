@@ -0,0 +1,109 @@
+"""Entry compression tests: large content is stored compressed but reads back as text."""
+
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.compression import register_sqlite_functions
+from app.models import Entry, db
+
+REPORT = "Vet report: kidney values normal, recheck bloodwork in spring. " * 40
+
+
+def _storage(entry_id: int):
+    """(storage class, stored byte length) of an entry's content column."""
+    return tuple(
+        db.session.execute(
+            text("SELECT typeof(content), length(CAST(content AS BLOB)) FROM entry WHERE id = :id"),
+            {"id": entry_id},
+        ).one()
+    )
+
+
+def test_large_content_is_compressed_and_reads_back(client, seed_household, login_as):
+    u, h, p = seed_household("compressor")
+    login_as(u.id)
+
+    big = client.post(f"/api/v1/pets/{p.id}/entries", json={"content": REPORT.strip()}).get_json()
+    small = client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "Fed breakfast"}).get_json()
+
+    kind, stored = _storage(big["id"])
+    assert kind == "blob" and stored < len(REPORT) // 4
+    assert _storage(small["id"])[0] == "text"
+
+    listed = client.get(f"/api/v1/pets/{p.id}/entries").get_json()
+    assert [e["content"] for e in listed] == ["Fed breakfast", REPORT.strip()]
+    assert client.get(f"/api/v1/entries/{big['id']}").get_json()["content"] == REPORT.strip()
+
+    export = client.get(f"/api/v1/households/{h.id}/entries/export").get_data(as_text=True)
+    assert json.loads(export.splitlines()[0])["content"] == REPORT.strip()
+
+    # The full-text index sees the inflated text, including after an edit.
+    hits = client.get(f"/api/v1/pets/{p.id}/entries/search?q=bloodwork").get_json()
+    assert [e["id"] for e in hits] == [big["id"]]
+    client.patch(f"/api/v1/entries/{big['id']}", json={"content": REPORT.replace("kidney", "liver")})
+    assert client.get(f"/api/v1/pets/{p.id}/entries/search?q=kidney").get_json() == []
+    assert len(client.get(f"/api/v1/pets/{p.id}/entries/search?q=liver").get_json()) == 1
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "petcare_entry_compression_saved_bytes_total" in metrics
+
+
+def test_loading_an_entry_does_not_inflate_it(make_entry, seed_household):
+    u, _, p = seed_household("compressor")
+    e = make_entry(p, u, REPORT)
+    db.session.expire_all()
+
+    loaded = db.session.get(Entry, e.id)
+    assert isinstance(loaded._content, bytes)  # as stored; nothing decompressed yet
+    assert loaded.content == REPORT
+
+
+def test_pet_stats_snippet_of_compressed_entry(client, seed_household, login_as):
+    u, h, p = seed_household("compressor")
+    login_as(u.id)
+    client.post(f"/api/v1/pets/{p.id}/entries", json={"content": REPORT.strip()})
+
+    pets = client.get(f"/api/v1/households/{h.id}/pets?include=stats").get_json()
+    assert pets[0]["stats"]["latest_entry"]["snippet"].startswith("Vet report: kidney")
+
+
+def test_compress_command_backfills_in_place(app, client, make_entry, seed_household, login_as):
+    u, _, p = seed_household("compressor")
+    app.config["ENTRY_COMPRESS_MIN_BYTES"] = 10**9
+    e = make_entry(p, u, REPORT)
+    updated_at = e.updated_at
+    assert _storage(e.id)[0] == "text"
+
+    app.config["ENTRY_COMPRESS_MIN_BYTES"] = 1024
+    result = app.test_cli_runner().invoke(args=["entries", "compress"])
+    assert "Compressed 1 entries" in result.output
+
+    db.session.expire_all()
+    assert _storage(e.id)[0] == "blob"
+    stored = db.session.get(Entry, e.id)
+    assert stored.content == REPORT and stored.updated_at == updated_at
+
+    login_as(u.id)
+    assert len(client.get(f"/api/v1/pets/{p.id}/entries/search?q=kidney").get_json()) == 1
+
+
+def test_raw_sqlite_connections_need_entry_text(tmp_path):
+    path = tmp_path / "raw.db"
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)  # includes the FTS table and triggers
+    engine.dispose()
+
+    raw = sqlite3.connect(path)
+    insert = "INSERT INTO entry (pet_id, user_id, content) VALUES (1, 1, 'from a script')"
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="entry_text"):
+            raw.execute(insert)
+        register_sqlite_functions(raw)
+        raw.execute(insert)
+        hits = raw.execute("SELECT rowid FROM entry_fts WHERE entry_fts MATCH 'script'").fetchall()
+        assert len(hits) == 1
+    finally:
+        raw.close()
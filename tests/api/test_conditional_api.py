@@ -0,0 +1,97 @@
+"""Conditional GET tests: ETag / If-None-Match and Last-Modified on API reads."""
+
+from datetime import datetime, timedelta
+
+from werkzeug.http import http_date
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_household_etag_304_until_renamed(client, seed_household, login_as):
+    u, h, _ = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    url = f"/api/v1/households/{h.id}"
+
+    r = client.get(url)
+    etag = r.headers["ETag"]
+    assert r.status_code == 200 and etag
+
+    r = _revalidate(client, url, etag)
+    assert r.status_code == 304 and r.headers["ETag"] == etag and not r.data
+
+    client.patch(url, json={"name": "Renamed"})
+    r = _revalidate(client, url, etag)
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+    assert r.get_json()["name"] == "Renamed"
+
+
+def test_list_pets_etag_changes_when_pet_added(client, seed_household, login_as):
+    u, h, _ = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    url = f"/api/v1/households/{h.id}/pets"
+
+    etag = client.get(url).headers["ETag"]
+    assert _revalidate(client, url, etag).status_code == 304
+
+    client.post(url, json={"name": "Second"})
+    r = _revalidate(client, url, etag)
+    assert r.status_code == 200 and len(r.get_json()) == 2
+
+
+def test_get_pet_etag(client, seed_household, login_as):
+    u, _, p = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    url = f"/api/v1/pets/{p.id}"
+
+    etag = client.get(url).headers["ETag"]
+    assert _revalidate(client, url, etag).status_code == 304
+    client.patch(url, json={"name": "Renamed"})
+    assert _revalidate(client, url, etag).status_code == 200
+
+
+def test_list_entries_etag_tracks_create_edit_and_batch(client, seed_household, login_as):
+    u, _, p = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    url = f"/api/v1/pets/{p.id}/entries"
+
+    eid = client.post(url, json={"content": "a"}).get_json()["id"]
+    etag = client.get(url).headers["ETag"]
+    assert _revalidate(client, url, etag).status_code == 304
+
+    # Edits don't change created_at, but they must still invalidate the list.
+    client.patch(f"/api/v1/entries/{eid}", json={"content": "edited"})
+    r = _revalidate(client, url, etag)
+    assert r.status_code == 200 and r.get_json()[0]["content"] == "edited"
+
+    etag = r.headers["ETag"]
+    client.post(f"/api/v1/pets/{p.id}/entries:batch", json={"entries": [{"content": "b"}]})
+    assert _revalidate(client, url, etag).status_code == 200
+
+
+def test_list_entries_last_modified_fallback(client, make_entry, seed_household, login_as):
+    u, _, p = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    make_entry(p, u, "old", created_at=datetime(2024, 1, 1, 12, 0, 0))
+    url = f"/api/v1/pets/{p.id}/entries"
+
+    r = client.get(url)
+    assert r.headers["Last-Modified"] == http_date(datetime(2024, 1, 1, 12, 0, 0))
+
+    later = http_date(datetime(2024, 1, 2))
+    assert client.get(url, headers={"If-Modified-Since": later}).status_code == 304
+
+    earlier = http_date(datetime(2024, 1, 1) - timedelta(days=1))
+    assert client.get(url, headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_conditional_get_still_enforces_membership(client, make_user, seed_household, login_as):
+    u, h, _ = seed_household("etag_user", pet="Kiwi")
+    login_as(u.id)
+    etag = client.get(f"/api/v1/households/{h.id}").headers["ETag"]
+
+    outsider = make_user("etag_outsider")
+    login_as(outsider.id)
+    assert _revalidate(client, f"/api/v1/households/{h.id}", etag).status_code == 403
+    assert _revalidate(client, f"/api/v1/households/{h.id}/pets", etag).status_code == 403
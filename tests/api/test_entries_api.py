@@ -1,6 +1,8 @@
 """Entries API tests: create, list, get, update, delete, and basic ownership."""
 
-from app.models import Entry, Household, Pet, Users, db
+from datetime import datetime, timedelta
+
+from app.models import Entry, Household, HouseholdMember, Pet, Users, db
 from tests.common import extract_int, fill_route_params, find_api_route
 
 # ---------- helpers ----------
@@ -160,11 +162,6 @@ def _mk_user(app, username="entries_user"):
         return u.id
 
 
-def _login_as(client, uid: int):
-    with client.session_transaction() as s:
-        s["user_id"] = uid
-
-
 def _mk_household(app, name="HH", code=None):
     import random
     import string
@@ -186,6 +183,12 @@ def _mk_pet(app, hid: int, name="Milo"):
         return p.id
 
 
+def _mk_member(app, hid: int, uid: int):
+    with app.app_context():
+        db.session.add(HouseholdMember(household_id=hid, user_id=uid, nickname="Member"))
+        db.session.commit()
+
+
 def _mk_entry_direct(app, pid: int, uid: int, content="hi"):
     with app.app_context():
         e = Entry(pet_id=pid, user_id=uid, content=content)
@@ -204,16 +207,16 @@ def test_entries_create_401_when_not_logged_in(client, app):
     assert r.status_code == 401
 
 
-def test_entries_create_404_when_pet_missing(client, app):
+def test_entries_create_404_when_pet_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.post("/api/v1/pets/999999/entries", json={"content": "x"})
     assert r.status_code == 404
 
 
-def test_entries_create_400_when_content_missing_or_blank(client, app):
+def test_entries_create_400_when_content_missing_or_blank(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
 
@@ -223,9 +226,9 @@ def test_entries_create_400_when_content_missing_or_blank(client, app):
     assert "content is required" in r1.get_json()["error"]
 
 
-def test_entries_create_201_ok_with_location(client, app):
+def test_entries_create_201_ok_with_location(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
 
@@ -239,16 +242,16 @@ def test_entries_create_201_ok_with_location(client, app):
 # ---------- LIST ----------
 
 
-def test_entries_list_404_when_pet_missing(client, app):
+def test_entries_list_404_when_pet_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.get("/api/v1/pets/999999/entries")
     assert r.status_code == 404
 
 
-def test_entries_list_200_returns_array(client, app):
+def test_entries_list_200_returns_array(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
 
@@ -263,6 +266,103 @@ def test_entries_list_200_returns_array(client, app):
     assert len(data) >= 2
 
 
+def test_entries_list_keyset_pages_cover_all_rows_once(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    pid = _mk_pet(app, hid)
+    # Same-second timestamps are common; the id tiebreak must keep pages stable.
+    ids = {_mk_entry_direct(app, pid, uid, f"e{i}") for i in range(7)}
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f"/api/v1/pets/{pid}/entries?limit=3"
+        if cursor:
+            url += f"&cursor={cursor}"
+        r = client.get(url)
+        assert r.status_code == 200
+        page = r.get_json()
+        assert len(page) <= 3
+        seen.extend(e["id"] for e in page)
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) and set(seen) == ids
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_entries_list_400_for_bad_limit_or_cursor(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    pid = _mk_pet(app, hid)
+
+    assert client.get(f"/api/v1/pets/{pid}/entries?limit=0").status_code == 400
+    assert client.get(f"/api/v1/pets/{pid}/entries?limit=abc").status_code == 400
+    assert client.get(f"/api/v1/pets/{pid}/entries?cursor=%%%").status_code == 400
+
+
+def test_entries_list_filters_by_range_and_since_until(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    pid = _mk_pet(app, hid)
+    now = datetime.utcnow()
+    with app.app_context():
+        for content, created_at in [
+            ("now", now),
+            ("last-year", now - timedelta(days=400)),
+            ("jan-01", datetime(2024, 1, 1, 9)),
+            ("jan-02", datetime(2024, 1, 2, 9)),
+        ]:
+            db.session.add(Entry(pet_id=pid, user_id=uid, content=content, created_at=created_at))
+        db.session.commit()
+
+    def contents(query):
+        r = client.get(f"/api/v1/pets/{pid}/entries?{query}")
+        assert r.status_code == 200
+        return [e["content"] for e in r.get_json()]
+
+    assert contents("range=today") == ["now"]
+    assert contents("range=all") == ["now", "last-year", "jan-02", "jan-01"]
+    # since is inclusive, until exclusive; bare dates mean midnight UTC.
+    assert contents("since=2024-01-01&until=2024-01-02") == ["jan-01"]
+    assert contents("since=2024-01-01T00:00:00%2B00:00&until=2024-01-03") == ["jan-02", "jan-01"]
+    # since can only narrow a named range.
+    assert contents("range=today&since=2024-01-01") == ["now"]
+
+
+def test_entries_list_window_is_part_of_etag(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    pid = _mk_pet(app, hid)
+    _mk_entry_direct(app, pid, uid, "e")
+
+    full = client.get(f"/api/v1/pets/{pid}/entries")
+    today = client.get(f"/api/v1/pets/{pid}/entries?range=today")
+    assert full.headers["ETag"] != today.headers["ETag"]
+    assert "Last-Modified" not in today.headers
+    again = client.get(
+        f"/api/v1/pets/{pid}/entries?range=today", headers={"If-None-Match": today.headers["ETag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_entries_list_400_for_bad_window(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    pid = _mk_pet(app, hid)
+
+    assert client.get(f"/api/v1/pets/{pid}/entries?range=year").status_code == 400
+    assert client.get(f"/api/v1/pets/{pid}/entries?since=yesterday").status_code == 400
+    assert client.get(f"/api/v1/pets/{pid}/entries?until=2024-13-01").status_code == 400
+
+
 # ---------- GET ONE ----------
 
 
@@ -275,16 +375,16 @@ def test_entries_get_one_401_without_login(client, app):
     assert r.status_code == 401
 
 
-def test_entries_get_one_404_missing(client, app):
+def test_entries_get_one_404_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.get("/api/v1/entries/999999")
     assert r.status_code == 404
 
 
-def test_entries_get_one_200_ok(client, app):
+def test_entries_get_one_200_ok(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
     eid = _mk_entry_direct(app, pid, uid, "ok")
@@ -296,16 +396,16 @@ def test_entries_get_one_200_ok(client, app):
 # ---------- PATCH (author-only) ----------
 
 
-def test_entries_patch_404_missing(client, app):
+def test_entries_patch_404_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.patch("/api/v1/entries/999999", json={"content": "x"})
     assert r.status_code == 404
 
 
-def test_entries_patch_400_blank_content(client, app):
+def test_entries_patch_400_blank_content(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
     eid = _mk_entry_direct(app, pid, uid, "old")
@@ -314,9 +414,9 @@ def test_entries_patch_400_blank_content(client, app):
     assert "content is required" in r.get_json()["error"]
 
 
-def test_entries_patch_200_updates_content(client, app):
+def test_entries_patch_200_updates_content(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid)
     eid = _mk_entry_direct(app, pid, uid, "old")
@@ -337,8 +437,77 @@ def test_entries_delete_401_without_login(client, app):
     assert r.status_code == 401
 
 
-def test_entries_delete_404_missing(client, app):
+def test_entries_delete_404_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.delete("/api/v1/entries/999999")
-    assert r.status_code == 404
\ No newline at end of file
+    assert r.status_code == 404
+
+
+# ---------- BATCH ----------
+
+
+def test_entries_batch_creates_all_in_one_call(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    _mk_member(app, hid, uid)
+    pid = _mk_pet(app, hid)
+
+    payload = {
+        "entries": [
+            {"content": "breakfast"},
+            {"content": "vet visit", "created_at": "2024-03-01T09:30:00+01:00"},
+        ]
+    }
+    r = client.post(f"/api/v1/pets/{pid}/entries:batch", json=payload)
+    assert r.status_code == 201
+    body = r.get_json()
+    assert body["created"] == 2 and body["failed"] == 0
+    assert [res["status"] for res in body["results"]] == [201, 201]
+    assert body["results"][1]["entry"]["created_at"] == "2024-03-01T08:30:00"
+
+    with app.app_context():
+        assert Entry.query.filter_by(pet_id=pid).count() == 2
+
+
+def test_entries_batch_reports_per_item_errors(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    _mk_member(app, hid, uid)
+    pid = _mk_pet(app, hid)
+    foreign = _mk_pet(app, _mk_household(app, name="Other"), name="Stranger")
+
+    payload = {
+        "entries": [
+            {"pet_id": pid, "content": "ok"},
+            {"pet_id": 999999, "content": "no such pet"},
+            {"pet_id": pid, "content": "   "},
+            {"pet_id": pid, "content": "bad ts", "created_at": "yesterday"},
+            {"pet_id": foreign, "content": "not my household"},
+        ]
+    }
+    r = client.post("/api/v1/entries:batch", json=payload)
+    assert r.status_code == 207
+    statuses = [res["status"] for res in r.get_json()["results"]]
+    assert statuses == [201, 404, 400, 400, 403]
+    with app.app_context():
+        assert Entry.query.filter_by(pet_id=foreign).count() == 0
+
+    single = client.post(f"/api/v1/pets/{foreign}/entries:batch", json={"entries": [{"content": "x"}]})
+    assert single.status_code == 403
+
+
+def test_entries_batch_400_for_bad_payload_or_oversize(client, app, login_as):
+    uid = _mk_user(app)
+    login_as(uid)
+    hid = _mk_household(app)
+    _mk_member(app, hid, uid)
+    pid = _mk_pet(app, hid)
+    app.config["ENTRY_BATCH_MAX"] = 2
+
+    assert client.post(f"/api/v1/pets/{pid}/entries:batch", json={}).status_code == 400
+    too_many = {"entries": [{"content": str(i)} for i in range(3)]}
+    assert client.post(f"/api/v1/pets/{pid}/entries:batch", json=too_many).status_code == 400
+    assert client.post("/api/v1/pets/999999/entries:batch", json=too_many).status_code == 404
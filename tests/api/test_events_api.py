@@ -0,0 +1,152 @@
+"""Events API tests: SSE fan-out of committed entry changes with Last-Event-ID resume."""
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+from app.events import EventBroker, EventRelay, HouseholdEvent
+from app.models import StoredEvent, db
+
+
+def _parse(body: str):
+    """Return [(id, event, data)] for every non-comment SSE frame with data."""
+    frames = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if not line.startswith(":")
+        )
+        if "data" in fields:
+            frames.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+def _short_streams(app):
+    app.config.update(SSE_HEARTBEAT_SECONDS=0.05, SSE_MAX_SECONDS=0.2)
+
+
+def test_events_replay_committed_changes_after_last_event_id(client, app, make_user, make_household, add_member, make_pet, login_as):
+    _short_streams(app)
+    u = make_user("listener")
+    h = make_household(name="LiveHH", join_code="LIV123")
+    add_member(u, h, nickname="Owner")
+    p = make_pet(h, name="Luna")
+    login_as(u.id)
+
+    eid = client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "fed"}).get_json()["id"]
+    client.patch(f"/api/v1/entries/{eid}", json={"content": "fed twice"})
+    client.delete(f"/api/v1/entries/{eid}")
+    client.post(f"/api/v1/pets/{p.id}/entries:batch", json={"entries": [{"content": "walk"}]})
+
+    r = client.get(f"/api/v1/households/{h.id}/events", headers={"Last-Event-ID": "0"})
+    assert r.status_code == 200 and r.mimetype == "text/event-stream"
+    frames = _parse(r.get_data(as_text=True))
+    assert [f[1] for f in frames] == ["entry.created", "entry.updated", "entry.deleted", "entry.created"]
+    assert frames[1][2]["content"] == "fed twice"
+
+    # Resuming after the second event only replays what came later.
+    r = client.get(f"/api/v1/households/{h.id}/events", headers={"Last-Event-ID": str(frames[1][0])})
+    assert [f[1] for f in _parse(r.get_data(as_text=True))] == ["entry.deleted", "entry.created"]
+
+
+def test_events_heartbeat_when_idle(client, app, make_user, make_household, add_member, login_as):
+    _short_streams(app)
+    u = make_user("idle")
+    h = make_household(name="IdleHH", join_code="IDL123")
+    add_member(u, h, nickname="Owner")
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/households/{h.id}/events")
+    body = r.get_data(as_text=True)
+    assert ": heartbeat" in body and _parse(body) == []
+    # The household's channel goes away with its last stream.
+    r.close()
+    assert not app.extensions["event_broker"].has_subscribers
+
+
+def test_events_membership_required(client, make_user, make_household, login_as):
+    h = make_household(name="ClosedHH", join_code="CLO123")
+    login_as(make_user("outsider").id)
+    assert client.get(f"/api/v1/households/{h.id}/events").status_code == 403
+    assert client.get("/api/v1/households/999999/events").status_code == 404
+
+
+def test_unknown_or_pruned_last_event_id_gets_a_reset(client, app, seed_household, login_as):
+    _short_streams(app)
+    u, h, p = seed_household("listener")
+    login_as(u.id)
+    client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "fed"})
+
+    r = client.get(f"/api/v1/households/{h.id}/events", headers={"Last-Event-ID": "999"})
+    assert "event: reset" in r.get_data(as_text=True)
+
+    db.session.execute(db.update(StoredEvent).values(created_at=datetime.utcnow() - timedelta(days=1)))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["purge", "events"])
+    assert "Pruned 1 events" in result.output
+    r = client.get(f"/api/v1/households/{h.id}/events", headers={"Last-Event-ID": "0"})
+    assert "event: reset" in r.get_data(as_text=True)
+
+
+def test_events_committed_elsewhere_reach_every_worker(client, app, seed_household, login_as):
+    u, h, p = seed_household("listener")
+    login_as(u.id)
+    # A second worker process: its own broker, fed by its own relay from the log.
+    broker = EventBroker()
+    relay = EventRelay(app, broker, interval=0)
+    relay.attach()
+    after = broker.subscribe(h.id)
+
+    eid = client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "fed"}).get_json()["id"]
+    assert relay.poll() == 1
+    events = broker.wait(h.id, after, timeout=0)
+    assert [(ev.type, ev.data["id"]) for ev in events] == [("entry.created", eid)]
+    assert events[0].id == db.session.scalar(db.select(db.func.max(StoredEvent.id)))
+
+
+def test_relay_waits_for_a_missing_id_before_skipping_it(app, seed_household):
+    _, h, _ = seed_household("listener")
+    broker = EventBroker()
+    relay = EventRelay(app, broker, interval=0, gap_seconds=60)
+    relay.attach()
+    start = broker.subscribe(h.id)
+    db.session.execute(
+        db.insert(StoredEvent),
+        [
+            {"id": start + n, "household_id": h.id, "type": "entry.created", "data": "{}"}
+            for n in (1, 3)  # start + 2 is still uncommitted
+        ],
+    )
+    db.session.commit()
+
+    assert relay.poll() == 1 and broker.last_id == start + 1
+    relay._gap_seconds = 0  # the missing id never showed up: a rolled-back insert
+    assert relay.poll() == 1 and broker.last_id == start + 3
+
+
+def test_broker_fans_out_and_forgets_idle_households():
+    broker = EventBroker(backlog=2)
+    for _ in range(3):
+        broker.subscribe(7)
+    got = []
+
+    def subscriber():
+        got.append(broker.wait(7, 0, timeout=2))
+
+    threads = [threading.Thread(target=subscriber) for _ in range(3)]
+    for t in threads:
+        t.start()
+    broker.publish(HouseholdEvent(1, 7, "entry.created", {"id": 1}))
+    for t in threads:
+        t.join()
+    assert [len(events) for events in got] == [1, 1, 1]
+
+    broker.publish(HouseholdEvent(2, 7, "entry.created", {"id": 2}))
+    broker.publish(HouseholdEvent(3, 7, "entry.created", {"id": 3}))
+    assert broker.wait(7, 0, timeout=0) is None  # event 1 was evicted
+    assert [ev.data["id"] for ev in broker.wait(7, 1, timeout=0)] == [2, 3]
+
+    broker.publish(HouseholdEvent(4, 8, "entry.created", {"id": 4}))  # nobody listens to 8
+    assert broker.wait(8, 0, timeout=0) is None and broker.last_id == 4
+    for _ in range(3):
+        broker.unsubscribe(7)
+    assert not broker.has_subscribers
@@ -0,0 +1,52 @@
+"""Exports API tests: streamed NDJSON/CSV history for pets and households."""
+
+import csv
+import io
+import json
+
+
+def _seed(seed_household, make_pet, make_entry):
+    u, h, p1 = seed_household("exporter", pet="Ada")
+    p2 = make_pet(h, name="Bo")
+    make_entry(p1, u, "first")
+    make_entry(p2, u, 'comma, "quoted"')
+    make_entry(p1, u, "third")
+    return u, h, p1
+
+
+def test_pet_export_streams_ndjson(client, make_pet, make_entry, seed_household, login_as):
+    u, _, p1 = _seed(seed_household, make_pet, make_entry)
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{p1.id}/entries/export")
+    assert r.status_code == 200
+    assert r.mimetype == "application/x-ndjson"
+    assert r.is_streamed
+    rows = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [row["content"] for row in rows] == ["first", "third"]
+
+
+def test_household_export_streams_csv(client, make_pet, make_entry, seed_household, login_as):
+    u, h, _ = _seed(seed_household, make_pet, make_entry)
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/households/{h.id}/entries/export?format=csv")
+    assert r.status_code == 200
+    assert r.mimetype == "text/csv"
+    assert "attachment" in r.headers["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    assert [row["content"] for row in rows] == ["first", 'comma, "quoted"', "third"]
+
+
+def test_export_errors(client, make_user, make_pet, make_entry, seed_household, login_as):
+    u, h, p1 = _seed(seed_household, make_pet, make_entry)
+    outsider = make_user("outsider")
+
+    login_as(u.id)
+    assert client.get(f"/api/v1/pets/{p1.id}/entries/export?format=xml").status_code == 400
+    assert client.get("/api/v1/pets/999999/entries/export").status_code == 404
+    assert client.get("/api/v1/households/999999/entries/export").status_code == 404
+
+    login_as(outsider.id)
+    assert client.get(f"/api/v1/households/{h.id}/entries/export").status_code == 403
+    assert client.get(f"/api/v1/pets/{p1.id}/entries/export").status_code == 403
@@ -15,4 +15,70 @@ def test_metrics_endpoint_exposes_prometheus_text(client):
     assert r.mimetype.startswith("text/plain")
     body = r.get_data(as_text=True)
     # Our custom metric names should appear in the body.
-    assert "petcare_request_total" in body
\ No newline at end of file
+    assert "petcare_request_total" in body
+
+
+def test_metrics_are_aggregated_across_worker_processes(tmp_path):
+    """Two "workers" serve requests; a third process scrapes the sum of both."""
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    root = Path(__file__).resolve().parents[2]
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(root)}
+    serve = (
+        "from app import create_app\n"
+        "c = create_app(testing=True).test_client()\n"
+        "for _ in range(3): c.get('/health')\n"
+    )
+    scrape = (
+        "from app import create_app\n"
+        "print(create_app(testing=True).test_client().get('/metrics').get_data(as_text=True))\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", serve], env=env, cwd=tmp_path, check=True)
+    out = subprocess.run(
+        [sys.executable, "-c", scrape], env=env, cwd=tmp_path, check=True, capture_output=True, text=True
+    ).stdout
+
+    assert 'petcare_request_total{endpoint="health",method="GET"} 6.0' in out
+
+
+def test_sql_statements_and_time_are_recorded_per_endpoint(client, make_user, make_household, add_member):
+    from prometheus_client import REGISTRY
+
+    u = make_user("metered")
+    h = make_household(name="MeterHH", join_code="MTR123")
+    add_member(u, h, nickname="Owner")
+    with client.session_transaction() as s:
+        s["user_id"] = u.id
+
+    def sample(name, endpoint):
+        return REGISTRY.get_sample_value(name, {"endpoint": endpoint}) or 0
+
+    before = sample("petcare_db_queries_per_request_sum", "pets.list_pets")
+    health_before = sample("petcare_db_queries_per_request_count", "health")
+    time_before = sample("petcare_db_time_seconds_sum", "pets.list_pets")
+
+    assert client.get(f"/api/v1/households/{h.id}/pets").status_code == 200
+    assert client.get("/health").status_code == 200
+
+    # Membership/version check plus the pet list.
+    assert sample("petcare_db_queries_per_request_sum", "pets.list_pets") - before == 2
+    assert sample("petcare_db_time_seconds_sum", "pets.list_pets") > time_before
+    assert sample("petcare_db_queries_per_request_count", "health") == health_before + 1
+    assert sample("petcare_db_queries_per_request_sum", "health") == 0
+
+
+def test_repeated_statement_shapes_are_reported(app, caplog):
+    from app.querystats import QueryStats, warn_repeated
+
+    stats = QueryStats(track_shapes=True)
+    stats.shapes = {"SELECT pet.name FROM pet WHERE pet.id = ?": 7, "SELECT household": 1}
+    with caplog.at_level("WARNING", logger="app.querystats"):
+        repeated = warn_repeated("households_ui.household_dashboard", stats, threshold=5)
+
+    assert repeated == [("SELECT pet.name FROM pet WHERE pet.id = ?", 7)]
+    assert "possible N+1 in households_ui.household_dashboard: 7 x SELECT pet.name" in caplog.text
+    assert QueryStats().repeated(0) == []
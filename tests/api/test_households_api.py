@@ -208,11 +208,6 @@ def _mk_user(app, username="hh_smoke_user"):
         return u.id
 
 
-def _login_as(client, uid: int):
-    with client.session_transaction() as s:
-        s["user_id"] = uid
-
-
 def _mk_household(app, name="FamA", code=None):
     import random
     import string
@@ -226,23 +221,109 @@ def _mk_household(app, name="FamA", code=None):
         return h.id
 
 
-def test_household_show_404_for_missing_id(client, app):
+def test_household_show_404_for_missing_id(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.get("/api/v1/households/999999")
     assert r.status_code == 404
 
 
-def test_household_show_403_for_non_member(client, app):
+def test_household_show_403_for_non_member(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     hid = _mk_household(app, name="PrivateFam")
     r = client.get(f"/api/v1/households/{hid}")
     assert r.status_code == 403
 
 
-def test_household_delete_404_for_missing_id(client, app):
+def test_household_delete_404_for_missing_id(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.delete("/api/v1/households/999999")
-    assert r.status_code == 404
\ No newline at end of file
+    assert r.status_code == 404
+
+def _count_selects(fn):
+    """Run fn() and return how many SELECT statements it issued."""
+    from sqlalchemy import event
+
+    seen = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _on_execute)
+    return len(seen)
+
+
+def test_snapshot_bundles_household_members_pets_and_recent_entries(
+    client, make_user, make_household, add_member, make_pet, make_entry, login_as
+):
+    from datetime import datetime, timedelta
+
+    owner = make_user("snap_owner")
+    other = make_user("snap_other")
+    h = make_household(name="SnapFam", join_code="SNP123")
+    add_member(owner, h, nickname="Owner")
+    add_member(other, h, nickname="Sitter")
+    rex, ada = make_pet(h, name="Rex"), make_pet(h, name="Ada")
+    base = datetime(2024, 1, 1, 12, 0)
+    for i in range(7):
+        make_entry(rex, owner, f"rex {i}", created_at=base + timedelta(hours=i))
+    make_entry(ada, other, "ada 0", created_at=base)
+    login_as(owner.id)
+    url = f"/api/v1/households/{h.id}/snapshot"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["household"] == {"id": h.id, "name": "SnapFam", "join_code": "SNP123"}
+    assert [(m["username"], m["nickname"]) for m in body["members"]] == [
+        ("snap_owner", "Owner"),
+        ("snap_other", "Sitter"),
+    ]
+    assert [p["name"] for p in body["pets"]] == ["Ada", "Rex"]
+    assert [e["content"] for e in body["pets"][0]["recent_entries"]] == ["ada 0"]
+    assert [e["content"] for e in body["pets"][1]["recent_entries"]] == [
+        f"rex {i}" for i in (6, 5, 4, 3, 2)
+    ]
+    short = client.get(url + "?entries=2").get_json()
+    assert [e["content"] for e in short["pets"][1]["recent_entries"]] == ["rex 6", "rex 5"]
+    assert client.get(url + "?entries=0").status_code == 400
+
+    # Cached until any entry changes.
+    etag = r.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    make_entry(ada, owner, "ada 1", created_at=base + timedelta(days=1))
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_snapshot_query_count_does_not_grow_with_household(
+    client, make_user, make_household, add_member, make_pet, make_entry, login_as
+):
+    u = make_user("snap_big")
+    h = make_household(name="BigFam", join_code="BIG123")
+    add_member(u, h, nickname="Owner")
+    login_as(u.id)
+    url = f"/api/v1/households/{h.id}/snapshot"
+
+    make_entry(make_pet(h, name="Pet 0"), u, "hello")
+    small = _count_selects(lambda: client.get(url))
+    for i in range(1, 12):
+        p = make_pet(h, name=f"Pet {i}")
+        for _ in range(3):
+            make_entry(p, u, "hello")
+    big = _count_selects(lambda: client.get(url))
+    assert big == small
+
+
+def test_snapshot_requires_membership(client, make_user, make_household, login_as):
+    u = make_user("snap_outsider")
+    h = make_household(name="Closed", join_code="CLS123")
+    login_as(u.id)
+    assert client.get(f"/api/v1/households/{h.id}/snapshot").status_code == 403
+    assert client.get("/api/v1/households/999999/snapshot").status_code == 404
@@ -0,0 +1,116 @@
+"""Join-code tests: insert-and-retry allocation and cached code lookups."""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+import app.join_codes as join_codes
+from app.models import Household, db
+
+
+def _code_lookups(fn):
+    """Run fn() and count SELECTs that look a household up by join code."""
+    seen = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "household.join_code =" in statement:
+            seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _on_execute)
+    return len(seen)
+
+
+def _codes(monkeypatch, *codes):
+    it = iter(codes)
+    monkeypatch.setattr(join_codes, "gen_join_code", lambda n=6: next(it))
+
+
+def test_create_retries_on_code_collision(client, make_user, make_household, monkeypatch, login_as):
+    u = make_user("allocator")
+    make_household(name="Taken", join_code="TAKEN1")
+    login_as(u.id)
+    before = join_codes.JOIN_CODE_COLLISIONS._value.get()
+
+    _codes(monkeypatch, "TAKEN1", "TAKEN1", "FRESH2")
+    r = client.post("/api/v1/households", json={"name": "New"})
+    assert r.status_code == 201
+    assert r.get_json()["join_code"] == "FRESH2"
+    assert join_codes.JOIN_CODE_COLLISIONS._value.get() - before == 2
+    assert join_codes.JOIN_CODE_SPACE_USED._value.get() > 0
+
+
+def test_create_503_when_codes_run_out(app, client, make_user, make_household, monkeypatch, login_as):
+    u = make_user("unlucky")
+    make_household(name="Taken", join_code="TAKEN1")
+    login_as(u.id)
+    app.extensions["join_codes"].max_attempts = 3
+
+    _codes(monkeypatch, *["TAKEN1"] * 3)
+    assert client.post("/api/v1/households", json={"name": "New"}).status_code == 503
+    assert Household.query.count() == 1
+
+
+def test_unknown_codes_are_cached_until_a_household_takes_them(client, make_user, make_household, login_as):
+    u = make_user("joiner")
+    login_as(u.id)
+
+    def join(code):
+        return client.post("/api/v1/households/join", json={"join_code": code})
+
+    assert _code_lookups(lambda: join("NOPE99")) == 1
+    assert _code_lookups(lambda: join("NOPE99")) == 0
+    assert _code_lookups(lambda: join("not a code!")) == 0
+    assert join("NOPE99").status_code == 404
+
+    make_household(name="Late", join_code="NOPE99")
+    assert join("NOPE99").status_code == 201
+    # Known codes resolve from the cache as well.
+    assert _code_lookups(lambda: join("NOPE99")) == 0
+
+
+def test_generic_dialects_retry_in_a_savepoint(client, make_user, make_household, monkeypatch, login_as):
+    u = make_user("portable")
+    make_household(name="Taken", join_code="TAKEN1")
+    login_as(u.id)
+    monkeypatch.setattr(join_codes, "_UPSERT_INSERTS", {})
+
+    _codes(monkeypatch, "TAKEN1", "FRESH3")
+    r = client.post("/api/v1/households", json={"name": "Elsewhere"})
+    assert r.status_code == 201 and r.get_json()["join_code"] == "FRESH3"
+    assert Household.query.count() == 2
+
+
+def test_fill_is_sampled_on_an_interval_and_counts_soft_deleted(app, make_household, monkeypatch):
+    now = [1000.0]
+    service = join_codes.JoinCodeService(fill_interval=60, clock=lambda: now[0])
+    gone = make_household(name="Gone", join_code="GONE11")
+    gone.deleted_at = datetime.utcnow()
+    db.session.commit()
+
+    counts = []
+    monkeypatch.setattr(service, "_record_fill", lambda session: counts.append(1))
+    service.create_household(db.session, "One")
+    service.create_household(db.session, "Two")
+    assert len(counts) == 1
+    now[0] += 61
+    service.create_household(db.session, "Three")
+    assert len(counts) == 2
+
+    monkeypatch.undo()
+    assert service._record_fill(db.session) == 4 / join_codes.CODE_SPACE
+
+
+def test_cached_codes_expire(app, make_household):
+    now = [0.0]
+    service = join_codes.JoinCodeService(ttl=300, clock=lambda: now[0])
+    h = make_household(name="Cached", join_code="CACHE1")
+
+    assert _code_lookups(lambda: service.lookup(db.session, "CACHE1")) == 1
+    assert _code_lookups(lambda: service.lookup(db.session, "CACHE1")) == 0
+    now[0] += 301
+    assert _code_lookups(lambda: service.lookup(db.session, "CACHE1")) == 1
+    assert service.lookup(db.session, "CACHE1") == h.id
@@ -0,0 +1,82 @@
+"""Membership cache tests: hits skip the database, membership commits invalidate."""
+
+from sqlalchemy import event
+
+from app.membership import MembershipCache
+from app.models import db
+
+
+def _membership_selects(app, fn):
+    """Run fn() and count statements that read household_member."""
+    seen = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "household_member" in statement:
+            seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _on_execute)
+    return len(seen)
+
+
+def test_repeat_member_checks_hit_the_cache(app, client, make_user, make_household, add_member, login_as):
+    u = make_user("cached")
+    h = make_household(name="CacheHH", join_code="CCH123")
+    add_member(u, h, nickname="Owner")
+    login_as(u.id)
+    url = f"/api/v1/households/{h.id}/entries/export"
+
+    assert _membership_selects(app, lambda: client.get(url).get_data()) == 1
+    assert _membership_selects(app, lambda: client.get(url).get_data()) == 0
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "petcare_membership_cache_hits_total" in metrics
+    assert "petcare_membership_cache_misses_total" in metrics
+
+
+def test_membership_commits_invalidate(app, client, make_user, make_household, add_member, login_as):
+    owner = make_user("owner")
+    guest = make_user("guest")
+    h = make_household(name="InvHH", join_code="INV123")
+    add_member(owner, h, nickname="Owner")
+    url = f"/api/v1/households/{h.id}/entries/search?q=x"
+
+    login_as(guest.id)
+    assert client.get(url).status_code == 403  # caches "no households"
+    assert client.post("/api/v1/households/join", json={"join_code": "INV123"}).status_code == 201
+    assert client.get(url).status_code == 200
+
+    # Leaving through the UI is seen at once, too.
+    assert client.post(f"/households/{h.id}/leave").status_code in (302, 303)
+    assert client.get(url).status_code == 403
+
+    login_as(owner.id)
+    assert client.get(url).status_code == 200
+    assert client.delete(f"/api/v1/households/{h.id}").status_code == 204
+    assert client.get(url).status_code == 404
+
+
+def test_cache_is_bounded_and_expires():
+    now = [0.0]
+    cache = MembershipCache(max_users=2, ttl=10, clock=lambda: now[0])
+    loads = []
+
+    def load(uid):
+        loads.append(uid)
+        return {uid * 10}
+
+    for uid in (1, 2, 1, 3, 1, 2):
+        assert cache.get_or_load(uid, load) == {uid * 10}
+    # 1 stays hot; 3 evicts 2, so 2 is loaded again.
+    assert loads == [1, 2, 3, 2]
+
+    now[0] = 11
+    cache.get_or_load(1, load)
+    assert loads[-1] == 1
+
+    cache.invalidate([1])
+    cache.get_or_load(1, load)
+    assert loads[-1] == 1 and len(loads) == 6
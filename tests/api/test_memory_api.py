@@ -0,0 +1,80 @@
+"""Memory diagnostics tests: tracing on/off, snapshot top sites, diffs, gauges, admin access."""
+
+import tracemalloc
+
+import pytest
+
+
+@pytest.fixture
+def admin_client(app, client, make_user, login_as):
+    app.config["ADMIN_USERNAMES"] = frozenset({"mem_admin"})
+    login_as(make_user("mem_admin").id)
+    yield client
+    tracemalloc.stop()
+
+
+def _grow(n: int):
+    return [bytearray(1024) for _ in range(n)]  # the allocation site the diff must find
+
+
+def test_snapshots_and_diffs_find_the_growing_site(admin_client):
+    client = admin_client
+    assert client.get("/api/v1/admin/memory").get_json()["tracing"] is False
+    assert client.post("/api/v1/admin/memory/snapshots").status_code == 409
+    assert client.post("/api/v1/admin/memory/tracing", json={"frames": 0}).status_code == 400
+
+    body = client.post("/api/v1/admin/memory/tracing", json={"frames": 5}).get_json()
+    assert body["tracing"] is True and tracemalloc.get_traceback_limit() == 5
+
+    before = client.post("/api/v1/admin/memory/snapshots").get_json()["id"]
+    kept = _grow(2000)
+    r = client.post("/api/v1/admin/memory/snapshots?limit=5")
+    assert r.status_code == 201
+    after = r.get_json()
+    assert len(after["top"]) <= 5
+    assert any("test_memory_api.py" in site["site"] for site in after["top"])
+
+    r = client.get(f"/api/v1/admin/memory/snapshots/{after['id']}/diff/{before}?limit=3")
+    assert r.status_code == 200
+    biggest = r.get_json()["changes"][0]
+    assert "test_memory_api.py" in biggest["site"]
+    assert biggest["count_diff"] >= 2000 and biggest["size_diff_bytes"] >= 2000 * 1024
+    del kept
+
+    by_file = client.get(f"/api/v1/admin/memory/snapshots/{before}?group_by=filename").get_json()
+    assert all(":" not in s["site"].rsplit("/", 1)[-1] for s in by_file["top"])
+    assert client.get(f"/api/v1/admin/memory/snapshots/{before}?group_by=x").status_code == 400
+    assert client.get("/api/v1/admin/memory/snapshots/999").status_code == 404
+    assert client.get(f"/api/v1/admin/memory/snapshots/999/diff/{before}").status_code == 404
+
+    status = client.get("/api/v1/admin/memory").get_json()
+    assert [s["id"] for s in status["snapshots"]] == [before, after["id"]]
+    assert status["traced_bytes"] > 0
+
+    assert client.delete("/api/v1/admin/memory/tracing").status_code == 204
+    status = client.get("/api/v1/admin/memory").get_json()
+    assert status["tracing"] is False and status["snapshots"] == []
+
+
+def test_only_the_newest_snapshots_are_kept(app, admin_client):
+    app.extensions["memory"]._keep = 2
+    admin_client.post("/api/v1/admin/memory/tracing")
+    ids = [admin_client.post("/api/v1/admin/memory/snapshots").get_json()["id"] for _ in range(3)]
+    kept = admin_client.get("/api/v1/admin/memory").get_json()["snapshots"]
+    assert [s["id"] for s in kept] == ids[1:]
+    assert admin_client.get(f"/api/v1/admin/memory/snapshots/{ids[0]}").status_code == 404
+
+
+def test_memory_endpoints_require_an_admin(client, make_user, login_as):
+    assert client.post("/api/v1/admin/memory/tracing").status_code == 401
+    login_as(make_user("mem_user").id)
+    assert client.post("/api/v1/admin/memory/tracing").status_code == 403
+    assert client.get("/api/v1/admin/memory").status_code == 403
+    assert not tracemalloc.is_tracing()
+
+
+def test_rss_and_gc_gauges_are_exported(client):
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "petcare_process_rss_bytes" in metrics
+    assert 'petcare_gc_collections{generation="0"}' in metrics
+    assert 'petcare_gc_pending_objects{generation="2"}' in metrics
@@ -4,7 +4,9 @@ import re
 from datetime import datetime
 
 from tests.common import extract_int, fill_route_params, find_api_route
-from app.models import Household, HouseholdMember, Pet, Users, db
+from app.models import Entry, Household, HouseholdMember, Pet, PetActivityDaily, Users, db
+from app import rollups
+from app.rollups import rebuild
 
 
 # ---------- dynamic API helpers ----------
@@ -167,11 +169,6 @@ def _mk_user(app, username="pets_user"):
         return u.id
 
 
-def _login_as(client, user_id: int):
-    with client.session_transaction() as s:
-        s["user_id"] = user_id
-
-
 def _mk_household(app, name="HH", join_code=None):
     if join_code is None:
         import random, string
@@ -202,11 +199,11 @@ def _mk_pet(app, hid, name="Milo"):
 
 # ---------- CREATE / LIST (household-nested) ----------
 
-def test_create_pet_201_ok(client, app):
+def test_create_pet_201_ok(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.post(f"/api/v1/households/{hid}/pets", json={"name": "API Pup"})
     assert r.status_code == 201, r.get_data(as_text=True)
@@ -216,113 +213,113 @@ def test_create_pet_201_ok(client, app):
     assert body["household_id"] == hid
 
 
-def test_create_pet_400_missing_name(client, app):
+def test_create_pet_400_missing_name(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.post(f"/api/v1/households/{hid}/pets", json={})
     assert r.status_code == 400
     assert "name is required" in r.get_json()["error"]
 
 
-def test_create_pet_404_bad_household(client, app):
+def test_create_pet_404_bad_household(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.post("/api/v1/households/999999/pets", json={"name": "Ghost"})
     assert r.status_code == 404
 
 
-def test_list_pets_403_non_member(client, app):
+def test_list_pets_403_non_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
-    _login_as(client, uid)  # not a member
+    login_as(uid)  # not a member
     r = client.get(f"/api/v1/households/{hid}/pets")
     assert r.status_code == 403
 
 
 # ---------- GET / PATCH / DELETE (by pet id) ----------
 
-def test_get_pet_200_member(client, app):
+def test_get_pet_200_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
     pid = _mk_pet(app, hid, "Rory")
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.get(f"/api/v1/pets/{pid}")
     assert r.status_code == 200
     assert r.get_json()["name"] == "Rory"
 
 
-def test_get_pet_403_not_member(client, app):
+def test_get_pet_403_not_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid, "Rory")
-    _login_as(client, uid)  # not a member
+    login_as(uid)  # not a member
     r = client.get(f"/api/v1/pets/{pid}")
     assert r.status_code == 403
 
 
-def test_get_pet_404_missing(client, app):
+def test_get_pet_404_missing(client, app, login_as):
     uid = _mk_user(app)
-    _login_as(client, uid)
+    login_as(uid)
     r = client.get("/api/v1/pets/999999")
     assert r.status_code == 404
 
 
-def test_patch_pet_200_no_change_when_empty_payload(client, app):
+def test_patch_pet_200_no_change_when_empty_payload(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
     pid = _mk_pet(app, hid, "Milo")
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.patch(f"/api/v1/pets/{pid}", json={})
     assert r.status_code == 200
     assert r.get_json()["name"] == "Milo"
 
 
-def test_patch_pet_400_empty_name(client, app):
+def test_patch_pet_400_empty_name(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
     pid = _mk_pet(app, hid, "Milo")
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.patch(f"/api/v1/pets/{pid}", json={"name": "   "})
     assert r.status_code == 400
     assert "cannot be empty" in r.get_json()["error"]
 
 
-def test_patch_pet_200_valid_rename(client, app):
+def test_patch_pet_200_valid_rename(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
     pid = _mk_pet(app, hid, "Milo")
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.patch(f"/api/v1/pets/{pid}", json={"name": "Nala"})
     assert r.status_code == 200
     assert r.get_json()["name"] == "Nala"
 
 
-def test_patch_pet_403_not_member(client, app):
+def test_patch_pet_403_not_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid, "Milo")
-    _login_as(client, uid)  # not a member
+    login_as(uid)  # not a member
     r = client.patch(f"/api/v1/pets/{pid}", json={"name": "X"})
     assert r.status_code == 403
 
 
-def test_delete_pet_204_member(client, app):
+def test_delete_pet_204_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     _add_member(app, hid, uid)
     pid = _mk_pet(app, hid, "ToDelete")
-    _login_as(client, uid)
+    login_as(uid)
 
     r = client.delete(f"/api/v1/pets/{pid}")
     assert r.status_code == 204
@@ -330,11 +327,11 @@ def test_delete_pet_204_member(client, app):
     assert r2.status_code == 404
 
 
-def test_delete_pet_403_not_member(client, app):
+def test_delete_pet_403_not_member(client, app, login_as):
     uid = _mk_user(app)
     hid = _mk_household(app)
     pid = _mk_pet(app, hid, "Stranger")
-    _login_as(client, uid)  # not a member
+    login_as(uid)  # not a member
     r = client.delete(f"/api/v1/pets/{pid}")
     assert r.status_code == 403
 
@@ -351,4 +348,184 @@ def test_localdt_none_and_invalid_tz(app):
 def test_localdt_naive_treated_as_utc(app):
     f = app.jinja_env.filters["localdt"]
     s = f(datetime(2025, 1, 1, 12, 0))
-    assert re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$", s)
\ No newline at end of file
+    assert re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$", s)
+
+# ---------- STATS (rollup-backed) ----------
+
+
+def test_pet_stats_buckets_and_authors(client, app, login_as):
+    owner = _mk_user(app, "stats_owner")
+    other = _mk_user(app, "stats_other")
+    hid = _mk_household(app, name="StatsHH")
+    _add_member(app, hid, owner, "Owner")
+    _add_member(app, hid, other, "Other")
+    pid = _mk_pet(app, hid, name="Counted")
+    with app.app_context():
+        for uid, ts in (
+            (owner, datetime(2024, 3, 4, 9)),  # Monday
+            (owner, datetime(2024, 3, 4, 18)),
+            (other, datetime(2024, 3, 6, 8)),
+            (owner, datetime(2024, 4, 1, 8)),
+        ):
+            db.session.add(Entry(pet_id=pid, user_id=uid, content="x", created_at=ts))
+        db.session.commit()
+    login_as(owner)
+
+    r = client.get(f"/api/v1/pets/{pid}/stats?bucket=week")
+    assert r.status_code == 200
+    buckets = r.get_json()["buckets"]
+    assert [(b["start"], b["total"]) for b in buckets] == [("2024-03-04", 3), ("2024-04-01", 1)]
+    assert buckets[0]["by_user"] == {str(owner): 2, str(other): 1}
+
+    r = client.get(f"/api/v1/pets/{pid}/stats?bucket=month&since=2024-03-05")
+    assert [(b["start"], b["total"]) for b in r.get_json()["buckets"]] == [
+        ("2024-03-01", 1),
+        ("2024-04-01", 1),
+    ]
+
+
+def test_pet_stats_follow_api_writes_and_rebuild(client, app, login_as):
+    uid = _mk_user(app, "stats_writer")
+    hid = _mk_household(app, name="StatsHH2")
+    _add_member(app, hid, uid, "Owner")
+    pid = _mk_pet(app, hid, name="Live")
+    login_as(uid)
+
+    eid = client.post(f"/api/v1/pets/{pid}/entries", json={"content": "a"}).get_json()["id"]
+    client.post(f"/api/v1/pets/{pid}/entries:batch", json={"entries": [{"content": "b"}, {"content": "c"}]})
+    client.delete(f"/api/v1/entries/{eid}")
+
+    def total():
+        return sum(b["total"] for b in client.get(f"/api/v1/pets/{pid}/stats").get_json()["buckets"])
+
+    assert total() == 2
+
+    with app.app_context():
+        assert rebuild(db.session) == 1
+        db.session.commit()
+    assert total() == 2
+
+
+def test_pet_stats_without_upsert_support(client, app, monkeypatch, login_as):
+    monkeypatch.setattr(rollups, "_UPSERT_INSERTS", {})
+    uid = _mk_user(app, "stats_generic")
+    hid = _mk_household(app, name="StatsHH4")
+    _add_member(app, hid, uid, "Owner")
+    pid = _mk_pet(app, hid, name="Portable")
+    login_as(uid)
+
+    eid = client.post(f"/api/v1/pets/{pid}/entries", json={"content": "a"}).get_json()["id"]
+    client.post(f"/api/v1/pets/{pid}/entries:batch", json={"entries": [{"content": "b"}, {"content": "c"}]})
+    client.delete(f"/api/v1/entries/{eid}")
+
+    buckets = client.get(f"/api/v1/pets/{pid}/stats").get_json()["buckets"]
+    assert sum(b["total"] for b in buckets) == 2
+    with app.app_context():
+        # One counter, inserted by the first entry, then updated in place.
+        assert [r.count for r in PetActivityDaily.query.filter_by(pet_id=pid)] == [2]
+
+
+def test_pet_stats_validation_and_membership(client, app, login_as):
+    uid = _mk_user(app, "stats_val")
+    hid = _mk_household(app, name="StatsHH3")
+    pid = _mk_pet(app, hid, name="Private")
+    login_as(uid)
+    assert client.get(f"/api/v1/pets/{pid}/stats").status_code == 403
+
+    _add_member(app, hid, uid, "Owner")
+    assert client.get(f"/api/v1/pets/{pid}/stats?bucket=year").status_code == 400
+    assert client.get(f"/api/v1/pets/{pid}/stats?since=March").status_code == 400
+    assert client.get("/api/v1/pets/999999/stats").status_code == 404
+
+
+def _count_selects(app, fn):
+    """Run fn() and return how many SELECT statements it issued."""
+    from sqlalchemy import event
+
+    seen = []
+
+    def _on_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+    return len(seen)
+
+
+def test_list_pets_include_stats_embeds_counts_and_latest(client, app, login_as):
+    owner = _mk_user(app, "stats_list")
+    hid = _mk_household(app, name="StatsList")
+    _add_member(app, hid, owner, "Mum")
+    busy = _mk_pet(app, hid, name="Busy")
+    _mk_pet(app, hid, name="Quiet")
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add(Entry(pet_id=busy, user_id=owner, content="old", created_at=datetime(2024, 1, 1)))
+        db.session.add(Entry(pet_id=busy, user_id=owner, content="walk " * 50, created_at=now))
+        db.session.commit()
+    login_as(owner)
+
+    r = client.get(f"/api/v1/households/{hid}/pets?include=stats")
+    assert r.status_code == 200
+    busy_json, quiet_json = r.get_json()
+    assert busy_json["stats"]["entries"] == 2 and busy_json["stats"]["today"] == 1
+    latest = busy_json["stats"]["latest_entry"]
+    assert latest["author"] == "Mum" and latest["user_id"] == owner
+    assert latest["snippet"].startswith("walk walk") and len(latest["snippet"]) <= 120
+    assert quiet_json["stats"] == {"entries": 0, "today": 0, "latest_entry": None}
+
+    # A new entry changes the tag even though the household version doesn't move.
+    etag = r.headers["ETag"]
+    assert client.get(
+        f"/api/v1/households/{hid}/pets?include=stats", headers={"If-None-Match": etag}
+    ).status_code == 304
+    client.post(f"/api/v1/pets/{busy}/entries", json={"content": "dinner"})
+    r = client.get(f"/api/v1/households/{hid}/pets?include=stats", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.get_json()[0]["stats"]["latest_entry"]["snippet"] == "dinner"
+    assert client.get(f"/api/v1/households/{hid}/pets?include=owners").status_code == 400
+
+
+def test_list_pets_include_stats_query_count_is_flat(client, app, login_as):
+    owner = _mk_user(app, "stats_flat")
+    hid = _mk_household(app, name="StatsFlat")
+    _add_member(app, hid, owner, "Owner")
+    login_as(owner)
+    url = f"/api/v1/households/{hid}/pets?include=stats"
+
+    def add_pets(n):
+        for i in range(n):
+            pid = _mk_pet(app, hid, name=f"Pet{i}")
+            with app.app_context():
+                db.session.add(Entry(pet_id=pid, user_id=owner, content=f"e{i}"))
+                db.session.commit()
+
+    add_pets(1)
+    one = _count_selects(app, lambda: client.get(url))
+    add_pets(6)
+    seven = _count_selects(app, lambda: client.get(url))
+    assert seven == one
+
+
+def test_member_checks_resolve_in_one_query(client, app, login_as):
+    owner = _mk_user(app, "authz_owner")
+    outsider = _mk_user(app, "authz_outsider")
+    hid = _mk_household(app, name="AuthzHH")
+    _add_member(app, hid, owner, "Owner")
+    pid = _mk_pet(app, hid, name="Solo")
+
+    login_as(owner)
+    assert _count_selects(app, lambda: client.get(f"/api/v1/pets/{pid}")) == 1
+    assert _count_selects(app, lambda: client.get(f"/api/v1/households/{hid}")) == 1
+
+    login_as(outsider)
+    for url in (f"/api/v1/pets/{pid}", f"/api/v1/households/{hid}/pets"):
+        assert _count_selects(app, lambda: client.get(url)) == 1
+        assert client.get(url).status_code == 403
+    assert _count_selects(app, lambda: client.patch(f"/api/v1/households/{hid}", json={"name": "x"})) == 1
+    assert client.get("/api/v1/pets/999999").status_code == 404
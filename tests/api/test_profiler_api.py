@@ -0,0 +1,67 @@
+"""Request profiler tests: admin-only opt-in, saved reports, pruning, admin access."""
+
+import pytest
+
+from app.profiler import PROFILE_ID_HEADER
+
+
+@pytest.fixture
+def profiles(app, tmp_path):
+    app.config["PROFILE_DIR"] = str(tmp_path / "profiles")
+    return tmp_path / "profiles"
+
+
+def test_admin_requests_can_be_profiled(
+    app, client, profiles, make_user, make_household, add_member, make_pet, login_as
+):
+    admin = make_user("prof_admin")
+    h = make_household(name="ProfHH", join_code="PRF123")
+    add_member(admin, h, nickname="Owner")
+    make_pet(h, name="Rex")
+    app.config["ADMIN_USERNAMES"] = frozenset({"prof_admin"})
+    login_as(admin.id)
+
+    assert PROFILE_ID_HEADER not in client.get(f"/api/v1/households/{h.id}/pets").headers
+    assert not profiles.exists()
+
+    r = client.get(f"/api/v1/households/{h.id}/pets", headers={"X-Profile": "1"})
+    assert r.status_code == 200
+    report_id = r.headers[PROFILE_ID_HEADER]
+    assert "pets.list_pets" in report_id
+    assert (profiles / f"{report_id}.prof").is_file()
+
+    text = (profiles / f"{report_id}.txt").read_text()
+    assert f"GET /api/v1/households/{h.id}/pets -> 200" in text
+    assert "sql: 2 statements" in text and "SELECT pet." in text
+    assert "list_pets" in text and "Call tree" in text
+
+    r = client.get(f"/api/v1/households/{h.id}?_profile=1")
+    second = r.headers[PROFILE_ID_HEADER]
+    assert client.get("/api/v1/admin/profiles").get_json() == {
+        "enabled": True,
+        "profiles": sorted([report_id, second], reverse=True),
+    }
+    r = client.get(f"/api/v1/admin/profiles/{report_id}")
+    assert r.status_code == 200 and r.mimetype == "text/plain"
+    assert r.get_data(as_text=True) == text
+    assert client.get("/api/v1/admin/profiles/..%2Fsecret").status_code == 404
+    assert client.get("/api/v1/admin/profiles/20250101T000000-x-abcdef").status_code == 404
+
+
+def test_profile_flag_is_ignored_for_non_admins(app, client, profiles, make_user, login_as):
+    login_as(make_user("nosy").id)
+    r = client.get("/health", headers={"X-Profile": "1"})
+    assert PROFILE_ID_HEADER not in r.headers
+    assert not profiles.exists()
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+
+
+def test_only_the_newest_reports_are_kept(app, client, profiles, make_user, login_as):
+    admin = make_user("prune_admin")
+    app.config.update(ADMIN_USERNAMES=frozenset({"prune_admin"}), PROFILE_KEEP=2)
+    login_as(admin.id)
+
+    for _ in range(4):
+        assert PROFILE_ID_HEADER in client.get("/health?_profile=1").headers
+    assert len(list(profiles.glob("*.txt"))) == 2
+    assert len(list(profiles.glob("*.prof"))) == 2
@@ -0,0 +1,103 @@
+"""Deferred deletion tests: deletes hide rows at once, purge jobs remove them in batches."""
+
+import logging
+
+from sqlalchemy import func, select
+
+from app.models import Entry, Household, Pet, PurgeJob, db
+from app.purge import run_job
+
+
+class _HeldPurger:
+    """Stands in for the background purger so tests can look between the two steps."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+
+
+def _count(model, **filters):
+    stmt = select(func.count()).select_from(model).filter_by(**filters)
+    return db.session.scalar(stmt.execution_options(include_deleted=True))
+
+
+def _seed(seed_household, make_pet, make_entry):
+    u, h, rex = seed_household("purger")
+    ada = make_pet(h, name="Ada")
+    entries = [make_entry(rex, u, f"rex {i}") for i in range(3)]
+    entries += [make_entry(ada, u, f"ada {i}") for i in range(2)]
+    return u, h, rex, ada, entries
+
+
+def test_household_delete_hides_at_once_and_purges_in_batches(
+    app, client, caplog, make_pet, make_entry, seed_household, login_as
+):
+    u, h, rex, ada, entries = _seed(seed_household, make_pet, make_entry)
+    hid, rex_id, entry_id = h.id, rex.id, entries[0].id
+    held = app.extensions["purger"] = _HeldPurger()
+    login_as(u.id)
+    since = client.get("/api/v1/sync").get_json()["watermark"]
+
+    assert client.delete(f"/api/v1/households/{hid}").status_code == 204
+
+    # Nothing has been purged yet, but every read already treats it as gone.
+    assert _count(Entry) == 5
+    assert client.get(f"/api/v1/households/{hid}").status_code == 404
+    assert client.get(f"/api/v1/households/{hid}/snapshot").status_code == 404
+    assert client.get(f"/api/v1/pets/{rex_id}").status_code == 404
+    assert client.get(f"/api/v1/pets/{rex_id}/entries").status_code == 404
+    assert client.get(f"/api/v1/entries/{entry_id}").status_code == 404
+    assert client.get(f"/api/v1/households/{hid}/entries/search?q=rex").status_code == 404
+    synced = client.get(f"/api/v1/sync?since={since}").get_json()
+    assert synced["households"] == [] and synced["deleted"]["households"] == [hid]
+
+    (job_id,) = held.submitted
+    job = db.session.get(PurgeJob, job_id)
+    assert (job.kind, job.object_id, job.status) == ("household", hid, "pending")
+
+    app.config["PURGE_BATCH_SIZE"] = 2
+    with caplog.at_level(logging.INFO, logger="app.purge"):
+        job = run_job(job_id)
+    assert (job.status, job.purged, job.total) == ("done", 5, 5)
+    assert "purge job %d: 5/5 entries" % job_id in caplog.text
+    assert _count(Entry) == 0
+    assert _count(Pet) == 0
+    assert _count(Household) == 0
+
+
+def test_pet_delete_leaves_siblings_and_bumps_the_household(
+    client, make_pet, make_entry, seed_household, login_as
+):
+    u, h, rex, ada, _ = _seed(seed_household, make_pet, make_entry)
+    login_as(u.id)
+    listing = client.get(f"/api/v1/households/{h.id}/pets")
+
+    assert client.delete(f"/api/v1/pets/{rex.id}").status_code == 204
+
+    # The default (inline) purger has already finished.
+    assert _count(Entry, pet_id=rex.id) == 0
+    assert _count(Entry, pet_id=ada.id) == 2
+    job = db.session.scalars(select(PurgeJob)).one()
+    assert (job.kind, job.status, job.purged) == ("pet", "done", 3)
+
+    r = client.get(f"/api/v1/households/{h.id}/pets", headers={"If-None-Match": listing.headers["ETag"]})
+    assert r.status_code == 200
+    assert [p["name"] for p in r.get_json()] == ["Ada"]
+
+
+def test_purge_cli_reports_and_resumes(app, client, make_pet, make_entry, seed_household, login_as):
+    u, h, rex, _, _ = _seed(seed_household, make_pet, make_entry)
+    app.extensions["purger"] = _HeldPurger()
+    login_as(u.id)
+    assert client.delete(f"/api/v1/pets/{rex.id}").status_code == 204
+
+    runner = app.test_cli_runner()
+    assert f"pet {rex.id}: pending, 0/? entries" in runner.invoke(args=["purge", "status"]).output
+
+    result = runner.invoke(args=["purge", "resume"])
+    assert "Resumed 1 purge jobs." in result.output
+    assert runner.invoke(args=["purge", "status"]).output.strip() == "No purge jobs."
+    assert f"pet {rex.id}: done, 3/3 entries" in runner.invoke(args=["purge", "status", "--all"]).output
+    assert _count(Pet, id=rex.id) == 0
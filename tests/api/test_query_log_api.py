@@ -0,0 +1,89 @@
+"""Slow-query log tests: fingerprint stats, redacted logging, EXPLAIN capture, admin access."""
+
+import logging
+from types import SimpleNamespace
+
+from app.query_log import QueryLog, fingerprint
+
+
+def test_fingerprints_collapse_literals_and_lists():
+    a = fingerprint("SELECT * FROM entry WHERE pet_id IN (?, ?, ?) AND content = 'x'  LIMIT 5")
+    b = fingerprint("SELECT * FROM entry\nWHERE pet_id IN (?) AND content = 'it''s' LIMIT 50")
+    assert a == b == "SELECT * FROM entry WHERE pet_id IN (...) AND content = ? LIMIT ?"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (%(a)s, %(b)s), (%(a_1)s, %(b_1)s)") == (
+        "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    )
+
+
+def test_slow_queries_are_logged_explained_and_ranked(
+    app, client, caplog, make_user, make_household, add_member, make_pet, login_as
+):
+    admin = make_user("root_admin")
+    h = make_household(name="SlowHH", join_code="SLW123")
+    add_member(admin, h, nickname="Owner")
+    make_pet(h, name="Rex")
+    app.config["ADMIN_USERNAMES"] = frozenset({"root_admin"})
+    app.extensions["query_log"] = QueryLog(threshold_ms=0)  # everything counts as slow
+    login_as(admin.id)
+
+    with caplog.at_level(logging.WARNING, logger="app.query_log"):
+        for _ in range(3):
+            client.get(f"/api/v1/households/{h.id}/pets")
+        client.post("/api/v1/auth/login", json={"username": "root_admin", "password": "hunter2"})
+
+    assert "slow query" in caplog.text and "endpoint=pets.list_pets" in caplog.text
+    assert "hunter2" not in caplog.text and "'root_admin'" not in caplog.text
+
+    body = client.get("/api/v1/admin/queries?sort=calls").get_json()
+    assert body["enabled"] is True
+    queries = body["queries"]
+    assert [q["calls"] for q in queries] == sorted((q["calls"] for q in queries), reverse=True)
+    pets = next(q for q in queries if q["fingerprint"].startswith("SELECT pet."))
+    assert pets["calls"] == 3 and pets["slow_calls"] == 3
+    assert pets["last_endpoint"] == "pets.list_pets"
+    assert pets["explain"] and "pet" in pets["explain"]
+    assert pets["mean_ms"] <= pets["max_ms"]
+
+    assert client.get("/api/v1/admin/queries?sort=bogus").status_code == 400
+    assert client.delete("/api/v1/admin/queries").status_code == 204
+    assert client.get("/api/v1/admin/queries").get_json()["queries"][0]["fingerprint"].startswith(
+        "SELECT users.username"
+    )
+
+
+def test_admin_endpoints_require_an_admin(app, client, make_user, login_as):
+    assert client.get("/api/v1/admin/queries").status_code == 401
+    login_as(make_user("plain_user").id)
+    assert client.get("/api/v1/admin/queries").status_code == 403
+
+    app.config["ADMIN_USERNAMES"] = frozenset({"plain_user"})
+    body = client.get("/api/v1/admin/queries").get_json()
+    assert body == {"enabled": False, "threshold_ms": None, "queries": []}
+
+
+class _FailingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, parameters=None):
+        self.executed.append(sql)
+        if sql.startswith("EXPLAIN"):
+            raise RuntimeError("relation does not exist")
+
+    def close(self):
+        pass
+
+
+def test_failed_explain_is_rolled_back_to_a_savepoint():
+    cursor = _FailingCursor()
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=lambda: cursor)),
+    )
+    assert QueryLog(threshold_ms=0)._explain(conn, "SELECT * FROM gone", ()) is None
+    assert cursor.executed == [
+        "SAVEPOINT query_log_explain",
+        "EXPLAIN SELECT * FROM gone",
+        "ROLLBACK TO SAVEPOINT query_log_explain",
+        "RELEASE SAVEPOINT query_log_explain",
+    ]
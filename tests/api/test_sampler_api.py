@@ -0,0 +1,100 @@
+"""Stack sampler tests: collapsed stacks of request threads, worker merge, admin access, bench."""
+
+import os
+import threading
+
+import app.sampler as sampler_module
+from app.sampler import StackSampler, format_collapsed, parse_collapsed
+
+
+def _in_view(sampler, entered, release):
+    sampler.enter("pets.list_pets")
+    entered.set()
+    release.wait()
+    sampler.leave()
+
+
+def _sample_thread_in_view(sampler):
+    entered, release = threading.Event(), threading.Event()
+    worker = threading.Thread(target=_in_view, args=(sampler, entered, release))
+    worker.start()
+    entered.wait()
+    try:
+        sampler.sample()
+        sampler.sample()
+    finally:
+        release.set()
+        worker.join()
+    sampler.sample()  # nobody in a request any more: nothing recorded
+
+
+def test_samples_only_threads_handling_requests():
+    sampler = StackSampler(interval_ms=60_000)
+    try:
+        _sample_thread_in_view(sampler)
+    finally:
+        sampler.stop()
+
+    counts = sampler.counts()
+    assert sampler.samples == 2
+    [(stack, n)] = counts.items()
+    assert n == 2
+    frames = stack.split(";")
+    assert frames[0] == "pets.list_pets"
+    assert frames[-3:] == [
+        f"{__name__}:_in_view",
+        "threading:wait",
+        "threading:wait",
+    ]
+    assert parse_collapsed(format_collapsed(counts).splitlines(True)) == counts
+
+
+def test_admin_stacks_merge_workers(app, client, make_user, tmp_path, login_as):
+    admin = make_user("flame_admin")
+    app.config["ADMIN_USERNAMES"] = frozenset({"flame_admin"})
+    login_as(admin.id)
+    assert client.get("/api/v1/admin/stacks").status_code == 404  # disabled in tests
+
+    (tmp_path / "stacks_99999.txt").write_text("pets.list_pets;other:worker 5\nhealth;x:y 1\n")
+    sampler = StackSampler(interval_ms=60_000, flush_dir=str(tmp_path))
+    app.extensions["sampler"] = sampler
+    try:
+        sampler.start()
+        _sample_thread_in_view(sampler)
+        r = client.get("/api/v1/admin/stacks")
+    finally:
+        sampler.stop()
+
+    assert r.status_code == 200 and r.mimetype == "text/plain"
+    merged = parse_collapsed(r.get_data(as_text=True).splitlines(True))
+    assert merged["pets.list_pets;other:worker"] == 5
+    assert merged["health;x:y"] == 1
+    assert sum(n for stack, n in merged.items() if stack.endswith("threading:wait")) == 2
+    # Stopping writes this worker's own file for the others to read.
+    assert (tmp_path / f"stacks_{os.getpid()}.txt").is_file()
+
+    assert client.delete("/api/v1/admin/stacks").status_code == 204
+    assert not sampler.counts()
+
+    login_as(make_user("not_admin").id)
+    assert client.get("/api/v1/admin/stacks").status_code == 403
+
+
+def test_bench_reports_overhead(app):
+    result = app.test_cli_runner().invoke(
+        args=["sampler", "bench", "--requests", "5", "--rounds", "2", "--interval-ms", "1"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "overhead:" in result.output and "sampler busy:" in result.output
+
+
+def test_frame_labels_are_shared_by_recompiled_code():
+    source = "import sys\ndef where():\n    return sys._getframe()\n"
+    frames = []
+    for _ in range(3):
+        scope = {"__name__": "generated"}
+        exec(compile(source, "<generated>", "exec"), scope)
+        frames.append(scope["where"]())
+    before = len(sampler_module._labels)
+    assert {sampler_module._frame_label(f) for f in frames} == {"generated:where"}
+    assert len(sampler_module._labels) == before + 1
@@ -0,0 +1,69 @@
+"""Search API tests: ranked full-text search kept in sync with entry writes."""
+
+
+def _contents(resp):
+    return [e["content"] for e in resp.get_json()]
+
+
+def test_search_ranks_and_scopes(client, make_pet, make_entry, seed_household, login_as):
+    u, h, rex = seed_household("searcher")
+    tom = make_pet(h, name="Tom")
+    make_entry(rex, u, "Fed breakfast")
+    make_entry(rex, u, "Vet visit: vaccines. The vet said all good, vet again in May")
+    make_entry(rex, u, "Short vet check")
+    make_entry(tom, u, "Tom went to the vet")
+    login_as(u.id)
+
+    r = client.get(f"/api/v1/pets/{rex.id}/entries/search?q=vet")
+    assert r.status_code == 200
+    hits = r.get_json()
+    assert len(hits) == 2 and all(e["pet_id"] == rex.id for e in hits)
+    assert hits[0]["score"] >= hits[1]["score"]
+
+    r = client.get(f"/api/v1/households/{h.id}/entries/search?q=VET")
+    assert len(r.get_json()) == 3
+
+    # Stemming (porter) and punctuation in the query are handled.
+    r = client.get(f"/api/v1/pets/{rex.id}/entries/search?q=vaccine%22)")
+    assert _contents(r) == ["Vet visit: vaccines. The vet said all good, vet again in May"]
+
+
+def test_search_index_follows_patch_and_delete(client, make_entry, seed_household, login_as):
+    u, _, rex = seed_household("searcher")
+    e = make_entry(rex, u, "groomer appointment")
+    login_as(u.id)
+    url = f"/api/v1/pets/{rex.id}/entries/search"
+
+    assert len(client.get(f"{url}?q=groomer").get_json()) == 1
+
+    client.patch(f"/api/v1/entries/{e.id}", json={"content": "bath day"})
+    assert client.get(f"{url}?q=groomer").get_json() == []
+    assert len(client.get(f"{url}?q=bath").get_json()) == 1
+
+    client.delete(f"/api/v1/entries/{e.id}")
+    assert client.get(f"{url}?q=bath").get_json() == []
+
+
+def test_search_paginates_with_offset(client, make_entry, seed_household, login_as):
+    u, _, rex = seed_household("searcher")
+    for i in range(5):
+        make_entry(rex, u, f"walk number {i}")
+    login_as(u.id)
+    url = f"/api/v1/pets/{rex.id}/entries/search?q=walk&limit=2"
+
+    r1 = client.get(url)
+    assert len(r1.get_json()) == 2 and r1.headers["X-Next-Offset"] == "2"
+    r3 = client.get(url + "&offset=4")
+    assert len(r3.get_json()) == 1 and "X-Next-Offset" not in r3.headers
+
+
+def test_search_errors(client, make_user, seed_household, login_as):
+    u, h, rex = seed_household("searcher")
+    login_as(u.id)
+    assert client.get(f"/api/v1/pets/{rex.id}/entries/search").status_code == 400
+    assert client.get(f"/api/v1/pets/{rex.id}/entries/search?q=x&offset=-1").status_code == 400
+    assert client.get("/api/v1/pets/999999/entries/search?q=x").status_code == 404
+
+    login_as(make_user("nosy").id)
+    assert client.get(f"/api/v1/households/{h.id}/entries/search?q=x").status_code == 403
+    assert client.get(f"/api/v1/pets/{rex.id}/entries/search?q=x").status_code == 403
@@ -0,0 +1,193 @@
+"""Sync API tests: full first sync, deltas after a watermark, tombstones and paging."""
+
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+from sqlalchemy import event
+
+from app.models import Entry, HouseholdMember, Pet, Tombstone, db, record_tombstones
+
+
+def _sync(client, since=None):
+    url = "/api/v1/sync" + (f"?since={since}" if since else "")
+    r = client.get(url)
+    assert r.status_code == 200, r.get_data(as_text=True)
+    return r.get_json()
+
+
+def test_first_sync_returns_everything_visible(client, make_household, make_pet, make_entry, seed_household, login_as):
+    u, h, p = seed_household("syncer", pet="Pip")
+    e = make_entry(p, u, "first")
+    other = make_household(name="NotMine", join_code="OTH123")
+    make_pet(other, name="Stranger")
+    login_as(u.id)
+
+    body = _sync(client)
+    assert [x["id"] for x in body["households"]] == [h.id]
+    assert [x["id"] for x in body["pets"]] == [p.id]
+    assert [x["id"] for x in body["entries"]] == [e.id]
+    assert body["watermark"]
+
+
+def test_delta_sync_returns_only_changes_and_tombstones(client, app, make_entry, seed_household, login_as):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    u, h, p = seed_household("syncer", pet="Pip")
+    e = make_entry(p, u, "first")
+    doomed = make_entry(p, u, "to delete")
+    login_as(u.id)
+    watermark = _sync(client)["watermark"]
+
+    assert _sync(client, watermark)["entries"] == []
+
+    client.patch(f"/api/v1/entries/{e.id}", json={"content": "edited"})
+    client.delete(f"/api/v1/entries/{doomed.id}")
+    new_id = client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "new"}).get_json()["id"]
+
+    body = _sync(client, watermark)
+    assert sorted(x["id"] for x in body["entries"]) == sorted([e.id, new_id])
+    assert body["deleted"]["entries"] == [doomed.id]
+    assert body["households"] == []
+
+
+def test_sync_tombstones_for_pet_delete_and_leaving(client, app, make_household, add_member, make_entry, seed_household, login_as):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    u, h, p = seed_household("syncer", pet="Pip")
+    make_entry(p, u, "first")
+    h2 = make_household(name="Second", join_code="SEC123")
+    add_member(u, h2, nickname="Me")
+    login_as(u.id)
+    watermark = _sync(client)["watermark"]
+
+    client.delete(f"/api/v1/pets/{p.id}")
+    m = HouseholdMember.query.filter_by(user_id=u.id, household_id=h2.id).first()
+    db.session.delete(m)
+    db.session.commit()
+
+    deleted = _sync(client, watermark)["deleted"]
+    assert deleted["pets"] == [p.id]
+    assert deleted["households"] == [h2.id]
+
+
+def test_newly_joined_household_is_sent_in_full(client, app, make_user, make_household, add_member, make_pet, make_entry, login_as):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    u = make_user("joiner")
+    owner = make_user("owner")
+    h = make_household(name="Joined", join_code="JOI123")
+    add_member(owner, h, nickname="Owner")
+    p = make_pet(h, name="Old")
+    make_entry(p, owner, "history")
+    login_as(u.id)
+    watermark = _sync(client)["watermark"]
+
+    add_member(u, h, nickname="Joiner")
+    body = _sync(client, watermark)
+    assert [x["id"] for x in body["households"]] == [h.id]
+    assert [x["id"] for x in body["pets"]] == [p.id]
+    assert len(body["entries"]) == 1
+
+
+def test_entry_changes_do_not_resend_the_pet(client, app, make_entry, seed_household, login_as):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    u, h, p = seed_household("syncer", pet="Pip")
+    login_as(u.id)
+    watermark = _sync(client)["watermark"]
+    version = db.session.get(Pet, p.id).version
+
+    client.post(f"/api/v1/pets/{p.id}/entries", json={"content": "new"})
+    body = _sync(client, watermark)
+    assert len(body["entries"]) == 1
+    assert body["pets"] == [] and body["households"] == []
+    db.session.expire_all()
+    assert db.session.get(Pet, p.id).version > version  # ETags still change
+
+    client.patch(f"/api/v1/pets/{p.id}", json={"name": "Renamed"})
+    assert [x["name"] for x in _sync(client, watermark)["pets"]] == ["Renamed"]
+
+
+def test_entry_tombstones_resolve_households_in_one_query(make_pet, make_entry, seed_household):
+    u, h, p = seed_household("syncer", pet="Pip")
+    other = make_pet(h, name="Other")
+    entries = [make_entry(p, u, "a"), make_entry(p, u, "b"), make_entry(other, u, "c")]
+    household_id, entry_ids = h.id, [e.id for e in entries]
+    db.session.expunge_all()  # nothing cached in the identity map
+    loaded = db.session.query(Entry).filter(Entry.id.in_(entry_ids)).all()
+
+    pet_selects = []
+
+    def count(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM pet" in statement:
+            pet_selects.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        record_tombstones(db.session, loaded)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(pet_selects) == 1
+    stones = [s for s in db.session.new if isinstance(s, Tombstone)]
+    assert {s.household_id for s in stones} == {household_id} and len(stones) == 3
+
+
+def test_sync_410_once_tombstones_may_be_pruned(client, app, make_entry, seed_household, login_as):
+    app.config["SYNC_TOMBSTONE_RETENTION_DAYS"] = 30
+    u, h, p = seed_household("syncer", pet="Pip")
+    doomed = make_entry(p, u, "old")
+    login_as(u.id)
+    client.delete(f"/api/v1/entries/{doomed.id}")
+    stone = db.session.query(Tombstone).filter_by(kind="entry").one()
+    stone.deleted_at = datetime.utcnow() - timedelta(days=31)
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    assert "Pruned 1 tombstones" in runner.invoke(args=["purge", "tombstones"]).output
+    assert db.session.query(Tombstone).count() == 0
+
+    old = (datetime.utcnow() - timedelta(days=31)).isoformat()
+    r = client.get(f"/api/v1/sync?since={old}")
+    assert r.status_code == 410
+    assert "full resync" in r.get_json()["error"]
+    recent = (datetime.utcnow() - timedelta(days=29)).isoformat()
+    assert client.get(f"/api/v1/sync?since={recent}").status_code == 200
+
+
+def test_sync_400_on_bad_watermark(client, make_user, login_as):
+    login_as(make_user("bad_since").id)
+    assert client.get("/api/v1/sync?since=yesterday").status_code == 400
+
+
+def test_sync_pages_entries_and_keeps_the_first_watermark(client, app, make_entry, seed_household, login_as):
+    u, h, p = seed_household("syncer", pet="Pip")
+    e = make_entry(p, u, "first")
+    ids = [e.id] + [make_entry(p, u, f"more {i}").id for i in range(4)]
+    login_as(u.id)
+
+    r = client.get("/api/v1/sync?limit=2")
+    first = r.get_json()
+    assert len(first["entries"]) == 2 and first["households"]
+    seen = [x["id"] for x in first["entries"]]
+    while "X-Next-Cursor" in r.headers:
+        r = client.get(f"/api/v1/sync?limit=2&cursor={r.headers['X-Next-Cursor']}")
+        body = r.get_json()
+        assert body["watermark"] == first["watermark"]
+        assert body["households"] == [] and body["pets"] == []
+        seen += [x["id"] for x in body["entries"]]
+    assert sorted(seen) == sorted(ids)
+
+    assert client.get("/api/v1/sync?cursor=nope").status_code == 400
+    assert client.get("/api/v1/sync?limit=0").status_code == 400
+
+
+def test_sync_normalizes_aware_since_to_utc(client, app, make_entry, seed_household, login_as):
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    u, h, p = seed_household("syncer", pet="Pip")
+    e = make_entry(p, u, "first")
+    login_as(u.id)
+    watermark = datetime.fromisoformat(_sync(client)["watermark"])
+
+    # The same instant written two hours east of UTC.
+    aware = (watermark + timedelta(hours=2)).replace(tzinfo=timezone(timedelta(hours=2)))
+    assert _sync(client, quote(aware.isoformat()))["entries"] == []
+    client.patch(f"/api/v1/entries/{e.id}", json={"content": "edited"})
+    assert [x["id"] for x in _sync(client, quote(aware.isoformat()))["entries"]] == [e.id]
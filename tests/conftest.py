@@ -5,6 +5,8 @@ import sys
 from pathlib import Path
 
 import pytest
+from flask import g, request_finished
+from flask import request as flask_request
 from werkzeug.security import generate_password_hash
 
 # Ensure project root (containing "app/") is importable
@@ -30,6 +32,57 @@ def app():
             db.drop_all()
 
 
+# ----- query budgets ---------------------------------------------------------
+
+# Most statements any one request may run; endpoints that legitimately need
+# more get their own entry. Tests that build unusual data can raise the limit
+# with @pytest.mark.query_budget(n).
+DEFAULT_QUERY_BUDGET = 15
+QUERY_BUDGETS = {
+    # Tests purge inline, so these also count the batched entry deletes.
+    "households.delete_household": 30,
+    "pets.delete_pet": 30,
+    "pets_ui.pets_delete": 30,
+}
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): allow each request in this test up to n SQL statements"
+    )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    """Fail a test whose requests exceed their statement budget or repeat one shape (N+1)."""
+    if "app" not in request.fixturenames:
+        yield
+        return
+    flask_app = request.getfixturevalue("app")
+    marker = request.node.get_closest_marker("query_budget")
+    threshold = flask_app.config["NPLUSONE_THRESHOLD"]
+    problems = []
+
+    def _check(sender, response, **extra):
+        stats = g.get("query_stats")
+        if stats is None:
+            return
+        endpoint = flask_request.endpoint or "unknown"
+        budget = marker.args[0] if marker else QUERY_BUDGETS.get(endpoint, DEFAULT_QUERY_BUDGET)
+        if stats.count > budget:
+            problems.append(f"{endpoint}: {stats.count} statements (budget {budget})")
+        for key, n in stats.repeated(threshold):
+            problems.append(f"{endpoint}: possible N+1, {n} x {key}")
+
+    request_finished.connect(_check, flask_app)
+    try:
+        yield
+    finally:
+        request_finished.disconnect(_check, flask_app)
+    if problems:
+        pytest.fail("query budget exceeded:\n" + "\n".join(problems), pytrace=False)
+
+
 @pytest.fixture
 def client(app):
     """Return a Flask test client bound to the fresh app."""
@@ -96,9 +149,33 @@ def make_entry(app):
     return _make
 
 
+@pytest.fixture
+def seed_household(make_user, make_household, add_member, make_pet):
+    """A user who is a member of a fresh household with one pet: (user, household, pet)."""
+
+    def _seed(username: str = "owner", join_code: str = "SEED01", pet: str = "Rex"):
+        u = make_user(username)
+        h = make_household(name=f"{username}'s home", join_code=join_code)
+        add_member(u, h, nickname="Owner")
+        return u, h, make_pet(h, name=pet)
+
+    return _seed
+
+
 # ----- session/login helpers ------------------------------------------------
 
 
+@pytest.fixture
+def login_as(client):
+    """Put a user id in the test client's session, skipping the password check."""
+
+    def _login(user_id: int):
+        with client.session_transaction() as s:
+            s["user_id"] = user_id
+
+    return _login
+
+
 @pytest.fixture
 def login_ui(client, make_user):
     def _login(username: str = "alice", password: str = "pw"):
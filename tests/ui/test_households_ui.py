@@ -114,4 +114,18 @@ def test_join_invalid_code_when_already_member(client, login_ui, make_household,
 
     r = client.post("/join", data={"code": "HHC0DE", "nickname": "Me"})
     assert r.status_code == 200
-    assert b"already a member" in r.data
\ No newline at end of file
+    assert b"already a member" in r.data
+
+
+def test_households_index_loads_households_with_memberships(
+    app, client, login_ui, make_household, add_member
+):
+    login_ui("many", "pw")
+    user = Users.query.filter_by(username="many").first()
+    threshold = app.config["NPLUSONE_THRESHOLD"]
+    for i in range(threshold + 2):
+        add_member(user, make_household(name=f"Home {i}", join_code=f"MNY{i:03d}"))
+
+    r = client.get("/households")
+    assert r.status_code == 200
+    assert b"Home 0" in r.data and f"Home {threshold + 1}".encode() in r.data